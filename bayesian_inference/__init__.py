@@ -1,9 +1,30 @@
+import importlib
+
 from .exceptions import (
     IncompleteNodeDataException, PredecessorNotExistInNetwork, NotAllExpectedProbabilityExist,
     HaveAtLeastOneRandomVariable, NonUniqueRandomVariablesInQuery, RandomVariableNotInContext,
-    InvalidQuery, InvalidProbabilityFactor,
+    InvalidQuery, InvalidProbabilityFactor, VariableNotInGraph, NotPolytreeNetwork,
+    ReadOnlyNetwork, InvalidTemporalNetwork,
+)
+from .probability import QueryVariable, query_parser, compile_query, structured_query
+from .entity import (
+    ProbabilityFactor, BayesianNetwork, P, NetworkNode, RuleNetworkNode, NoisyMaxNetworkNode,
+    LinearGaussian, LinearGaussianNetworkNode, InferenceStats, register_inference_hook,
+    unregister_inference_hook, QueryCache, Factor, ArithmeticCircuit, Explanation,
+    ProbabilityTable, DirectedGraph, RecursiveConditioning, LoopCutsetConditioning,
 )
-from .probability import QueryVariable, query_parser
-from .entity import ProbabilityFactor, BayesianNetwork, P, NetworkNode
 from .input_parser import InputParser
 
+
+# Optional parts which bring heavy dependencies along are loaded on first access
+_LAZY_ATTRIBUTES = {'AsyncBayesianNetwork': 'entity', 'ParallelInference': 'entity',
+                    'GaussianPosterior': 'entity', 'ParameterLearner': 'learning',
+                    'StructureLearner': 'learning', 'ExpectationMaximizationLearner': 'learning',
+                    'DynamicBayesianNetwork': 'entity', 'StreamingFilter': 'entity',
+                    'DeadlineResult': 'entity'}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
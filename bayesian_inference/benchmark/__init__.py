@@ -0,0 +1,8 @@
+from .benchmark import (
+    BenchmarkResult, Regression, ENGINES, HEAVY_MODULES, measure, benchmark_network,
+    run_benchmarks, benchmark_import, eagerly_imported, write_results, load_results,
+    compare_results,
+)
+from .generators import (
+    chain_network, polytree_network, grid_network, naive_bayes_network, random_dag_network,
+)
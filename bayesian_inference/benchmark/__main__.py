@@ -0,0 +1,67 @@
+import argparse
+import logging
+import sys
+
+from .benchmark import (
+    ENGINES, run_benchmarks, benchmark_import, write_results, load_results, compare_results,
+)
+from .generators import (
+    chain_network, polytree_network, grid_network, naive_bayes_network, random_dag_network,
+)
+
+
+def _networks(sizes, max_in_degree, cardinality, seed):
+    networks = {}
+    for size in sizes:
+        networks[f'chain-{size}'] = chain_network(size, cardinality=cardinality, seed=seed)
+        networks[f'polytree-{size}'] = polytree_network(size, max_in_degree=max_in_degree,
+                                                        cardinality=cardinality, seed=seed)
+        networks[f'grid-{size}'] = grid_network(2, max(1, size // 2), cardinality=cardinality,
+                                                seed=seed)
+        networks[f'naive-bayes-{size}'] = naive_bayes_network(size - 1, cardinality=cardinality,
+                                                              seed=seed)
+        networks[f'random-dag-{size}'] = random_dag_network(size, max_in_degree=max_in_degree,
+                                                            cardinality=cardinality, seed=seed)
+    return networks
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m bayesian_inference.benchmark',
+                                     description='Benchmark Bayesian network operations on '
+                                                 'synthetic networks.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 8, 12])
+    parser.add_argument('--max-in-degree', type=int, default=2)
+    parser.add_argument('--cardinality', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=None)
+    parser.add_argument('--output', type=argparse.FileType('w'), default=sys.stdout)
+    parser.add_argument('--baseline', type=argparse.FileType('r'), default=None,
+                        help='Previous results to flag regressions against')
+    parser.add_argument('--import-time', action='store_true',
+                        help='Also measure cold import of the package')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed relative slowdown with respect to the baseline')
+    args = parser.parse_args(arguments)
+
+    # Debug logging of inference would dominate the measurements
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = run_benchmarks(_networks(args.sizes, args.max_in_degree, args.cardinality,
+                                       args.seed), engines=args.engines, repeats=args.repeats)
+    if args.import_time:
+        results.append(benchmark_import(repeats=args.repeats))
+    write_results(results, args.output)
+
+    if args.baseline is not None:
+        regressions = compare_results(results, load_results(args.baseline),
+                                      tolerance=args.tolerance)
+        for regression in regressions:
+            print(f'Regression {regression.key}: {regression.baseline:.6f}s -> '
+                  f'{regression.current:.6f}s ({regression.ratio:.2f}x)', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import io
+import json
+import logging
+import math
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Any, TextIO, Iterable
+
+from ..entity.bayesian_network import BayesianNetwork
+from ..exceptions.exceptions import NotPolytreeNetwork
+from ..input_parser.input_parser import InputParser
+
+__all__ = ['BenchmarkResult', 'Regression', 'ENGINES', 'HEAVY_MODULES', 'measure',
+           'benchmark_network', 'run_benchmarks', 'benchmark_import', 'eagerly_imported',
+           'write_results', 'load_results', 'compare_results']
+
+# Inference engines to be benchmarked where each one answers the given query on the network
+ENGINES: Dict[str, Callable[[BayesianNetwork, str], Any]] = {
+    BayesianNetwork.ENUMERATION_ENGINE: lambda network, query: network.P(
+        query, engine=BayesianNetwork.ENUMERATION_ENGINE),
+    BayesianNetwork.POLYTREE_ENGINE: lambda network, query: network.P(
+        query, engine=BayesianNetwork.POLYTREE_ENGINE),
+}
+
+# Dependencies expected to be loaded on first use rather than on import of the package
+HEAVY_MODULES = ('numpy', 'networkx', 'tabulate', 'asyncio', 'multiprocessing')
+
+# Run in fresh interpreter to import the module, print elapsed seconds, traced peak memory if
+# asked, and the given modules loaded by the import
+_IMPORT_SCRIPT = '''
+import importlib, json, sys, time, tracemalloc
+module, traced, modules = sys.argv[1], sys.argv[2] == '1', sys.argv[3:]
+if traced:
+    tracemalloc.start()
+start = time.perf_counter()
+importlib.import_module(module)
+elapsed = time.perf_counter() - start
+peak_memory = tracemalloc.get_traced_memory()[1] if traced else 0
+print(json.dumps([elapsed, peak_memory, [name for name in modules if name in sys.modules]]))
+'''
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Measurement of single operation where latencies are in seconds and memory in bytes
+    """
+
+    network: str
+    node_count: int
+    engine: str
+    operation: str
+    repeats: int
+    mean: float
+    p50: float
+    p90: float
+    p99: float
+    throughput: float
+    peak_memory: int
+
+    @property
+    def key(self) -> str:
+        """ Identity of the measurement to match it with the baseline """
+        return f'{self.network}/{self.engine}/{self.operation}'
+
+
+@dataclass
+class Regression:
+    """
+    Slowdown of a measurement with respect to the stored baseline
+    """
+
+    key: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float('inf')
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """ Nearest-rank percentile of the already sorted values """
+    index = max(0, min(len(sorted_values) - 1,
+                       math.ceil(percentile / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(operation: Callable[[], Any], repeats: int = 10, warmup: int = 1) -> Dict[str, float]:
+    """
+    Measure latency distribution and peak memory of the given operation
+
+    .. note:: Peak memory is measured on an extra traced run so that tracing overhead does not
+              leak into latencies
+
+    :param operation: Zero argument callable to be measured
+    :param repeats: Number of timed calls
+    :param warmup: Number of untimed calls before measurement
+    :return: Dictionary of mean, p50, p90, p99, throughput and peak_memory
+    """
+    for _ in range(warmup):
+        operation()
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    total = sum(latencies)
+    return {'mean': statistics.mean(latencies), 'p50': _percentile(latencies, 50),
+            'p90': _percentile(latencies, 90), 'p99': _percentile(latencies, 99),
+            'throughput': len(latencies) / total if total > 0 else float('inf'),
+            'peak_memory': peak_memory}
+
+
+def _default_query(network_dict: dict) -> str:
+    """ Posterior of the last node given the first node's first value """
+    names = list(network_dict)
+    first, last = names[0], names[-1]
+    return f'{last} | {first} = {network_dict[first]["random_variables"][0]}'
+
+
+def benchmark_network(name: str, network_dict: dict, engines: Iterable[str] = None,
+                      repeats: int = 10, query: str = None) -> List[BenchmarkResult]:
+    """
+    Benchmark parsing, node insertion, independence check and inference on single network
+
+    :param name: Label of the network to be reported
+    :param network_dict: Network definition in the format of `InputParser.from_dict`
+    :param engines: Names of engines from `ENGINES` to be used for inference, all if not given
+        where the ones not applicable to the network are skipped
+    :param repeats: Number of timed calls for each operation
+    :param query: Query to be asked to the engines, posterior of the last node given the first
+        node is used if not given
+    :return: List of benchmark results
+    """
+    engines = list(ENGINES) if engines is None else list(engines)
+    query = query if query is not None else _default_query(network_dict)
+    serialized = json.dumps(network_dict)
+    nodes = InputParser.from_dict(network_dict)
+    network = BayesianNetwork(initial_network=nodes)
+    names = list(network_dict)
+
+    operations: Dict[str, Dict[str, Callable[[], Any]]] = {
+        'parse': {'': lambda: InputParser.parse(io.StringIO(serialized))},
+        'add_node': {'': lambda: BayesianNetwork(initial_network=nodes)},
+        'is_independent': {'': lambda: network.is_independent(names[0], names[-1])},
+        'P': {engine: (lambda e=engine: ENGINES[e](network, query)) for engine in engines},
+    }
+
+    results = []
+    for operation, by_engine in operations.items():
+        for engine, call in by_engine.items():
+            try:
+                call()
+            except NotPolytreeNetwork:
+                logging.info(f'Skipping {engine} on {name} since it is not applicable.')
+                continue
+            logging.info(f'Benchmarking {operation} of {name} with {engine or "-"}.')
+            results.append(BenchmarkResult(network=name, node_count=len(nodes),
+                                           engine=engine or '-', operation=operation,
+                                           repeats=repeats, **measure(call, repeats=repeats)))
+    return results
+
+
+def run_benchmarks(networks: Dict[str, dict], engines: Iterable[str] = None,
+                   repeats: int = 10) -> List[BenchmarkResult]:
+    """
+    Benchmark each of the given networks
+
+    :param networks: Mapping of network label to network definition
+    :param engines: Names of engines from `ENGINES` to be used for inference, all if not given
+    :param repeats: Number of timed calls for each operation
+    :return: List of benchmark results of all networks
+    """
+    results = []
+    for name, network_dict in networks.items():
+        results.extend(benchmark_network(name=name, network_dict=network_dict, engines=engines,
+                                         repeats=repeats))
+    return results
+
+
+def _run_import(module: str, traced: bool = False, modules: Iterable[str] = ()) -> List[Any]:
+    output = subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT, module, '1' if traced else '0',
+                             *modules], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def benchmark_import(module: str = 'bayesian_inference', repeats: int = 5) -> BenchmarkResult:
+    """
+    Benchmark cold import of the module, where each import is done in fresh interpreter
+
+    :param module: Name of the module to be imported
+    :param repeats: Number of timed imports
+    :return: Benchmark result of the import operation
+    """
+    latencies = sorted(_run_import(module)[0] for _ in range(repeats))
+    _, peak_memory, _ = _run_import(module, traced=True)
+    total = sum(latencies)
+    return BenchmarkResult(network=module, node_count=0, engine='-', operation='import',
+                           repeats=repeats, mean=statistics.mean(latencies),
+                           p50=_percentile(latencies, 50), p90=_percentile(latencies, 90),
+                           p99=_percentile(latencies, 99),
+                           throughput=len(latencies) / total if total > 0 else float('inf'),
+                           peak_memory=peak_memory)
+
+
+def eagerly_imported(module: str = 'bayesian_inference',
+                     modules: Iterable[str] = HEAVY_MODULES) -> List[str]:
+    """
+    Modules loaded as a side effect of importing the module in fresh interpreter
+
+    :param module: Name of the module to be imported
+    :param modules: Names of the modules to be checked
+    :return: The ones among the given modules which are loaded
+    """
+    return _run_import(module, modules=modules)[2]
+
+
+def write_results(results: List[BenchmarkResult], file: TextIO) -> None:
+    json.dump([asdict(result) for result in results], file, indent=2)
+
+
+def load_results(file: TextIO) -> List[BenchmarkResult]:
+    return [BenchmarkResult(**result) for result in json.load(file)]
+
+
+def compare_results(current: List[BenchmarkResult], baseline: List[BenchmarkResult],
+                    tolerance: float = 0.2, metric: str = 'p50') -> List[Regression]:
+    """
+    Flag measurements getting slower than the baseline more than the tolerated ratio
+
+    .. note:: Measurements not found in baseline are skipped
+
+    :param current: Results of the current run
+    :param baseline: Stored results to compare with
+    :param tolerance: Allowed relative slowdown such that 0.2 means 20 percent
+    :param metric: Latency field of `BenchmarkResult` to be compared
+    :return: List of regressions
+    """
+    baseline_by_key = {result.key: result for result in baseline}
+    regressions = []
+    for result in current:
+        if result.key not in baseline_by_key:
+            continue
+        previous, now = getattr(baseline_by_key[result.key], metric), getattr(result, metric)
+        if now > previous * (1 + tolerance):
+            regressions.append(Regression(key=result.key, baseline=previous, current=now))
+    return regressions
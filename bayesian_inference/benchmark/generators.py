@@ -0,0 +1,149 @@
+import random
+from itertools import product
+from typing import Dict, List, Optional
+
+__all__ = ['chain_network', 'polytree_network', 'grid_network', 'naive_bayes_network',
+           'random_dag_network']
+
+
+def _node_name(index: int) -> str:
+    return f'X{index}'
+
+
+def _states(cardinality: int) -> List[str]:
+    return [f's{i}' for i in range(cardinality)]
+
+
+def _random_node(predecessors: List[str], cardinality: int, network: dict,
+                 rng: random.Random) -> dict:
+    """
+    Create single node definition in the format expected by `InputParser.from_dict` where
+    conditional probabilities are drawn randomly and normalized for each parent combination
+
+    :param predecessors: Names of parents which should already exist in the network
+    :param cardinality: Number of values of the random variable
+    :param network: Network definition built so far to fetch values of parents
+    :param rng: Random generator to draw probabilities from
+    :return: Node definition as dictionary
+    """
+    random_variables = _states(cardinality)
+    parent_values = [network[predecessor]['random_variables'] for predecessor in predecessors]
+    probabilities = {}
+    for combination in product(*parent_values):
+        weights = [rng.random() + 1e-3 for _ in random_variables]
+        total = sum(weights)
+        for value, weight in zip(random_variables, weights):
+            probabilities['(' + ','.join(combination + (value,)) + ')'] = weight / total
+    return {'predecessors': list(predecessors), 'random_variables': random_variables,
+            'probabilities': probabilities}
+
+
+def _build(parents: Dict[int, List[int]], cardinality: int, seed: Optional[int]) -> dict:
+    """ Create network definition from the parent indices given in topological order """
+    rng = random.Random(seed)
+    network = {}
+    for index in sorted(parents):
+        predecessors = [_node_name(parent) for parent in parents[index]]
+        network[_node_name(index)] = _random_node(predecessors=predecessors,
+                                                  cardinality=cardinality, network=network,
+                                                  rng=rng)
+    return network
+
+
+def chain_network(node_count: int, cardinality: int = 2, seed: Optional[int] = None) -> dict:
+    """
+    Chain network X0 -> X1 -> ... -> Xn-1
+
+    :param node_count: Number of nodes in the chain
+    :param cardinality: Number of values of each random variable
+    :param seed: Seed of random probabilities
+    :return: Network definition to be parsed by `InputParser.from_dict`
+    """
+    return _build({i: [i - 1] if i > 0 else [] for i in range(node_count)},
+                  cardinality=cardinality, seed=seed)
+
+
+def polytree_network(node_count: int, max_in_degree: int = 2, cardinality: int = 2,
+                     seed: Optional[int] = None) -> dict:
+    """
+    Singly connected network where the underlying undirected graph has no cycle. Each new node
+    is attached to one randomly selected existing node either as its child or as its parent, where
+    the parent side is only chosen when the in-degree bound still holds.
+
+    :param node_count: Number of nodes in the network
+    :param max_in_degree: Upper bound on the number of parents of a node
+    :param cardinality: Number of values of each random variable
+    :param seed: Seed of both structure and random probabilities
+    :return: Network definition to be parsed by `InputParser.from_dict`
+    """
+    rng = random.Random(seed)
+    # Nodes are created in reverse topological positions when they become parent of existing one,
+    # so keep them as ranks and relabel at the end
+    order = [0]
+    parents = {0: []}
+    for index in range(1, node_count):
+        anchor = rng.choice(order)
+        parents[index] = []
+        if len(parents[anchor]) < max_in_degree and rng.random() < 0.5:
+            # New node becomes a root parent of the anchor
+            parents[anchor].append(index)
+            order.insert(order.index(anchor), index)
+        else:
+            parents[index].append(anchor)
+            order.append(index)
+    relabel = {node: position for position, node in enumerate(order)}
+    return _build({relabel[node]: [relabel[p] for p in parents[node]] for node in parents},
+                  cardinality=cardinality, seed=seed)
+
+
+def grid_network(rows: int, columns: int, cardinality: int = 2,
+                 seed: Optional[int] = None) -> dict:
+    """
+    Grid network where each cell has its upper and left neighbours as parents
+
+    :param rows: Number of rows of the grid
+    :param columns: Number of columns of the grid
+    :param cardinality: Number of values of each random variable
+    :param seed: Seed of random probabilities
+    :return: Network definition to be parsed by `InputParser.from_dict`
+    """
+    parents = {}
+    for row, column in product(range(rows), range(columns)):
+        index = row * columns + column
+        parents[index] = ([index - columns] if row > 0 else []) + (
+            [index - 1] if column > 0 else [])
+    return _build(parents, cardinality=cardinality, seed=seed)
+
+
+def naive_bayes_network(feature_count: int, cardinality: int = 2,
+                        seed: Optional[int] = None) -> dict:
+    """
+    Star shaped network where X0 is the class variable and the parent of every feature
+
+    :param feature_count: Number of feature nodes connected to the class node
+    :param cardinality: Number of values of each random variable
+    :param seed: Seed of random probabilities
+    :return: Network definition to be parsed by `InputParser.from_dict`
+    """
+    return _build({i: [0] if i > 0 else [] for i in range(feature_count + 1)},
+                  cardinality=cardinality, seed=seed)
+
+
+def random_dag_network(node_count: int, max_in_degree: int = 2, cardinality: int = 2,
+                       seed: Optional[int] = None) -> dict:
+    """
+    Random directed acyclic graph where each node draws up to `max_in_degree` parents among the
+    previously created nodes
+
+    :param node_count: Number of nodes in the network
+    :param max_in_degree: Upper bound on the number of parents of a node
+    :param cardinality: Number of values of each random variable
+    :param seed: Seed of both structure and random probabilities
+    :return: Network definition to be parsed by `InputParser.from_dict`
+    """
+    rng = random.Random(seed)
+    parents = {}
+    for index in range(node_count):
+        in_degree = rng.randint(0, min(max_in_degree, index))
+        parents[index] = sorted(rng.sample(range(index), in_degree))
+    return _build(parents, cardinality=cardinality, seed=seed)
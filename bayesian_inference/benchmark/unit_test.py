@@ -0,0 +1,111 @@
+import io
+from unittest import TestCase
+
+from .benchmark import (
+    BenchmarkResult, measure, benchmark_network, benchmark_import, eagerly_imported,
+    write_results, load_results, compare_results,
+)
+from .generators import (
+    chain_network, polytree_network, grid_network, naive_bayes_network, random_dag_network,
+)
+from ..entity.bayesian_network import BayesianNetwork
+from ..input_parser.input_parser import InputParser
+
+__all__ = []
+
+
+class TestGenerators(TestCase):
+
+    def _assert_valid_network(self, network_dict: dict, node_count: int, max_in_degree: int,
+                              cardinality: int):
+        # Parsing makes all the validations over predecessors and probabilities
+        nodes = InputParser.from_dict(network_dict)
+        network = BayesianNetwork(initial_network=nodes)
+        self.assertEqual(node_count, len(network.nodes))
+        self.assertEqual(0, len(network.edges_to_add))
+        for node in nodes:
+            self.assertLessEqual(len(node.predecessors), max_in_degree)
+            self.assertEqual(cardinality, len(node.random_variables))
+            # Each parent combination sums up to one
+            self.assertAlmostEqual(len(node.probabilities) / cardinality,
+                                   sum(node.probabilities.values()))
+        return network
+
+    def test_chain_network(self):
+        network = self._assert_valid_network(chain_network(6, cardinality=3, seed=1), 6, 1, 3)
+        self.assertEqual(5, len(network.G.edges))
+
+    def test_polytree_network(self):
+        for seed in range(5):
+            network = self._assert_valid_network(
+                polytree_network(12, max_in_degree=2, seed=seed), 12, 2, 2)
+            # Singly connected means the undirected graph is a tree
+            self.assertEqual(11, len(network.G.edges))
+
+    def test_grid_network(self):
+        network = self._assert_valid_network(grid_network(3, 4, seed=2), 12, 2, 2)
+        self.assertEqual(2 * 4 + 3 * 3, len(network.G.edges))
+
+    def test_naive_bayes_network(self):
+        network = self._assert_valid_network(naive_bayes_network(5, seed=3), 6, 1, 2)
+        self.assertEqual(5, len(network.G.edges))
+        self.assertTrue(all(node.predecessors == ['X0'] for name, node in network.nodes.items()
+                            if name != 'X0'))
+
+    def test_random_dag_network(self):
+        self._assert_valid_network(random_dag_network(10, max_in_degree=3, seed=4), 10, 3, 2)
+
+    def test_same_seed_same_network(self):
+        self.assertEqual(random_dag_network(8, seed=7), random_dag_network(8, seed=7))
+
+
+class TestBenchmark(TestCase):
+
+    @staticmethod
+    def _result(network: str, p50: float) -> BenchmarkResult:
+        return BenchmarkResult(network=network, node_count=1, engine='enumeration',
+                               operation='P', repeats=1, mean=p50, p50=p50, p90=p50, p99=p50,
+                               throughput=1 / p50, peak_memory=0)
+
+    def test_measure(self):
+        calls = []
+        measurement = measure(lambda: calls.append([0] * 1000), repeats=5, warmup=2)
+        # Warmup, timed and traced calls
+        self.assertEqual(8, len(calls))
+        self.assertLessEqual(measurement['p50'], measurement['p90'])
+        self.assertLessEqual(measurement['p90'], measurement['p99'])
+        self.assertGreater(measurement['throughput'], 0)
+        self.assertGreater(measurement['peak_memory'], 0)
+
+    def test_benchmark_network(self):
+        results = benchmark_network('chain', chain_network(4, seed=0), repeats=2)
+        self.assertSetEqual({'parse', 'add_node', 'is_independent', 'P'},
+                            {result.operation for result in results})
+        self.assertTrue(all(result.node_count == 4 for result in results))
+
+    def test_benchmark_import(self):
+        result = benchmark_import(repeats=2)
+        self.assertEqual('bayesian_inference/-/import', result.key)
+        self.assertGreater(result.p50, 0)
+        self.assertGreater(result.peak_memory, 0)
+
+    def test_heavy_modules_not_imported_eagerly(self):
+        self.assertListEqual([], eagerly_imported('bayesian_inference'))
+        self.assertListEqual(['json'], eagerly_imported('json', modules=['json', 'numpy']))
+
+    def test_results_round_trip(self):
+        results = [self._result('a', 0.1), self._result('b', 0.2)]
+        file = io.StringIO()
+        write_results(results, file)
+        file.seek(0)
+        self.assertListEqual(results, load_results(file))
+
+    def test_compare_results(self):
+        baseline = [self._result('a', 0.1), self._result('b', 0.2)]
+        current = [self._result('a', 0.11), self._result('b', 0.3), self._result('c', 5.0)]
+
+        regressions = compare_results(current, baseline, tolerance=0.2)
+        self.assertListEqual(['b/enumeration/P'], [regression.key for regression in regressions])
+        self.assertAlmostEqual(1.5, regressions[0].ratio)
+
+        self.assertEqual(2, len(compare_results(current, baseline, tolerance=0.05)))
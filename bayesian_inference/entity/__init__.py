@@ -1,2 +1,32 @@
+import importlib
+
 from .bayesian_network import ProbabilityFactor, BayesianNetwork, P
 from .network_node import NetworkNode
+from .rule_network_node import RuleNetworkNode
+from .noisy_max_network_node import NoisyMaxNetworkNode
+from .linear_gaussian_network_node import LinearGaussian, LinearGaussianNetworkNode
+from .inference_stats import InferenceStats, register_inference_hook, unregister_inference_hook
+from .query_cache import QueryCache
+from .factor import Factor
+from .arithmetic_circuit import ArithmeticCircuit
+from .recursive_conditioning import RecursiveConditioning
+from .loop_cutset import LoopCutsetConditioning
+from .explanation import Explanation
+from .probability_table import ProbabilityTable
+from .graph import DirectedGraph
+
+# Loaded on first access since they bring asyncio, multiprocessing and numpy along
+_LAZY_ATTRIBUTES = {'AsyncBayesianNetwork': 'async_network',
+                    'ParallelInference': 'parallel_inference',
+                    'GaussianPosterior': 'gaussian',
+                    'DynamicBayesianNetwork': 'dynamic_bayesian_network',
+                    'StreamingFilter': 'dynamic_bayesian_network',
+                    'DeadlineResult': 'anytime'}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
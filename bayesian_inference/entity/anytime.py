@@ -0,0 +1,120 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .network_node import NetworkNode
+from .probability_table import ProbabilityTable
+
+__all__ = ['DeadlineResult', 'likelihood_weighting', 'LIKELIHOOD_WEIGHTING_ENGINE',
+           'CACHE_ENGINE', 'OPERATIONS_PER_SECOND']
+
+LIKELIHOOD_WEIGHTING_ENGINE = 'likelihood_weighting'
+CACHE_ENGINE = 'cache'
+
+# Rate of arithmetic operations of exact engines which turns estimated cost into time
+OPERATIONS_PER_SECOND = 1e6
+
+# Multiplier of standard error for approximately 95% confidence interval
+_Z_SCORE = 1.96
+
+
+@dataclass
+class DeadlineResult:
+    """
+    Result of query with time budget, which is exact if the estimated cost of exact inference fits
+    into the budget, otherwise estimate of sampling until the deadline
+
+    :param probability: Probability in the same form as the result of query without deadline
+    :param engine: Engine which computed the probability, `LIKELIHOOD_WEIGHTING_ENGINE` if it is
+        approximate and `CACHE_ENGINE` if it is served from query cache
+    :param error_bound: Half-width of approximately 95% confidence interval of the least certain
+        probability, zero for exact results
+    :param samples: Number of samples drawn by approximate engine
+    :param estimated_time: Estimated time of exact inference in seconds
+    """
+
+    probability: Union[float, Dict[str, float], ProbabilityTable]
+    engine: str
+    error_bound: float = 0.0
+    samples: int = 0
+    estimated_time: float = 0.0
+
+    @property
+    def is_exact(self) -> bool:
+        return self.engine != LIKELIHOOD_WEIGHTING_ENGINE
+
+
+def likelihood_weighting(nodes: Dict[str, NetworkNode], order: List[str], query: Dict[str, str],
+                         query_names: List[str], evidence: Dict[str, str], deadline: float,
+                         batch_size: int = 1000, seed: Optional[int] = None) \
+        -> Tuple[Union[float, ProbabilityTable], float, int]:
+    """
+    Likelihood weighting where non-evidence variables are sampled in topological order from their
+    conditional probabilities and each sample is weighted by the likelihood of the evidence.
+    Batches of samples are drawn until the deadline, and at least one batch is always drawn.
+
+    .. note:: Error bound uses effective sample size of the weights, i.e.
+              :math:`(\\sum w)^{2} / \\sum w^{2}`, in the normal approximation of the estimates
+
+    :param nodes: Nodes of the network
+    :param order: Needed variables in topological order
+    :param query: Values of query variables which are fixed
+    :param query_names: Query variables whose each combination is estimated
+    :param evidence: Values of evidence variables
+    :param deadline: Value of `time.perf_counter` when sampling stops
+    :param batch_size: Number of samples drawn at once
+    :param seed: Seed of the random generator
+    :return: Estimate of the probability of each combination of query variables given the evidence
+        as float if there is no such variable, error bound and number of samples
+    """
+    values_of = {name: nodes[name].random_variables for name in order}
+    tables = {}
+    for name in order:
+        factor = nodes[name].table(values_of)
+        tables[name] = (np.array(factor.values).reshape(-1, factor.cardinalities[-1]),
+                        list(factor.variables[:-1]))
+    observed = {name: values_of[name].index(value) for name, value in {**evidence, **query}.items()}
+    generator = np.random.RandomState(seed)
+    size = int(np.prod([len(values_of[name]) for name in query_names], dtype=int))
+    weighted, total, squared, samples = np.zeros(size), 0.0, 0.0, 0
+
+    while samples == 0 or time.perf_counter() < deadline:
+        codes, weights = {}, np.ones(batch_size)
+        for name in order:
+            table, parents = tables[name]
+            configuration = np.zeros(batch_size, dtype=np.int64)
+            for parent in parents:
+                configuration = configuration * len(values_of[parent]) + codes[parent]
+            if name in evidence:
+                codes[name] = np.full(batch_size, observed[name])
+                weights *= table[configuration, observed[name]]
+                continue
+            cumulative = np.cumsum(table[configuration], axis=1)
+            codes[name] = np.minimum((generator.rand(batch_size)[:, None] > cumulative).sum(
+                axis=1), table.shape[1] - 1)
+
+        matches = weights.copy()
+        for name in query:
+            matches *= codes[name] == observed[name]
+        index = np.zeros(batch_size, dtype=np.int64)
+        for name in query_names:
+            index = index * len(values_of[name]) + codes[name]
+        weighted += np.bincount(index, weights=matches, minlength=size)
+        total += weights.sum()
+        squared += (weights ** 2).sum()
+        samples += batch_size
+
+    if total == 0:
+        # No sample is consistent with the evidence
+        estimates, error_bound = np.zeros(size), 1.0
+    else:
+        estimates = weighted / total
+        effective_samples = total ** 2 / squared
+        error_bound = float(_Z_SCORE * np.sqrt(estimates * (1 - estimates) / effective_samples).max(
+            initial=0.0))
+    if not query_names:
+        return float(estimates[0]), error_bound, samples
+    return ProbabilityTable(variables=query_names, states=[values_of[name] for name in query_names],
+                            probabilities=estimates), error_bound, samples
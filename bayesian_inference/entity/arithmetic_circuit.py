@@ -0,0 +1,282 @@
+import json
+from functools import reduce
+from itertools import product
+from typing import Any, Dict, List, Sequence, TextIO, Tuple, Union, TYPE_CHECKING
+
+from .factor import Factor, elimination_order
+from .network_node import NetworkNode
+from ..exceptions.exceptions import InvalidQuery, VariableNotInGraph
+from ..probability.probability import query_parser
+
+if TYPE_CHECKING:
+    from .bayesian_network import BayesianNetwork
+
+__all__ = ['ArithmeticCircuit']
+
+
+class ArithmeticCircuit(object):
+    """
+    Network polynomial of a bayesian network where indicators of variable values and conditional
+    probabilities are combined by sums and products, so that probability of any evidence is single
+    upward pass and marginals of all variables are single downward pass over the circuit
+
+    .. note:: Circuit is compiled by variable elimination over symbolic factors. Identical nodes
+              are shared, zero probabilities prune the products they take part in and products or
+              sums of probabilities are folded into single probability, so that the circuit is
+              usually much smaller than the joint distribution
+
+    .. note:: Nodes are kept in creation order where children always precede their parents
+
+    :param variables: Values of each variable of the network
+    """
+
+    INDICATOR = 'indicator'
+    PARAMETER = 'parameter'
+    SUM = '+'
+    PRODUCT = '*'
+
+    def __init__(self, variables: Dict[str, List[str]]):
+        self.variables: Dict[str, List[str]] = {name: list(values) for name, values in
+                                                variables.items()}
+        self.kinds: List[str] = []
+        self.payloads: List[Any] = []
+        self.children: List[Tuple[int, ...]] = []
+        self.root: int = None
+        self._unique: Dict[tuple, int] = {}
+        self.zero = self.parameter(0.0)
+        self.one = self.parameter(1.0)
+        self.indicators: Dict[Tuple[str, str], int] = {
+            (name, value): self._node(self.INDICATOR, (name, value)) for name, values in
+            self.variables.items() for value in values}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(children) for children in self.children)
+
+    @classmethod
+    def compile(cls, network: 'BayesianNetwork') -> 'ArithmeticCircuit':
+        """
+        Compile the current version of the network where continuous nodes are left out
+
+        :param network: Network whose predecessors of all nodes exist
+        :return: Circuit of the network polynomial
+        :raises VariableNotInGraph: If predecessor of a node is not in the network
+        :raises InvalidQuery: If discrete node has continuous predecessor
+        """
+        nodes = network.pinned().nodes
+        discrete_nodes = {name: node for name, node in nodes.items() if node.random_variables}
+        if any(predecessor in nodes and predecessor not in discrete_nodes for node in
+               discrete_nodes.values() for predecessor in node.predecessors):
+            raise InvalidQuery('Discrete variables should not have continuous predecessors.')
+        return cls.from_nodes(discrete_nodes)
+
+    @classmethod
+    def from_nodes(cls, nodes: Dict[str, NetworkNode]) -> 'ArithmeticCircuit':
+        """
+        Compile the network polynomial of the given nodes
+
+        :param nodes: Discrete network nodes by name where predecessors of each one should be
+            included
+        :return: Circuit of the network polynomial
+        :raises VariableNotInGraph: If predecessor of a node is not given
+        :raises InvalidQuery: If a node is continuous
+        """
+        for node in nodes.values():
+            if not node.random_variables:
+                raise InvalidQuery(
+                    f'Continuous variable {node.node_name} cannot be compiled into circuit!')
+            for predecessor in node.relevant_predecessors:
+                if predecessor not in nodes:
+                    raise VariableNotInGraph(
+                        f'Predecessor {predecessor} of {node.node_name} is not in the network!')
+
+        circuit = cls({name: node.random_variables for name, node in nodes.items()})
+        factors = [factor for node in nodes.values() for factor in
+                   node.factors(circuit.variables, transform=circuit.parameter)]
+        factors += [Factor([name], [len(values)], [circuit.indicators[(name, value)] for value in
+                                                   values])
+                    for name, values in circuit.variables.items()]
+
+        # Auxiliary variables of factors are eliminated together with the network variables
+        variables = {variable for factor in factors for variable in factor.variables}
+        for variable in elimination_order(factors, variables):
+            related = [factor for factor in factors if variable in factor.variables]
+            factors = [factor for factor in factors if variable not in factor.variables]
+            combined = reduce(lambda a, b: a.product(b, multiply=circuit.multiply), related)
+            factors.append(combined.marginalize(variable, add=circuit.add))
+        circuit.root = reduce(circuit.multiply, (factor.values[0] for factor in factors),
+                              circuit.one)
+        return circuit
+
+    def _node(self, kind: str, payload: Any = None, children: Tuple[int, ...] = ()) -> int:
+        """ Existing node with the same content or new one """
+        key = (kind, payload, children)
+        if key not in self._unique:
+            self._unique[key] = len(self.kinds)
+            self.kinds.append(kind)
+            self.payloads.append(payload)
+            self.children.append(children)
+        return self._unique[key]
+
+    def parameter(self, value: float) -> int:
+        return self._node(self.PARAMETER, float(value))
+
+    def multiply(self, a: int, b: int) -> int:
+        if a == self.zero or b == self.zero:
+            return self.zero
+        if a == self.one:
+            return b
+        if b == self.one:
+            return a
+        if self.kinds[a] == self.kinds[b] == self.PARAMETER:
+            return self.parameter(self.payloads[a] * self.payloads[b])
+        return self._node(self.PRODUCT, children=tuple(sorted((a, b))))
+
+    def add(self, nodes: Sequence[int]) -> int:
+        nodes = [node for node in nodes if node != self.zero]
+        if not nodes:
+            return self.zero
+        if len(nodes) == 1:
+            return nodes[0]
+        if all(self.kinds[node] == self.PARAMETER for node in nodes):
+            return self.parameter(sum(self.payloads[node] for node in nodes))
+        return self._node(self.SUM, children=tuple(sorted(nodes)))
+
+    def _validate(self, evidence: Dict[str, str]) -> None:
+        for name, value in evidence.items():
+            if name not in self.variables:
+                raise VariableNotInGraph(f'Variable {name} is not in the circuit!')
+            if value not in self.variables[name]:
+                raise InvalidQuery(f'Value {value} is not a value of {name}!')
+
+    def _upward(self, evidence: Dict[str, str]) -> List[float]:
+        """ Value of each node where indicators contradicting the evidence are zero """
+        values = [0.0] * len(self.kinds)
+        for index, (kind, payload, children) in enumerate(zip(self.kinds, self.payloads,
+                                                              self.children)):
+            if kind == self.PARAMETER:
+                values[index] = payload
+            elif kind == self.INDICATOR:
+                name, value = payload
+                values[index] = float(evidence.get(name, value) == value)
+            elif kind == self.SUM:
+                values[index] = sum(values[child] for child in children)
+            else:
+                value = 1.0
+                for child in children:
+                    value *= values[child]
+                values[index] = value
+        return values
+
+    def _downward(self, values: List[float]) -> List[float]:
+        """ Partial derivative of the root with respect to each node """
+        derivatives = [0.0] * len(self.kinds)
+        derivatives[self.root] = 1.0
+        for index in range(self.root, -1, -1):
+            derivative = derivatives[index]
+            if derivative == 0.0:
+                continue
+            children = self.children[index]
+            if self.kinds[index] == self.SUM:
+                for child in children:
+                    derivatives[child] += derivative
+            elif self.kinds[index] == self.PRODUCT:
+                # Products of other children from both sides, so that zeros need no division
+                suffix = [1.0] * (len(children) + 1)
+                for position in range(len(children) - 1, -1, -1):
+                    suffix[position] = suffix[position + 1] * values[children[position]]
+                prefix = 1.0
+                for position, child in enumerate(children):
+                    derivatives[child] += derivative * prefix * suffix[position + 1]
+                    prefix *= values[child]
+        return derivatives
+
+    def evaluate(self, evidence: Dict[str, str] = None) -> float:
+        """
+        Probability of the evidence with single upward pass
+
+        :param evidence: Observed values of variables
+        :return: Probability of the evidence
+        :raises VariableNotInGraph: If evidence variable is not in the circuit
+        :raises InvalidQuery: If evidence value is not a value of its variable
+        """
+        evidence = evidence or {}
+        self._validate(evidence)
+        return self._upward(evidence)[self.root]
+
+    def marginals(self, evidence: Dict[str, str] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Posterior probability of each value of all variables with single upward and downward pass
+
+        .. note:: Derivative with respect to an indicator is the joint probability of its value and
+                  the evidence on other variables, so that it is multiplied with the indicator
+
+        :param evidence: Observed values of variables
+        :return: Probability of each value of each variable given the evidence
+        :raises ZeroDivisionError: If probability of the evidence is zero
+        """
+        evidence = evidence or {}
+        self._validate(evidence)
+        values = self._upward(evidence)
+        derivatives = self._downward(values)
+        probability = values[self.root]
+        return {name: {value: values[self.indicators[(name, value)]] * derivatives[
+            self.indicators[(name, value)]] / probability for value in variable_values} for
+                name, variable_values in self.variables.items()}
+
+    def P(self, query: str) -> Union[float, Dict[str, float]]:
+        """
+        Counterpart of `BayesianNetwork.P` evaluated on the circuit
+
+        :param query: Query that will be evaluated with the circuit context
+        :return: Exact inference probability of the query
+        :raises InvalidQuery: If query is not valid
+        """
+        is_parsed, queries, evidences = query_parser(
+            query=query, expected_symbol_and_values=self.variables)
+        if not is_parsed:
+            raise InvalidQuery("Query does not hold for full match!")
+        evidence = {variable.name: variable.value for variable in evidences}
+        denominator = self.evaluate(evidence)
+        evidence.update({variable.name: variable.value for variable in queries if
+                         variable.value is not None})
+        names = [variable.name for variable in queries if variable.value is None]
+        if not names:
+            return self.evaluate(evidence) / denominator
+        probabilities = {}
+        for combination in product(*[self.variables[name] for name in names]):
+            context = dict(zip(names, combination))
+            probabilities[str(context)] = self.evaluate({**evidence, **context}) / denominator
+        return probabilities
+
+    def to_dict(self) -> dict:
+        """ JSON serializable form of the circuit """
+        return {
+            'variables': self.variables,
+            'nodes': [[kind, list(payload) if kind == self.INDICATOR else payload,
+                       list(children)] for kind, payload, children in
+                      zip(self.kinds, self.payloads, self.children)],
+            'root': self.root,
+        }
+
+    @classmethod
+    def from_dict(cls, circuit_dict: dict) -> 'ArithmeticCircuit':
+        circuit = cls(circuit_dict['variables'])
+        mapping = {}
+        for index, (kind, payload, children) in enumerate(circuit_dict['nodes']):
+            if kind == cls.INDICATOR:
+                payload = tuple(payload)
+            mapping[index] = circuit._node(kind, payload,
+                                           tuple(mapping[child] for child in children))
+        circuit.root = mapping[circuit_dict['root']]
+        return circuit
+
+    def dump(self, file: TextIO) -> None:
+        json.dump(self.to_dict(), file)
+
+    @classmethod
+    def load(cls, file: TextIO) -> 'ArithmeticCircuit':
+        return cls.from_dict(json.load(file))
@@ -0,0 +1,167 @@
+import asyncio
+import re
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Tuple, Union
+
+from .bayesian_network import BayesianNetwork
+
+__all__ = ['AsyncBayesianNetwork']
+
+
+def _probability(network: BayesianNetwork, query: str, engine: str = None) \
+        -> Union[float, Dict[str, float]]:
+    """ Module level function so that it can be sent to process executors """
+    return network.P(query=query, engine=engine)
+
+
+def _independence(network: BayesianNetwork, variable1: str, variable2: str,
+                  evidence_variables: List[str] = None) -> bool:
+    """ Module level function so that it can be sent to process executors """
+    return network.is_independent(variable1=variable1, variable2=variable2,
+                                  evidence_variables=evidence_variables)
+
+
+class AsyncBayesianNetwork(object):
+    """
+    Asyncio counterpart of `BayesianNetwork` where calculations are offloaded to an executor so that
+    event loop is not blocked
+
+    .. note:: Identical calls in flight are coalesced into single calculation whose result is
+              shared by all the callers. Calculation is cancelled only if all of its callers are
+              cancelled or timed out, where the ones already running in executor cannot be
+              interrupted so they keep their concurrency slot until they end and their results
+              are dropped.
+
+    .. note:: Calculations run on the network version pinned when they are called, and only the
+              calls on the same version are coalesced
+
+    .. note:: Concurrency is bounded for each event loop separately
+
+    .. note:: With process executor, network is pickled for each calculation
+
+    :param network: Network to be queried
+    :param executor: Executor running the calculations, thread pool is created if not given
+    :param max_concurrency: Maximum number of calculations running at the same time in each event
+        loop
+    :param timeout: Default timeout of each call in seconds, no timeout if not given
+    """
+
+    def __init__(self, network: BayesianNetwork, executor: Executor = None,
+                 max_concurrency: int = 4, timeout: float = None):
+        if max_concurrency <= 0:
+            raise ValueError('Maximum concurrency should be positive.')
+        self.network = network
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._owns_executor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(
+            max_workers=max_concurrency)
+        # Concurrency bound of each event loop, dropped together with its loop
+        self._semaphores: 'weakref.WeakKeyDictionary[Any, asyncio.Semaphore]' = \
+            weakref.WeakKeyDictionary()
+        # Calculations in flight and number of their callers
+        self._in_flight: Dict[Hashable, Tuple[asyncio.Future, List[int]]] = {}
+
+    async def P(self, query: str, engine: str = None, timeout: float = None) \
+            -> Union[float, Dict[str, float]]:
+        """
+        Asynchronous `BayesianNetwork.P`
+
+        :param query: Query that will be evaluated with the network context
+        :param engine: Inference engine to be forced, selected automatically if not given
+        :param timeout: Timeout in seconds overriding the default one
+        :return: Exact inference probability of the query in the network
+        :raises asyncio.TimeoutError: If calculation does not end in time
+        """
+        network = self.network.pinned()
+        key = ('P', network.version, re.sub(r'\s+', '', query), engine)
+        return await self._submit(key, timeout, _probability, network, query, engine)
+
+    async def batch_P(self, queries: List[str], engine: str = None, timeout: float = None) \
+            -> List[Union[float, Dict[str, float]]]:
+        """
+        Evaluate queries concurrently within the concurrency bound
+
+        :param queries: Queries to be evaluated
+        :param engine: Inference engine to be forced, selected automatically if not given
+        :param timeout: Timeout of each query in seconds overriding the default one
+        :return: Probabilities in the order of queries
+        """
+        return list(await asyncio.gather(
+            *(self.P(query, engine=engine, timeout=timeout) for query in queries)))
+
+    async def is_independent(self, variable1: str, variable2: str,
+                             evidence_variables: List[str] = None, timeout: float = None) -> bool:
+        """
+        Asynchronous `BayesianNetwork.is_independent`
+
+        :param variable1: The first variable name to be exposed to independence control
+        :param variable2: The second variable name to be exposed to independence control
+        :param evidence_variables: List of evidence variables
+        :param timeout: Timeout in seconds overriding the default one
+        :return: Boolean flag representing independence of variable1 and variable2
+        :raises asyncio.TimeoutError: If calculation does not end in time
+        """
+        network = self.network.pinned()
+        key = ('is_independent', network.version, frozenset((variable1, variable2)),
+               frozenset(evidence_variables or ()))
+        return await self._submit(key, timeout, _independence, network, variable1, variable2,
+                                  evidence_variables)
+
+    async def _submit(self, key: Hashable, timeout: float, function, *args) -> Any:
+        """
+        Join calculation in flight with the same key or start new one, then wait its result
+
+        :param key: Identity of the calculation to coalesce identical ones
+        :param timeout: Timeout in seconds overriding the default one
+        :param function: Picklable callable to be run in executor
+        :param args: Arguments of the callable
+        :return: Result of the calculation
+        """
+        # Futures of one event loop cannot be awaited in another one
+        key = (asyncio.get_running_loop(), key)
+        if key not in self._in_flight or self._in_flight[key][0].cancelled():
+            task = asyncio.ensure_future(self._run(function, *args))
+            self._in_flight[key] = (task, [0])
+            task.add_done_callback(lambda done: self._forget(key, done))
+        task, callers = self._in_flight[key]
+
+        callers[0] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task),
+                                          timeout if timeout is not None else self.timeout)
+        finally:
+            callers[0] -= 1
+            if callers[0] == 0 and not task.done():
+                task.cancel()
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if key in self._in_flight and self._in_flight[key][0] is task:
+            del self._in_flight[key]
+
+    async def _run(self, function, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphores[loop]:
+            concurrent_future = self.executor.submit(function, *args)
+            future = asyncio.wrap_future(concurrent_future)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Running calculation cannot be interrupted, so keep its slot until it ends
+                if not concurrent_future.cancel():
+                    await asyncio.wait([future])
+                raise
+
+    def close(self) -> None:
+        """ Shutdown executor if it is created by this instance """
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        self.close()
@@ -1,19 +1,39 @@
+import copy
 import logging
+import math
+import threading
+import time
 from collections import defaultdict, deque
-from dataclasses import dataclass
+from contextlib import nullcontext, contextmanager
+from dataclasses import dataclass, field
 from itertools import product
-from typing import List, Callable, Dict, Generator, Set, Iterable, Tuple, Union
-
-import networkx as nx
-
+from typing import (
+    List, Callable, Dict, Generator, Set, Iterable, Tuple, Union, Optional, FrozenSet, Sequence,
+    TYPE_CHECKING,
+)
+
+from .arithmetic_circuit import ArithmeticCircuit
+from .explanation import Explanation, most_probable_explanations, maximum_a_posteriori
+from .graph import DirectedGraph
+from .inference_stats import InferenceStats, has_inference_hooks, notify_inference_hooks
+from .linear_gaussian_network_node import LinearGaussianNetworkNode
+from .loop_cutset import LoopCutsetConditioning
 from .network_node import NetworkNode
-from ..exceptions.exceptions import InvalidQuery, InvalidProbabilityFactor, VariableNotInGraph
-from ..probability.probability import query_parser, QueryVariable
+from .polytree import is_polytree, PolytreePropagation
+from .probability_table import ProbabilityTable
+from .query_cache import QueryCache
+from .recursive_conditioning import RecursiveConditioning
+from ..exceptions.exceptions import (
+    InvalidQuery, InvalidProbabilityFactor, VariableNotInGraph, NotPolytreeNetwork,
+    ReadOnlyNetwork, NotAllExpectedProbabilityExist,
+)
+from ..probability.probability import query_parser, structured_query, QueryVariable
 
-__all__ = ['ProbabilityFactor', 'BayesianNetwork', 'P', 'is_independent']
+if TYPE_CHECKING:
+    from .anytime import DeadlineResult
+    from .gaussian import GaussianPosterior
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)-8s : %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
+__all__ = ['ProbabilityFactor', 'NetworkSnapshot', 'BayesianNetwork', 'P', 'is_independent']
 
 
 @dataclass
@@ -34,24 +54,135 @@ class ProbabilityFactor:
     sum_out: bool = False
 
 
+@dataclass
+class NetworkSnapshot:
+    """
+    Single version of the network state. Snapshots are never changed once they are published, and
+    writers prepare a copy to be published instead.
+
+    .. note:: Circuits compiled from the snapshot are kept with it, so that they are dropped
+              together with the version they belong to
+
+    .. note:: Structure version is the version of the last change on nodes or edges, and revision
+              of a node is the version of the last update of its probabilities, so that results
+              depending only on unchanged probabilities can outlive parameter updates
+    """
+
+    version: int
+    nodes: Dict[str, NetworkNode]
+    G: DirectedGraph
+    edges_to_add: Dict[str, List[str]]
+    circuits: Dict[FrozenSet[str], ArithmeticCircuit] = field(default_factory=dict)
+    structure_version: int = 0
+    revisions: Dict[str, int] = field(default_factory=dict)
+
+    def copy(self) -> 'NetworkSnapshot':
+        return NetworkSnapshot(version=self.version, nodes=dict(self.nodes), G=self.G.copy(),
+                               edges_to_add=defaultdict(list, {
+                                   key: list(value) for key, value in self.edges_to_add.items()}),
+                               structure_version=self.structure_version,
+                               revisions=dict(self.revisions))
+
+
 class BayesianNetwork(object):
     """
     Bayesian Network class where it keeps Directed Acyclic Graph in it
 
     .. note:: In constructor, it can be constructed with initial network node list where each node
               is added by calling single add function of class
+
+    .. note:: Queries are answered by enumeration, or by Pearl's message passing when the pruned
+              subgraph of the query is polytree and it is expected to be cheaper
+
+    .. note:: Version of the network is increased on each change of nodes so that results of the
+              optional query cache are invalidated. Updates of probabilities by
+              `update_probabilities` invalidate only the results which depend on the updated node.
+
+    .. note:: State of the network is kept as copy-on-write snapshots. Writers are serialized and
+              publish new snapshot atomically, while each query pins the snapshot at its start so
+              that it never sees half-updated network. Snapshots are reclaimed by garbage
+              collection once no query refers to them.
     """
+    ENUMERATION_ENGINE = 'enumeration'
+    POLYTREE_ENGINE = 'polytree'
+    CIRCUIT_ENGINE = 'circuit'
+    RECURSIVE_CONDITIONING_ENGINE = 'recursive_conditioning'
+    LOOP_CUTSET_ENGINE = 'loop_cutset'
+
+    def __init__(self, initial_network: List[NetworkNode], query_cache: QueryCache = None,
+                 conditioning_cache_size: int = None):
+        # Published state composed of directed graph, nodes and container to keep edges which are
+        # not added since the predecessor does not exist
+        self._snapshot = NetworkSnapshot(version=0, nodes={}, G=DirectedGraph(),
+                                         edges_to_add=defaultdict(list))
+        self._write_lock = threading.Lock()
+        self._is_pinned = False
+        # Cache of query results bound to version of the network
+        self.query_cache = query_cache
+        # Memory budget of recursive conditioning as number of cache entries, unlimited if None
+        self.conditioning_cache_size = conditioning_cache_size
+
+        with self._writing() as draft:
+            for node in initial_network:
+                draft._add_node(node)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_write_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._write_lock = threading.Lock()
+
+    @property
+    def G(self) -> DirectedGraph:
+        """ Directed graph, see `DirectedGraph.to_networkx` for `networkx` counterpart """
+        return self._snapshot.G
 
-    def __init__(self, initial_network: List[NetworkNode]):
-        # Directed graph
-        self.G = nx.DiGraph()
-        # Nodes
-        self.nodes = {}
-        # Container to keep edges which are not added since the predecessor does not exist
-        self.edges_to_add = defaultdict(list)
+    @property
+    def nodes(self) -> Dict[str, NetworkNode]:
+        return self._snapshot.nodes
 
-        for node in initial_network:
-            self.add_node(node)
+    @property
+    def edges_to_add(self) -> Dict[str, List[str]]:
+        """ Edges which are not added since the predecessor does not exist """
+        return self._snapshot.edges_to_add
+
+    @property
+    def version(self) -> int:
+        """ Counter of changes on nodes """
+        return self._snapshot.version
+
+    def pinned(self) -> 'BayesianNetwork':
+        """
+        Read only view of the network bound to the current snapshot so that consecutive reads are
+        consistent even if the network is changed meanwhile
+
+        :return: Network view sharing the current snapshot
+        """
+        if self._is_pinned:
+            return self
+        view = copy.copy(self)
+        view._is_pinned = True
+        return view
+
+    @contextmanager
+    def _writing(self) -> Generator['BayesianNetwork', None, None]:
+        """
+        Serialize writers and give private draft of the network to be changed, where the draft is
+        published at the end if it is changed
+
+        :raises ReadOnlyNetwork: If network is pinned view
+        """
+        if self._is_pinned:
+            raise ReadOnlyNetwork('Pinned view of the network cannot be changed.')
+        with self._write_lock:
+            draft = copy.copy(self)
+            draft._snapshot = self._snapshot.copy()
+            yield draft
+            if draft._snapshot.version != self._snapshot.version:
+                self._snapshot = draft._snapshot
 
     def is_node_in_graph(self, node_name: str) -> bool:
         """ Helper function checking node exist in the current graph """
@@ -70,12 +201,27 @@ class BayesianNetwork(object):
         :param node: Network node instance to be added into graph
         :return: Boolean flag whether node is successfully added or not
         """
+        with self._writing() as draft:
+            return draft._add_node(node)
+
+    def _add_node(self, node: NetworkNode) -> bool:
+        """ Adding node procedure applied on the draft of writer """
         node_key = node.node_name
 
         # Already in network
         if self.is_node_in_graph(node_name=node_key):
             return False
 
+        # Auxiliary variables of factors are eliminated together with the network variables, and
+        # their names start with the name of their node followed by the suffix
+        owners = [node_key[:position] for position, character in enumerate(node_key) if
+                  character == NetworkNode.AUXILIARY_SUFFIX]
+        if any(node_key in self.nodes[owner].auxiliary_names for owner in owners if
+               owner in self.nodes) or any(name in self.nodes for name in node.auxiliary_names):
+            logging.warning(f'{node_key} cannot be added since its name collides with auxiliary '
+                            f'variable of a node.')
+            return False
+
         # Check acyclic condition of graph
         has_cycle = self._guarantee_graph_has_no_cycle(node_key, node=node)
         if has_cycle:
@@ -90,6 +236,7 @@ class BayesianNetwork(object):
         self.G.add_node(node_key)
         self._add_predecessor_edges(node_key=node_key, node=node, target_graph=self.G)
         self._add_expected_edges_if_exist(node_key=node_key, target_graph=self.G)
+        self._network_changed()
 
         return True
 
@@ -97,25 +244,17 @@ class BayesianNetwork(object):
         """
         Guaranteeing having no cycle in the graph where if so remove the node otherwise continue
 
-        .. note:: Changes are done on temporary graph copied from the actual graph. In order to keep
-                  internal changes, we pass `update_internal_variables=False` while adding edges
+        .. note:: Since the graph is acyclic before adding the node, a cycle is formed only if a
+                  predecessor of the node is reachable from one of its expected successors. So
+                  that the graph is searched without being copied.
 
         :param node_key: Node name to refer the node
-        :param node: Node instance to pass edge adding methods
-        """
-        try:
-            # Check if any cycle exists
-            copied_graph = self.G.copy()
-            self._add_predecessor_edges(node_key=node_key, node=node, target_graph=copied_graph,
-                                        update_internal_variables=False)
-            self._add_expected_edges_if_exist(node_key=node_key, target_graph=copied_graph,
-                                              update_internal_variables=False)
-            nx.find_cycle(copied_graph)
-        except nx.NetworkXNoCycle:
-            return False
-        return True
+        :param node: Node instance to get predecessors
+        """
+        predecessors = [predecessor for predecessor in node.predecessors if predecessor != node_key]
+        return self.G.has_path(sources=self.edges_to_add.get(node_key, []), targets=predecessors)
 
-    def _add_predecessor_edges(self, node_key: str, node: NetworkNode, target_graph: nx.DiGraph,
+    def _add_predecessor_edges(self, node_key: str, node: NetworkNode, target_graph: DirectedGraph,
                                update_internal_variables: bool = True):
         """
         Linking predecessors' related edges with the given node.
@@ -145,7 +284,7 @@ class BayesianNetwork(object):
                     continue
                 target_graph.add_edge(predecessor, node_key)
 
-    def _add_expected_edges_if_exist(self, node_key: str, target_graph: nx.DiGraph,
+    def _add_expected_edges_if_exist(self, node_key: str, target_graph: DirectedGraph,
                                      update_internal_variables: bool = True):
         """
         Link edges of the node which could not be added before
@@ -169,6 +308,11 @@ class BayesianNetwork(object):
         :param node_name: Node name to refer node itself
         :return: Boolean flag whether the node name found and removed successfully from network
         """
+        with self._writing() as draft:
+            return draft._remove_node(node_name)
+
+    def _remove_node(self, node_name: str) -> bool:
+        """ Removal node procedure applied on the draft of writer """
         if self.is_node_in_graph(node_name=node_name):
             del self.nodes[node_name]
         else:
@@ -181,11 +325,93 @@ class BayesianNetwork(object):
 
         if node_name in self.G:
             self.G.remove_node(node_name)
+        self._network_changed()
 
         logging.debug(f'{node_name} is successfully removed from the network.')
         return True
 
-    def P(self, query: str) -> Union[float, Dict[str, float]]:
+    def update_probabilities(self, node_name: str, probabilities: Dict[str, float]) -> None:
+        """
+        Replace conditional probability table of the node in place without changing the graph.
+        Cached query results and compiled circuits which do not depend on the node are kept.
+
+        .. note:: Only nodes given by full table can be updated. Rule based and noisy-MAX nodes are
+                  rejected instead of being expanded to full table, which would lose their compact
+                  representation, so they should be replaced by `remove_node` and `add_node`.
+
+        :param node_name: Node name to refer node itself
+        :param probabilities: Probability of each combination of predecessor values and value of
+            the node, keyed in the same form as `NetworkNode` probabilities
+        :raises VariableNotInGraph: If node does not exist in the network
+        :raises NotAllExpectedProbabilityExist: If node is continuous or not given by full table,
+            or probabilities do not match the combinations or do not sum up to one for a
+            combination of predecessors
+        """
+        with self._writing() as draft:
+            draft._update_probabilities(node_name, probabilities)
+            # Circuits compiled without the node are still valid for the new version
+            draft._snapshot.circuits.update({key: circuit for key, circuit in
+                                             self._snapshot.circuits.items() if
+                                             node_name not in key})
+
+    def _update_probabilities(self, node_name: str, probabilities: Dict[str, float]) -> None:
+        """ Update of probabilities applied on the draft of writer """
+        if not self.is_node_in_graph(node_name=node_name):
+            raise VariableNotInGraph(f'Variable {node_name} is not in the graph!')
+        node = self.nodes[node_name]
+        if not node.random_variables:
+            raise NotAllExpectedProbabilityExist(
+                f'Probabilities of continuous variable {node_name} cannot be updated.')
+        if type(node) is not NetworkNode:
+            raise NotAllExpectedProbabilityExist(
+                f'Probabilities of {type(node).__name__} {node_name} cannot be updated, replace '
+                f'the node instead.')
+
+        keys = set()
+        for combination in product(*node.all_random_variables[:-1]):
+            distribution = [NetworkNode._probability_key(combination + (value,)) for value in
+                            node.random_variables]
+            if any(key not in probabilities for key in distribution):
+                raise NotAllExpectedProbabilityExist(
+                    f'Expected probabilities of {node_name} given {combination} not exist.')
+            if not math.isclose(sum(probabilities[key] for key in distribution), 1.0,
+                                abs_tol=1e-6) or any(probabilities[key] < 0 for key in
+                                                     distribution):
+                raise NotAllExpectedProbabilityExist(
+                    f'Probabilities of {node_name} given {combination} do not sum up to one.')
+            keys.update(distribution)
+        if len(keys) != len(probabilities):
+            raise NotAllExpectedProbabilityExist(
+                f'Unexpected probabilities {sorted(set(probabilities) - keys)} of {node_name}.')
+
+        self.nodes[node_name] = NetworkNode(
+            node_name=node_name, random_variables=node.random_variables,
+            predecessors=node.predecessors, probabilities=dict(probabilities),
+            all_random_variables=node.all_random_variables)
+        self._network_changed(updated_node=node_name)
+        logging.debug(f'Probabilities of {node_name} are successfully updated.')
+
+    def _network_changed(self, updated_node: str = None) -> None:
+        """
+        Increase version of the network and drop cached results of previous versions, or only the
+        ones depending on the node if just its probabilities are updated
+        """
+        self._snapshot.version += 1
+        if updated_node is not None:
+            self._snapshot.revisions[updated_node] = self._snapshot.version
+            if self.query_cache is not None:
+                self.query_cache.invalidate(lambda _, value: updated_node in value[1])
+            return
+        self._snapshot.structure_version = self._snapshot.version
+        if self.query_cache is not None:
+            self.query_cache.clear()
+
+    def P(self, query: Union[str, Sequence[str], Dict[str, Optional[str]]],
+          return_stats: bool = False, engine: str = None, evidence: Dict[str, str] = None,
+          deadline: float = None) \
+            -> Union[float, Dict[str, float], ProbabilityTable, 'DeadlineResult',
+                     Tuple[Union[float, Dict[str, float], ProbabilityTable, 'DeadlineResult'],
+                           InferenceStats]]:
         """
         Exact probabilistic inference function that will be used for calculation of posterior
         probability on the given bayesian network context.
@@ -193,26 +419,410 @@ class BayesianNetwork(object):
         .. note:: Nominator is returned as with multiple query variable combinations if there
             exist any query variable
 
-        :param query: Query that will be evaluated with the network context
-        :return: Exact inference probability of the query in the network
+        .. note:: Statistics are collected if they are requested or any inference hook is
+            registered, and then registered hooks are notified with them
+
+        .. note:: If network has query cache, result is looked up with canonical form of the parsed
+            query so that order of variables and whitespaces do not matter
+
+        .. note:: Textual queries are parsed once and their parsed form is reused. Structured
+            queries are not parsed at all, and their result is `ProbabilityTable` keyed by tuples
+            of query variable values instead of dictionary keyed by string of contexts.
+
+        :param query: Query that will be evaluated with the network context, or names of query
+            variables, or their values by name where None means all values
+        :param return_stats: Boolean flag whether to return `InferenceStats` of the query together
+            with the probability
+        :param engine: Inference engine to be forced where `ENUMERATION_ENGINE` disables message
+            passing, `POLYTREE_ENGINE` requires it, `CIRCUIT_ENGINE` evaluates arithmetic
+            circuit of the needed variables compiled once for each version and
+            `RECURSIVE_CONDITIONING_ENGINE` conditions on dtree of the needed variables within
+            `conditioning_cache_size` and `LOOP_CUTSET_ENGINE` runs message passing for each
+            instantiation of loop cutset, cheapest one of enumeration, message passing, circuit
+            of compact nodes and loop cutset conditioning is selected if not given
+        :param evidence: Values of evidence variables by name for structured query
+        :param deadline: Time budget of the query in seconds. Exact inference is run if its cost
+            estimated from the needed variables and their table sizes fits into the remaining time,
+            otherwise likelihood weighting samples until the deadline. Result is `DeadlineResult`
+            which reports the engine and error bound.
+        :return: Exact inference probability of the query in the network, and statistics of the
+            query as tuple if they are requested
         :raises InvalidQuery: If query is not valid
+        :raises NotPolytreeNetwork: If polytree engine is forced on non-polytree subgraph
+        """
+        if not self._is_pinned:
+            return self.pinned().P(query=query, return_stats=return_stats, engine=engine,
+                                   evidence=evidence, deadline=deadline)
+
+        start_time = time.perf_counter()
+
+        is_structured = not isinstance(query, str)
+        if not is_structured and evidence is not None:
+            raise InvalidQuery('Evidence of textual query should be given within the query.')
+        # Engine of queries with deadline is reported from statistics
+        stats = InferenceStats(query=repr((query, evidence)) if is_structured else query) if (
+                return_stats or has_inference_hooks() or deadline is not None) else None
+
+        with stats.timer('parse') if stats else nullcontext():
+            queries, evidences = self._parse_query(query, evidence=evidence)
+        found = False
+        if self.query_cache is not None:
+            cache_key = (self._snapshot.structure_version, engine,
+                         self._canonical_variables(queries), self._canonical_variables(evidences))
+            found, cached = self.query_cache.get(cache_key)
+            # Result may be put by a query of another version of the probabilities
+            found = found and all(self._snapshot.revisions.get(name, 0) == revision for
+                                  name, revision in cached[1].items())
+            if found:
+                probability = self._restore_probability(cached[0], queries)
+                if stats:
+                    stats.cache_hits += 1
+
+        is_approximate = False
+        if deadline is not None:
+            from .anytime import OPERATIONS_PER_SECOND
+            estimated_time = (self._estimate_exact_cost(queries + evidences) +
+                              self._estimate_exact_cost(evidences)) / OPERATIONS_PER_SECOND
+            is_approximate = not found and estimated_time > deadline - (
+                    time.perf_counter() - start_time)
+
+        if is_approximate:
+            probability, error_bound, samples = self._approximate_probability(
+                queries, evidences, deadline=start_time + deadline, stats=stats)
+        elif not found:
+            # Get nominator for different query variables and denominator for each evidence
+            nominator_context = self._calculate_joint_probability(queries + evidences,
+                                                                  stats=stats, engine=engine)
+            denominator = self._calculate_joint_probability(evidences, stats=stats,
+                                                            engine=engine)
+            # Calculate exact inferred probability of each query variable combination
+            probability = nominator_context / denominator
+
+            if self.query_cache is not None:
+                # Result is kept with the revision of each variable it depends on
+                dependencies = self._eliminate_unnecessary_variables(
+                    variables={variable.name for variable in queries + evidences})
+                self.query_cache.put(cache_key, (self._canonical_probability(probability), {
+                    name: self._snapshot.revisions.get(name, 0) for name in dependencies}))
+
+        # Textual queries keep the dictionary format keyed by string of contexts
+        if not is_structured and type(probability) != float:
+            probability = probability.to_dict()
+        if deadline is not None:
+            from .anytime import CACHE_ENGINE, DeadlineResult
+            probability = DeadlineResult(
+                probability=probability, engine=stats.engine or CACHE_ENGINE,
+                error_bound=error_bound if is_approximate else 0.0,
+                samples=samples if is_approximate else 0, estimated_time=estimated_time)
+
+        if stats:
+            notify_inference_hooks(stats)
+            if return_stats:
+                return probability, stats
+        return probability
+
+    def _parse_query(self, query: Union[str, Sequence[str], Dict[str, Optional[str]]],
+                     evidence: Dict[str, str] = None) \
+            -> Tuple[List[QueryVariable], List[QueryVariable]]:
+        """
+        Query and evidence variables of textual or structured query
+
+        :param query: Textual query, or names of query variables, or their values by name
+        :param evidence: Values of evidence variables by name for structured query
+        :return: Query variables and evidence variables
+        :raises InvalidQuery: If query is not valid or has continuous variable
+        """
+        if isinstance(query, str):
+            is_parsed, queries, evidences = query_parser(
+                query=query, expected_symbol_and_values=self.symbol_context)
+            # If not parsed, then raise error immediately
+            if not is_parsed:
+                raise InvalidQuery("Query does not hold for full match!")
+        else:
+            queries, evidences = structured_query(
+                query=query, evidence=evidence, expected_symbol_and_values=self.symbol_context)
+        if any(not self.nodes[variable.name].random_variables for variable in queries + evidences):
+            raise InvalidQuery('Continuous variables should be queried by `gaussian`.')
+        return queries, evidences
+
+    def _estimate_exact_cost(self, variables: List[QueryVariable]) -> int:
+        """
+        Number of arithmetic operations of the joint probability of the given variables with the
+        engine which `_select_engine` selects, for all combinations of query variables
         """
-        is_parsed, queries, evidences = query_parser(query=query,
-                                                     expected_symbol_and_values=self.symbol_context)
-        # If not parsed, then raise error immediately
-        if not is_parsed:
-            raise InvalidQuery("Query does not hold for full match!")
-        # Get nominator for different query variables and denominator for each evidence variable
-        nominator_context = self._calculate_joint_probability(queries + evidences)
-        denominator = self._calculate_joint_probability(evidences)
-        # Calculate exact inferred probability of each query variable combination
-        if type(nominator_context) == float:
-            return nominator_context / denominator
+        needed_variable_names = {variable.name for variable in variables}
+        purified_variables = self._eliminate_unnecessary_variables(variables=needed_variable_names)
+        cost = len(purified_variables)
+        for variable in purified_variables - needed_variable_names:
+            cost *= len(self.nodes[variable].random_variables)
+        if is_polytree(nodes=self.nodes, variables=purified_variables):
+            cost = min(cost, PolytreePropagation(nodes=self.nodes,
+                                                 variables=purified_variables).estimate_cost())
         else:
-            return {context: value / denominator for context, value in nominator_context.items()}
+            factored_size = self._factored_size(purified_variables)
+            cost = min(cost, factored_size if factored_size is not None else
+                       LoopCutsetConditioning(nodes=self.nodes,
+                                              variables=purified_variables).estimate_cost())
+        _, combinations = self._query_combinations(variables)
+        return cost * sum(1 for _ in combinations)
+
+    def _approximate_probability(self, queries: List[QueryVariable],
+                                 evidences: List[QueryVariable], deadline: float,
+                                 stats: InferenceStats = None) \
+            -> Tuple[Union[float, ProbabilityTable], float, int]:
+        """ Estimate of the query by sampling the needed variables until the deadline """
+        from .anytime import LIKELIHOOD_WEIGHTING_ENGINE, likelihood_weighting
+        with stats.timer('planning') if stats else nullcontext():
+            purified_variables = self._eliminate_unnecessary_variables(
+                variables={variable.name for variable in queries + evidences})
+            order = [name for name in self.network_topology if name in purified_variables]
+        with stats.timer('inference') if stats else nullcontext():
+            result = likelihood_weighting(
+                nodes=self.nodes, order=order,
+                query={variable.name: variable.value for variable in queries if variable.value},
+                query_names=[variable.name for variable in queries if variable.value is None],
+                evidence={variable.name: variable.value for variable in evidences},
+                deadline=deadline)
+        if stats:
+            stats.engine = LIKELIHOOD_WEIGHTING_ENGINE
+            stats.needed_variable_count = len(purified_variables)
+            stats.pruned_variable_count = len(self.nodes) - len(purified_variables)
+        return result
+
+    @staticmethod
+    def _canonical_variables(variables: List[QueryVariable]) -> Tuple[Tuple[str, str], ...]:
+        """ Order independent form of variables to be used in cache keys """
+        return tuple(sorted((variable.name, variable.value or '') for variable in variables))
+
+    def _query_combinations(self, queries: List[QueryVariable]) \
+            -> Tuple[List[str], Iterable[Tuple[str, ...]]]:
+        """ Names of query variables without value and combinations of their values in order """
+        names = [variable.name for variable in queries if variable.value is None]
+        return names, product(*[self.nodes[name].random_variables for name in names])
+
+    @staticmethod
+    def _canonical_probability(probability: Union[float, ProbabilityTable]) \
+            -> Union[float, ProbabilityTable]:
+        """ Reorder axes of probability table independent of the variable order """
+        if type(probability) == float:
+            return probability
+        return probability.transpose(sorted(probability.variables))
+
+    def _restore_probability(self, canonical_probability: Union[float, ProbabilityTable],
+                             queries: List[QueryVariable]) -> Union[float, ProbabilityTable]:
+        """ Inverse of `_canonical_probability` with respect to the order of the given query """
+        if type(canonical_probability) == float:
+            return canonical_probability
+        names, _ = self._query_combinations(queries)
+        return canonical_probability.transpose(names)
+
+    def marginals(self, evidence: Dict[str, str] = None, variables: Iterable[str] = None,
+                  engine: str = None) -> Dict[str, Dict[str, float]]:
+        """
+        Posterior distribution of each of the given variables in single inference pass instead of
+        single query for each variable
+
+        .. note:: Pearl's message passing is used if the needed variables form polytree, otherwise
+                  arithmetic circuit of the needed variables is compiled once for each version of
+                  the network and evaluated with single upward and downward pass
+
+        :param evidence: Observed values of variables
+        :param variables: Variables whose posteriors are calculated, all discrete variables if not
+            given
+        :param engine: `POLYTREE_ENGINE` or `CIRCUIT_ENGINE` to be forced, selected by the
+            structure if not given
+        :return: Probability of each value of each variable given the evidence
+        :raises VariableNotInGraph: If a variable is not in the network
+        :raises InvalidQuery: If evidence value is not valid, variable is continuous, discrete
+            variable has continuous predecessor or engine is unknown
+        :raises NotPolytreeNetwork: If polytree engine is forced on non-polytree subgraph
+        """
+        if not self._is_pinned:
+            return self.pinned().marginals(evidence=evidence, variables=variables, engine=engine)
+
+        evidence = evidence or {}
+        variables = [name for name, node in self.nodes.items() if node.random_variables] if \
+            variables is None else list(variables)
+        self._validate_variables(variables, evidence)
+        if engine not in (None, self.POLYTREE_ENGINE, self.CIRCUIT_ENGINE):
+            raise InvalidQuery(f'Unknown inference engine {engine}!')
+
+        purified_variables = self._eliminate_unnecessary_variables(
+            variables=set(variables) | set(evidence))
+        self._validate_discrete_predecessors(purified_variables)
+        if engine != self.CIRCUIT_ENGINE and is_polytree(nodes=self.nodes,
+                                                         variables=purified_variables):
+            propagation = PolytreePropagation(nodes=self.nodes, variables=purified_variables)
+            propagation.propagate(evidence)
+            marginals = {}
+            for name in variables:
+                # Belief covers only the evidence of its own connected component
+                belief = propagation.belief(name)
+                probability = sum(belief.values())
+                marginals[name] = {value: p / probability for value, p in belief.items()}
+            return marginals
+        if engine == self.POLYTREE_ENGINE:
+            raise NotPolytreeNetwork('Needed variables of the query do not form polytree.')
+
+        marginals = self._circuit_of(purified_variables).marginals(evidence)
+        return {name: marginals[name] for name in variables}
+
+    def _circuit_of(self, purified_variables: Set[str]) -> ArithmeticCircuit:
+        """ Circuit of the given variables compiled once for each version of the network """
+        key = frozenset(purified_variables)
+        circuit = self._snapshot.circuits.get(key)
+        if circuit is None:
+            circuit = ArithmeticCircuit.from_nodes(
+                {name: self.nodes[name] for name in purified_variables})
+            self._snapshot.circuits[key] = circuit
+        return circuit
+
+    def mpe(self, evidence: Dict[str, str] = None, k: int = 1) -> List[Explanation]:
+        """
+        Most probable explanation i.e. the most probable assignments of all the discrete variables
+        other than the evidence, found by max-product elimination without building the joint table.
+        Continuous variables are left out since they are not observed.
+
+        :param evidence: Observed values of discrete variables
+        :param k: Number of assignments
+        :return: Explanations in descending order of probability given the evidence
+        :raises VariableNotInGraph: If a variable is not in the network
+        :raises InvalidQuery: If evidence value is not valid, evidence variable is continuous or
+            discrete variable has continuous predecessor
+        """
+        if not self._is_pinned:
+            return self.pinned().mpe(evidence=evidence, k=k)
+        evidence = evidence or {}
+        self._validate_variables([], evidence)
+        nodes = {name: node for name, node in self.nodes.items() if node.random_variables}
+        self._validate_discrete_predecessors(nodes)
+        return most_probable_explanations(nodes=nodes, evidence=evidence, k=k)
+
+    def map(self, variables: Iterable[str], evidence: Dict[str, str] = None, k: int = 1) \
+            -> List[Explanation]:
+        """
+        Maximum a posteriori assignments of the given variables where the other variables which
+        are not in evidence are summed out
+
+        :param variables: Variables to be explained
+        :param evidence: Observed values of variables
+        :param k: Number of assignments
+        :return: Explanations in descending order of probability given the evidence
+        :raises VariableNotInGraph: If a variable is not in the network
+        :raises InvalidQuery: If evidence value is not valid, variable is also in evidence,
+            variable is continuous or discrete variable has continuous predecessor
+        """
+        if not self._is_pinned:
+            return self.pinned().map(variables=variables, evidence=evidence, k=k)
+        evidence = evidence or {}
+        variables = list(variables)
+        self._validate_variables(variables, evidence)
+        if any(variable in evidence for variable in variables):
+            raise InvalidQuery('Explained variables should not be in evidence variables.')
 
-    def _calculate_joint_probability(self, variables: List[QueryVariable]) \
-            -> Union[float, Dict[str, float]]:
+        purified_variables = self._eliminate_unnecessary_variables(
+            variables=set(variables) | set(evidence))
+        self._validate_discrete_predecessors(purified_variables)
+        nodes = {name: self.nodes[name] for name in purified_variables}
+        if len(variables) + len(evidence) == len(nodes):
+            # Nothing to be summed out
+            return most_probable_explanations(nodes=nodes, evidence=evidence, k=k)
+        return maximum_a_posteriori(nodes=nodes, variables=variables, evidence=evidence, k=k)
+
+    def gaussian(self, query: Sequence[str], evidence: Dict[str, Union[str, float]] = None) \
+            -> 'GaussianPosterior':
+        """
+        Exact posterior of continuous variables, and discrete ones which continuous variables
+        depend on, without discretization
+
+        .. note:: Joint density of linear Gaussian nodes is built in canonical form, so that
+                  all-continuous networks are answered in closed form. If continuous nodes have
+                  discrete predecessors, the posterior is mixture with one Gaussian for each
+                  combination of them that is weighted by its probability and the density of the
+                  continuous evidence.
+
+        :param query: Continuous query variables, and discrete ones which are predecessors of
+            needed continuous variables
+        :param evidence: Values of evidence variables where continuous ones have float values
+        :return: Posterior of the query variables
+        :raises VariableNotInGraph: If a variable is not in the network
+        :raises InvalidQuery: If evidence value is not valid, variable is also in evidence,
+            discrete query variable is not a predecessor of needed continuous variable, discrete
+            variable has continuous predecessor or discrete evidence has zero probability
+        """
+        from .gaussian import gaussian_inference
+
+        if not self._is_pinned:
+            return self.pinned().gaussian(query=query, evidence=evidence)
+        evidence = evidence or {}
+        query = list(query)
+        discrete_evidence = {name: value for name, value in evidence.items() if
+                             self.is_node_in_graph(name) and self.nodes[name].random_variables}
+        self._validate_variables(query + [name for name in evidence if
+                                          name not in discrete_evidence], discrete_evidence,
+                                 continuous=True)
+        if any(variable in evidence for variable in query):
+            raise InvalidQuery('Query variables should not be in evidence variables.')
+
+        purified_variables = self._eliminate_unnecessary_variables(
+            variables=set(query) | set(evidence))
+        continuous = [self.nodes[name] for name in self.network_topology if
+                      name in purified_variables and isinstance(self.nodes[name],
+                                                                LinearGaussianNetworkNode)]
+        self._validate_discrete_predecessors(purified_variables)
+
+        enumerated = []
+        for node in continuous:
+            enumerated.extend(predecessor for predecessor in node.discrete_predecessors if
+                              predecessor not in discrete_evidence and
+                              predecessor not in enumerated)
+        for name in query:
+            if self.nodes[name].random_variables and name not in enumerated:
+                raise InvalidQuery(f'{name} is not a predecessor of needed continuous variables.')
+
+        assignments = ({**discrete_evidence, **dict(zip(enumerated, combination))} for
+                       combination in product(*[self.nodes[name].random_variables for name in
+                                                enumerated]))
+        return gaussian_inference(
+            nodes=continuous,
+            query=[name for name in query if not self.nodes[name].random_variables],
+            evidence={name: float(value) for name, value in evidence.items() if
+                      name not in discrete_evidence},
+            assignments=assignments,
+            probability_of=lambda assignment: self._calculate_joint_probability(
+                [QueryVariable(name, value) for name, value in assignment.items()]) if
+            assignment else 1.0)
+
+    def _validate_variables(self, variables: List[str], evidence: Dict[str, str],
+                            continuous: bool = False) -> None:
+        """
+        :param continuous: Whether continuous variables are allowed
+        :raises VariableNotInGraph: If a variable is not in the network
+        :raises InvalidQuery: If variable is continuous while not allowed, or evidence value is not
+            a value of its variable
+        """
+        for name in variables + list(evidence):
+            if not self.is_node_in_graph(node_name=name):
+                raise VariableNotInGraph(f'Variable {name} is not in the graph!')
+        if not continuous and any(not self.nodes[name].random_variables for name in
+                                  variables + list(evidence)):
+            raise InvalidQuery('Continuous variables should be queried by `gaussian`.')
+        for name, value in evidence.items():
+            if value not in self.nodes[name].random_variables:
+                raise InvalidQuery(f'Value {value} is not a value of {name}!')
+
+    def _validate_discrete_predecessors(self, variables: Iterable[str]) -> None:
+        """
+        :raises InvalidQuery: If a discrete one of the given variables has continuous predecessor
+        """
+        if any(not self.nodes[predecessor].random_variables for name in variables for
+               predecessor in self.nodes[name].predecessors if self.nodes[name].random_variables):
+            raise InvalidQuery('Discrete variables should not have continuous predecessors.')
+
+    def _calculate_joint_probability(self, variables: List[QueryVariable],
+                                     stats: InferenceStats = None, engine: str = None,
+                                     submit: Callable = None) \
+            -> Union[float, ProbabilityTable]:
         """
         Calculation of joint probability of the given variable set where it is made up of query and
         evidence variables
@@ -220,42 +830,176 @@ class BayesianNetwork(object):
         Procedural steps:
             * Find needed variables, hidden variables
             * Decide order of calculation for the probability factors
+            * Select inference engine
             * For each query variable combination, calculate probability if exist
 
         :param variables: Variables composed from query and evidence variables
-        :return: Single float if no query variable exist, otherwise dictionary with keys query
-            variable contexts
+        :param stats: Statistics to be updated if given
+        :param engine: Inference engine to be forced, cheaper one is selected if not given
+        :param submit: Submission of cutset instantiations to process pool, see
+            `LoopCutsetConditioning.probabilities`
+        :return: Single float if no query variable exist, otherwise table of query variable
+            combinations
         """
-        # Set of variable names of query + evidence
-        needed_variable_names = {v.name: v for v in variables}
-        # Set of all the variables where query + evidence + hidden variables included
-        purified_variables = self._eliminate_unnecessary_variables(
-            variables=needed_variable_names.keys())
-        # Hidden variables
-        hidden_variables = {v for v in purified_variables if v not in needed_variable_names}
-
-        order = self._decide_calculation_order(needed_variable_names=needed_variable_names,
-                                               purified_variables=purified_variables,
-                                               hidden_variables=hidden_variables)
-
-        # Find all query variables
-        query_variable_names = [variable.name for variable in variables if variable.value is None]
-        query_variable_values = [self.nodes[variable_name].random_variables for variable_name in
-                                 query_variable_names]
-
-        # If any exists, calculate probability for each combination of query variables
-        if query_variable_names:
-            return_context_probability = {}
-            for combination in product(*query_variable_values):
-                context = dict(zip(query_variable_names, combination))
-                p = self._probability_inference(tuple(order), **context)
-                return_context_probability[str(context)] = p
-            return return_context_probability
+        with stats.timer('planning') if stats else nullcontext():
+            # Set of variable names of query + evidence
+            needed_variable_names = {v.name: v for v in variables}
+            # Set of all the variables where query + evidence + hidden variables included
+            purified_variables = self._eliminate_unnecessary_variables(
+                variables=needed_variable_names.keys())
+            # Hidden variables
+            hidden_variables = {v for v in purified_variables if v not in needed_variable_names}
+
+            order = self._decide_calculation_order(needed_variable_names=needed_variable_names,
+                                                   purified_variables=purified_variables,
+                                                   hidden_variables=hidden_variables)
+
+            # Find all query variables
+            query_variable_names = [variable.name for variable in variables if
+                                    variable.value is None]
+            query_variable_values = [self.nodes[variable_name].random_variables for variable_name
+                                     in query_variable_names]
+
+            engine, propagation = self._select_engine(engine=engine,
+                                                      purified_variables=purified_variables,
+                                                      hidden_variables=hidden_variables)
+
+        evidence = {v.name: v.value for v in variables if v.value is not None}
+        if engine == self.POLYTREE_ENGINE:
+            def joint_probability(**context) -> float:
+                propagation.propagate({**evidence, **context})
+                return propagation.evidence_probability()
+        elif engine == self.CIRCUIT_ENGINE:
+            circuit = self._circuit_of(purified_variables)
+
+            def joint_probability(**context) -> float:
+                return circuit.evaluate({**evidence, **context})
+        elif engine == self.RECURSIVE_CONDITIONING_ENGINE:
+            # Built for each calculation since caches are filled during evaluation
+            conditioning = RecursiveConditioning(
+                nodes={name: self.nodes[name] for name in purified_variables},
+                cache_size=self.conditioning_cache_size)
+
+            def joint_probability(**context) -> float:
+                probability = conditioning.evaluate({**evidence, **context})
+                if stats:
+                    # Caches are filled from scratch by each evaluation
+                    stats.cache_entries = max(stats.cache_entries, conditioning.cache_entries)
+                return probability
+        elif engine == self.LOOP_CUTSET_ENGINE:
+            # Instantiations are solved for all combinations at once so that each of them is
+            # conditioned once and they can be distributed over processes
+            with stats.timer('inference') if stats else nullcontext():
+                probabilities = iter(propagation.probabilities(
+                    [{**evidence, **dict(zip(query_variable_names, combination))} for
+                     combination in product(*query_variable_values)], submit=submit))
+
+            def joint_probability(**_) -> float:
+                return next(probabilities)
         else:
-            return self._probability_inference(tuple(order))
+            def joint_probability(**context) -> float:
+                return self._probability_inference(tuple(order), stats=stats, **context)
+
+        with stats.timer('inference') if stats else nullcontext():
+            # If any exists, calculate probability for each combination of query variables
+            if query_variable_names:
+                result = ProbabilityTable(
+                    variables=query_variable_names, states=query_variable_values,
+                    probabilities=[joint_probability(**dict(zip(query_variable_names, combination)))
+                                   for combination in product(*query_variable_values)])
+            else:
+                result = joint_probability()
+
+        if stats:
+            stats.engine = stats.engine or engine
+            stats.needed_variable_count = max(stats.needed_variable_count,
+                                              len(purified_variables))
+            stats.pruned_variable_count = len(self.nodes) - stats.needed_variable_count
+            stats.hidden_variable_count = max(stats.hidden_variable_count, len(hidden_variables))
+            stats.largest_factor = max(stats.largest_factor, len(result) if query_variable_names
+                                       else 1)
+            if engine == self.RECURSIVE_CONDITIONING_ENGINE:
+                stats.multiplications += conditioning.multiplications
+                stats.additions += conditioning.additions
+            if engine == self.LOOP_CUTSET_ENGINE:
+                stats.multiplications += propagation.multiplications
+                stats.additions += propagation.additions
+            elif propagation:
+                stats.multiplications += propagation.multiplications
+                stats.additions += propagation.additions
+                stats.largest_factor = max(stats.largest_factor, propagation.largest_factor)
+        return result
+
+    def _select_engine(self, engine: Optional[str], purified_variables: Set[str],
+                       hidden_variables: Set[str]) \
+            -> Tuple[str, Optional[Union[PolytreePropagation, LoopCutsetConditioning]]]:
+        """
+        Decide inference engine of joint probability calculation. Message passing is selected
+        when the subgraph is polytree and its estimated cost is lower than the enumeration which
+        grows exponentially with hidden variables. Otherwise, arithmetic circuit is selected if
+        factors of any node are smaller than its table and their size is lower than the
+        enumeration, and loop cutset conditioning is selected when its cost which grows
+        exponentially with the cutset is lower than the enumeration.
+
+        :param engine: Engine forced by the caller if any
+        :param purified_variables: Variables needed for the calculation
+        :param hidden_variables: Variables to be summed out
+        :return: Selected engine and message passing or cutset conditioning instance if it is
+            selected
+        :raises InvalidQuery: If engine is unknown
+        :raises NotPolytreeNetwork: If polytree engine is forced on non-polytree subgraph
+        """
+        if engine in (self.ENUMERATION_ENGINE, self.CIRCUIT_ENGINE,
+                      self.RECURSIVE_CONDITIONING_ENGINE):
+            return engine, None
+        if engine == self.LOOP_CUTSET_ENGINE:
+            return engine, LoopCutsetConditioning(nodes=self.nodes, variables=purified_variables)
+        if engine not in (None, self.POLYTREE_ENGINE):
+            raise InvalidQuery(f'Unknown inference engine {engine}!')
+
+        enumeration_cost = len(purified_variables)
+        for variable in hidden_variables:
+            enumeration_cost *= len(self.nodes[variable].random_variables)
+
+        if not is_polytree(nodes=self.nodes, variables=purified_variables):
+            if engine == self.POLYTREE_ENGINE:
+                raise NotPolytreeNetwork('Needed variables of the query do not form polytree.')
+            # Cutset conditioning expands the tables of compact nodes, so that their factors are
+            # compiled into circuit instead
+            factored_size = self._factored_size(purified_variables)
+            if factored_size is not None:
+                engine = self.ENUMERATION_ENGINE if enumeration_cost <= factored_size else \
+                    self.CIRCUIT_ENGINE
+                return engine, None
+            conditioning = LoopCutsetConditioning(nodes=self.nodes, variables=purified_variables)
+            # Per variable cost is not worth calculating if instantiations alone are too many
+            if enumeration_cost <= conditioning.instantiation_count or \
+                    enumeration_cost <= conditioning.estimate_cost():
+                return self.ENUMERATION_ENGINE, None
+            return self.LOOP_CUTSET_ENGINE, conditioning
+
+        propagation = PolytreePropagation(nodes=self.nodes, variables=purified_variables)
+        if engine is None and enumeration_cost <= propagation.estimate_cost():
+            return self.ENUMERATION_ENGINE, None
+        return self.POLYTREE_ENGINE, propagation
+
+    def _factored_size(self, purified_variables: Set[str]) -> Optional[int]:
+        """
+        Total number of entries of the factors of the given variables, which approximates the size
+        of their circuit, if factors of any of them are smaller than its table
+
+        :param purified_variables: Variables whose predecessors are included
+        :return: Number of entries, None if there is no such node
+        """
+        values_of = {name: self.nodes[name].random_variables for name in purified_variables}
+        sizes = [(self.nodes[name].factor_size(values_of), self.nodes[name].table_size(values_of))
+                 for name in purified_variables]
+        if all(factor_size >= table_size for factor_size, table_size in sizes):
+            return None
+        return sum(factor_size for factor_size, _ in sizes)
 
     def _probability_inference(self, calculation_order: Tuple[ProbabilityFactor], tab_stop: int = 0,
-                               **context) -> float:
+                               stats: InferenceStats = None, **context) -> float:
         """
         Probability calculation of defined calculation order with the given initial context for the
         exact bayesian inference with the below formulation:
@@ -274,6 +1018,7 @@ class BayesianNetwork(object):
 
         :param calculation_order: Predefined order of factors to be calculated of full-joint
             probability
+        :param stats: Statistics whose operation counters are updated if given
         :return: Calculated probability of the given factors
         :raises InvalidProbabilityFactor: When the current factor has value and needs sum-out
         """
@@ -294,15 +1039,20 @@ class BayesianNetwork(object):
                 logging.debug(
                     '\t' * tab_stop + f'Query variable {node_name} : {probability} with context: '
                                       f'{context}')
+                if stats:
+                    stats.multiplications += 1
                 return probability * self._probability_inference(calculation_order[1:],
-                                                                 tab_stop=tab_stop + 1, **context)
+                                                                 tab_stop=tab_stop + 1,
+                                                                 stats=stats, **context)
             elif first_factor.value is None and first_factor.sum_out:
                 # Hidden variable
                 logging.debug(
                     '\t' * tab_stop + f'Hidden variable {node_name} with context: {context}')
+                if stats:
+                    stats.additions += len(node.random_variables) - 1
                 return sum(self._probability_inference(
                     (ProbabilityFactor(name=node_name, value=v),) + calculation_order[1:],
-                    tab_stop=tab_stop + 1, **context) for v in node.random_variables)
+                    tab_stop=tab_stop + 1, stats=stats, **context) for v in node.random_variables)
             elif first_factor.value is not None and not first_factor.sum_out:
                 # Known variable
                 new_context = context.copy()
@@ -311,9 +1061,11 @@ class BayesianNetwork(object):
                 logging.debug(
                     '\t' * tab_stop + f'Known variable {node_name} : {probability} with context: '
                                       f'{new_context}')
+                if stats:
+                    stats.multiplications += 1
                 return probability * self._probability_inference(calculation_order[1:],
                                                                  tab_stop=tab_stop + 1,
-                                                                 **new_context)
+                                                                 stats=stats, **new_context)
             else:
                 error_message = f'Unexpected probability factor for {node_name}!'
                 logging.error(error_message)
@@ -327,8 +1079,9 @@ class BayesianNetwork(object):
         return {node_name: node.random_variables for node_name, node in self.nodes.items()}
 
     @property
-    def network_topology(self) -> Generator[str, str, str]:
-        return nx.topological_sort(self.G)
+    def network_topology(self) -> List[str]:
+        """ Topological order of nodes which is kept with the graph until it is changed """
+        return self.G.topological_sort()
 
     def _decide_calculation_order(self, needed_variable_names: Dict[str, QueryVariable],
                                   purified_variables: Set[str],
@@ -369,7 +1122,7 @@ class BayesianNetwork(object):
                     variable = traverse_queue.pop()
                     if variable not in set_of_needed_variables:
                         set_of_needed_variables.add(variable)
-                        traverse_queue.extend(self.nodes[variable].predecessors)
+                        traverse_queue.extend(self.nodes[variable].relevant_predecessors)
         logging.debug(f"Extracted necessary variables: {set_of_needed_variables}")
         return set_of_needed_variables
 
@@ -388,6 +1141,10 @@ class BayesianNetwork(object):
         :return: Boolean flag representing independence of variable1 and variable2 i.e. True if they
         are independent else False
         """
+        if not self._is_pinned:
+            return self.pinned().is_independent(variable1=variable1, variable2=variable2,
+                                                evidence_variables=evidence_variables)
+
         # Check all variables exist in the graph
         if not self.is_node_in_graph(node_name=variable1) or not self.is_node_in_graph(
                 node_name=variable2) or (
@@ -403,13 +1160,9 @@ class BayesianNetwork(object):
             if variable1 in evidence_variables or variable2 in evidence_variables:
                 raise InvalidQuery('Independence parameters should not be in evidence variables.')
 
-        undirected_graph = self.G.to_undirected()
-        if evidence_variables:
-            for evidence_variable in evidence_variables:
-                undirected_graph.remove_node(evidence_variable)
-
-        # The graph is undirected so source and destination should not matter
-        return not nx.has_path(G=undirected_graph, source=variable1, target=variable2)
+        # Directions of edges are ignored so source and destination should not matter
+        return not self.G.is_connected(source=variable1, target=variable2,
+                                       excluded=evidence_variables or ())
 
 
 P: Callable[[BayesianNetwork, str], float] = lambda network, query: network.P(query=query)
@@ -0,0 +1,246 @@
+import math
+from collections import deque
+from itertools import product
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bayesian_network import BayesianNetwork
+from .graph import DirectedGraph
+from .network_node import NetworkNode
+from .probability_table import ProbabilityTable
+from ..exceptions.exceptions import (
+    InvalidQuery, InvalidTemporalNetwork, PredecessorNotExistInNetwork, RandomVariableNotInContext,
+    VariableNotInGraph,
+)
+
+__all__ = ['DynamicBayesianNetwork', 'StreamingFilter']
+
+# Limit of distinct axes of single `numpy.einsum` call
+_MAXIMUM_AXES = 52
+
+
+class DynamicBayesianNetwork(object):
+    """
+    Two-slice temporal Bayesian network, where the prior slice is the distribution of the first
+    time step and the transition slice is the distribution of each following time step given the
+    previous one
+
+    .. note:: Transition nodes have the same names and random variables as the prior nodes, and
+              their predecessors refer to the previous time step by `previous` name, i.e. with
+              `PREVIOUS_SUFFIX`. Variables of the previous step referred by transition nodes form
+              the interface, whose joint is the belief state carried from one step to the next.
+
+    :param prior: Nodes of the first time step
+    :param transition: Nodes of each following time step
+    :raises InvalidTemporalNetwork: If slices do not have the same variables or have a cycle
+    :raises PredecessorNotExistInNetwork: If a predecessor is not a variable of either time step
+    """
+
+    PREVIOUS_SUFFIX = '_previous'
+
+    def __init__(self, prior: List[NetworkNode], transition: List[NetworkNode]):
+        self.prior = {node.node_name: node for node in prior}
+        self.transition = {node.node_name: node for node in transition}
+        self.variables = [node.node_name for node in prior]
+        self._validate()
+
+        self.values_of = {name: list(node.random_variables) for name, node in self.prior.items()}
+        self.values_of.update({self.previous(name): values for name, values in
+                               list(self.values_of.items())})
+        self.interface = [name for name in self.variables if any(
+            self.previous(name) in node.predecessors for node in self.transition.values())]
+        self._prior_factors = [self._array_of(node) for node in self.prior.values()]
+        self._transition_factors = [self._array_of(node) for node in self.transition.values()]
+
+    @classmethod
+    def previous(cls, node_name: str) -> str:
+        """ Name referring to the variable in the previous time step """
+        return node_name + cls.PREVIOUS_SUFFIX
+
+    @staticmethod
+    def slice_name(node_name: str, time: int) -> str:
+        """ Name of the variable at the time step in unrolled network """
+        return f'{node_name}_{time}'
+
+    def _validate(self):
+        if set(self.prior) != set(self.transition) or len(self.prior) != len(self.variables):
+            raise InvalidTemporalNetwork('Prior and transition slices must have the same nodes.')
+        for name, node in self.transition.items():
+            if list(node.random_variables) != list(self.prior[name].random_variables):
+                raise InvalidTemporalNetwork(
+                    f'Random variables of {name} differ between prior and transition slices.')
+
+        for nodes, allowed in [(self.prior, set(self.variables)),
+                               (self.transition, set(self.variables) | {
+                                   self.previous(name) for name in self.variables})]:
+            graph = DirectedGraph()
+            for name, node in nodes.items():
+                graph.add_node(name)
+                for predecessor in node.predecessors:
+                    if predecessor not in allowed:
+                        raise PredecessorNotExistInNetwork(
+                            f'Predecessor {predecessor} of {name} is not in the temporal network.')
+                    if predecessor in nodes:
+                        graph.add_edge(predecessor, name)
+            if len(graph.topological_sort()) != len(graph):
+                raise InvalidTemporalNetwork('Slices of temporal network must be acyclic.')
+
+    def _array_of(self, node: NetworkNode) -> Tuple[np.ndarray, List[str]]:
+        """ Conditional probability table as array whose axes are the family of the node """
+        factor = node.table(self.values_of)
+        return np.array(factor.values).reshape(factor.cardinalities), list(factor.variables)
+
+    def unroll(self, steps: int) -> BayesianNetwork:
+        """
+        Static network of the given number of time steps with one copy of each node per step named
+        by `slice_name`, which grows with the number of steps unlike filtering
+
+        :param steps: Number of time steps
+        :return: Unrolled Bayesian network
+        """
+        nodes = []
+        for time in range(steps):
+            for (table, family), name in zip(
+                    self._prior_factors if time == 0 else self._transition_factors,
+                    self.prior if time == 0 else self.transition):
+                predecessors = [self.slice_name(variable[:-len(self.PREVIOUS_SUFFIX)], time - 1)
+                                if variable not in self.prior else self.slice_name(variable, time)
+                                for variable in family[:-1]]
+                all_random_variables = [self.values_of[variable] for variable in family]
+                nodes.append(NetworkNode(
+                    node_name=self.slice_name(name, time), random_variables=self.values_of[name],
+                    predecessors=predecessors, all_random_variables=all_random_variables,
+                    probabilities={NetworkNode._probability_key(combination): float(probability)
+                                   for combination, probability in zip(
+                                       product(*all_random_variables), table.ravel())}))
+        return BayesianNetwork(initial_network=nodes)
+
+    def _evidence_codes(self, evidence: Dict[str, str]) -> Dict[str, int]:
+        codes = {}
+        for name, value in evidence.items():
+            if name not in self.prior:
+                raise VariableNotInGraph(f'{name} is not a variable of the temporal network.')
+            if value not in self.values_of[name]:
+                raise RandomVariableNotInContext(f'{value} is not a value of {name}.')
+            codes[name] = self.values_of[name].index(value)
+        return codes
+
+    def _operands(self, belief: Optional[np.ndarray], evidence: Sequence[Dict[str, int]]) \
+            -> Tuple[list, Dict[Tuple[int, str], int]]:
+        """
+        Operands of `numpy.einsum` over consecutive time steps starting from the belief over the
+        interface of the step before, or from the prior slice if there is no belief
+
+        :return: Arrays with their axes, and axis of each variable by time step and name
+        """
+        axis = {(-1, name): index for index, name in enumerate(self.interface)}
+        for time, name in product(range(len(evidence)), self.variables):
+            axis[(time, name)] = len(axis)
+        operands = [belief, [axis[(-1, name)] for name in self.interface]] if \
+            belief is not None else []
+        for time, codes in enumerate(evidence):
+            first = time == 0 and belief is None
+            for table, family in self._prior_factors if first else self._transition_factors:
+                operands += [table, [axis[(time, variable)] if variable in self.prior else axis[
+                    (time - 1, variable[:-len(self.PREVIOUS_SUFFIX)])] for variable in family]]
+            for name, code in codes.items():
+                indicator = np.zeros(len(self.values_of[name]))
+                indicator[code] = 1.0
+                operands += [indicator, [axis[(time, name)]]]
+        return operands, axis
+
+    def _advance(self, belief: Optional[np.ndarray], codes: Dict[str, int]) \
+            -> Tuple[np.ndarray, float]:
+        """ Normalized belief over the interface after single time step and its normalizer """
+        operands, axis = self._operands(belief, [codes])
+        joint = np.einsum(*operands, [axis[(0, name)] for name in self.interface],
+                          optimize='greedy')
+        normalizer = float(joint.sum())
+        if normalizer == 0:
+            raise InvalidQuery('Evidence of the time step has zero probability.')
+        return joint / normalizer, normalizer
+
+    def _marginals(self, belief: Optional[np.ndarray], evidence: Sequence[Dict[str, int]],
+                   time: int) -> Dict[str, ProbabilityTable]:
+        """ Posterior of each variable at the time step within the given time steps """
+        operands, axis = self._operands(belief, evidence)
+        marginals = {}
+        for name in self.variables:
+            marginal = np.einsum(*operands, [axis[(time, name)]], optimize='greedy')
+            marginals[name] = ProbabilityTable([name], [self.values_of[name]],
+                                               marginal / marginal.sum())
+        return marginals
+
+    def filtering(self, lag: int = 0) -> 'StreamingFilter':
+        """ Online filter of evidence stream, see `StreamingFilter` """
+        return StreamingFilter(network=self, lag=lag)
+
+    def filter(self, evidence_stream: Iterable[Dict[str, str]], lag: int = 0) \
+            -> Iterator[Tuple[Dict[str, ProbabilityTable], Optional[Dict[str, ProbabilityTable]]]]:
+        """
+        Consume evidence of each time step and yield posteriors of the variables at that step, and
+        smoothed ones of `lag` steps before if there are that many steps
+
+        :param evidence_stream: Observed values of variables by name for each time step
+        :param lag: Number of future time steps used for smoothing
+        :return: Generator of filtered and smoothed posteriors of each variable
+        """
+        streaming_filter = self.filtering(lag=lag)
+        for evidence in evidence_stream:
+            yield streaming_filter.update(evidence), streaming_filter.smoothed
+
+
+class StreamingFilter(object):
+    """
+    Forward filtering of temporal network where only the belief over the interface of the current
+    time step is kept, so that memory does not grow with the number of steps
+
+    .. note:: Fixed-lag smoothing keeps evidence of the last `lag + 1` steps with the belief before
+              them, thus cost of each step grows with the lag but not with the number of steps
+
+    :param network: Temporal network
+    :param lag: Number of future time steps used for smoothing, zero for filtering only
+    :raises InvalidQuery: If the smoothing window has more variables than supported
+    """
+
+    def __init__(self, network: DynamicBayesianNetwork, lag: int = 0):
+        if len(network.interface) + (lag + 1) * len(network.variables) > _MAXIMUM_AXES:
+            raise InvalidQuery(f'Smoothing window of {lag + 1} time steps has too many variables.')
+        self.network = network
+        self.lag = lag
+        self.time = -1
+        # Log probability of the evidence so far
+        self.log_likelihood = 0.0
+        self.belief: Optional[np.ndarray] = None
+        self.filtered: Optional[Dict[str, ProbabilityTable]] = None
+        self.smoothed: Optional[Dict[str, ProbabilityTable]] = None
+        # Evidence of the smoothing window and the belief before its first time step
+        self._window: Deque[Dict[str, int]] = deque()
+        self._window_belief: Optional[np.ndarray] = None
+
+    def update(self, evidence: Dict[str, str]) -> Dict[str, ProbabilityTable]:
+        """
+        Move to the next time step with its evidence
+
+        :param evidence: Observed values of variables by name
+        :return: Posterior of each variable at the time step given evidence so far
+        :raises InvalidQuery: If the evidence is impossible given the previous ones
+        """
+        codes = self.network._evidence_codes(evidence)
+        belief, normalizer = self.network._advance(self.belief, codes)
+        self.filtered = self.network._marginals(self.belief, [codes], time=0)
+        self.belief = belief
+        self.log_likelihood += math.log(normalizer)
+        self.time += 1
+
+        self._window.append(codes)
+        if len(self._window) > self.lag + 1:
+            self._window_belief, _ = self.network._advance(self._window_belief,
+                                                           self._window.popleft())
+        if self.lag and len(self._window) == self.lag + 1:
+            self.smoothed = self.network._marginals(self._window_belief, list(self._window),
+                                                    time=0)
+        elif not self.lag:
+            self.smoothed = self.filtered
+        return self.filtered
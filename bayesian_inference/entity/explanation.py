@@ -0,0 +1,158 @@
+import heapq
+from dataclasses import dataclass
+from functools import reduce
+from itertools import count
+from operator import itemgetter, mul
+from typing import Callable, Dict, List, Sequence, Set, Tuple
+
+from .factor import Factor, elimination_order
+from .network_node import NetworkNode
+
+__all__ = ['Explanation', 'most_probable_explanations', 'maximum_a_posteriori']
+
+# Candidates of k-best max-product kept in each factor entry as (probability, assignment) pairs
+# where assignment is tuple of (variable, value index) pairs
+Candidates = List[Tuple[float, Tuple[Tuple[str, int], ...]]]
+
+
+@dataclass
+class Explanation:
+    """
+    Assignment of the explained variables together with its posterior probability given the
+    evidence
+    """
+
+    assignment: Dict[str, str]
+    probability: float
+
+
+def _factors(nodes: Dict[str, NetworkNode], evidence: Dict[str, str],
+             transform: Callable[[float], object] = float) -> Tuple[List[Factor],
+                                                                    Dict[str, List[str]]]:
+    """ Probability tables of the nodes restricted to the evidence """
+    values_of = {name: node.random_variables for name, node in nodes.items()}
+    evidence_indices = {name: values_of[name].index(value) for name, value in evidence.items()}
+    return [node.table(values_of, transform=transform).reduce(evidence_indices) for node in
+            nodes.values()], values_of
+
+
+def _evidence_probability(nodes: Dict[str, NetworkNode], evidence: Dict[str, str]) -> float:
+    """
+    Probability of the evidence from `factors` of the nodes, which may be smaller than their
+    tables but are only valid when everything is summed out
+    """
+    values_of = {name: node.random_variables for name, node in nodes.items()}
+    evidence_indices = {name: values_of[name].index(value) for name, value in evidence.items()}
+    return _eliminate([factor.reduce(evidence_indices) for node in nodes.values() for factor in
+                       node.factors(values_of)], maximized=set())
+
+
+def _eliminate(factors: List[Factor], maximized: Set[str]) -> float:
+    """
+    Eliminate all variables of the factors where the given ones are maximized and the rest are
+    summed out in the order of the smallest factor first
+
+    .. note:: Maximization may be done before summation which is upper bound of the exact value
+              since sum of maximums is not less than maximum of sums
+    """
+    variables = {variable for factor in factors for variable in factor.variables}
+    for variable in elimination_order(factors, variables):
+        related = [factor for factor in factors if variable in factor.variables]
+        factors = [factor for factor in factors if variable not in factor.variables]
+        combined = reduce(lambda a, b: a.product(b), related)
+        factors.append(combined.marginalize(variable, add=max if variable in maximized else sum))
+    return reduce(mul, (factor.values[0] for factor in factors), 1.0)
+
+
+def most_probable_explanations(nodes: Dict[str, NetworkNode], evidence: Dict[str, str],
+                               k: int = 1) -> List[Explanation]:
+    """
+    The k most probable complete assignments of the variables other than the evidence with
+    max-product variable elimination, where each factor entry keeps its k best partial
+    assignments instead of single maximum so that the best ones are traced back from the result
+
+    :param nodes: All nodes of the network
+    :param evidence: Observed values of variables
+    :param k: Number of assignments
+    :return: Explanations in descending order of probability where impossible ones are excluded
+    """
+    def multiply(a: Candidates, b: Candidates) -> Candidates:
+        return heapq.nlargest(k, ((pa * pb, xa + xb) for pa, xa in a for pb, xb in b),
+                              key=itemgetter(0))
+
+    def maximize(variable: str) -> Callable[[List[Candidates]], Candidates]:
+        return lambda entries: heapq.nlargest(
+            k, ((p, x + ((variable, index),)) for index, candidates in enumerate(entries) for
+                p, x in candidates), key=itemgetter(0))
+
+    factors, values_of = _factors(nodes, evidence, transform=lambda p: [(p, ())])
+    evidence_probability = _evidence_probability(nodes, evidence)
+
+    variables = {variable for factor in factors for variable in factor.variables}
+    for variable in elimination_order(factors, variables):
+        related = [factor for factor in factors if variable in factor.variables]
+        factors = [factor for factor in factors if variable not in factor.variables]
+        combined = reduce(lambda a, b: a.product(b, multiply=multiply), related)
+        factors.append(combined.marginalize(variable, add=maximize(variable)))
+    candidates = reduce(multiply, (factor.values[0] for factor in factors), [(1.0, ())])
+
+    return [Explanation(assignment={variable: values_of[variable][index] for variable, index in
+                                    sorted(assignment)},
+                        probability=p / evidence_probability) for p, assignment in candidates if
+            p > 0.0]
+
+
+def maximum_a_posteriori(nodes: Dict[str, NetworkNode], variables: Sequence[str],
+                         evidence: Dict[str, str], k: int = 1) -> List[Explanation]:
+    """
+    The k most probable assignments of the given variables where the rest are summed out, with
+    depth-first branch-and-bound over the values of the variables
+
+    .. note:: Upper bound of a partial assignment is found by eliminating the unassigned variables
+              by maximization and the others by summation without constraining the order, and
+              branches whose bound is not higher than the k-th best assignment are pruned
+
+    :param nodes: Nodes of the network where predecessors of each one should be included
+    :param variables: Variables to be explained
+    :param evidence: Observed values of variables
+    :param k: Number of assignments
+    :return: Explanations in descending order of probability where impossible ones are excluded
+    """
+    factors, values_of = _factors(nodes, evidence)
+    evidence_probability = _evidence_probability(nodes, evidence)
+    variables = list(variables)
+    # Min-heap of the best complete assignments with tie breaker
+    best: List[Tuple[float, int, Dict[str, int]]] = []
+    tie_breaker = count()
+
+    def bound(assignment: Dict[str, int]) -> float:
+        return _eliminate([factor.reduce(assignment) for factor in factors],
+                          maximized=set(variables[len(assignment):]))
+
+    def search(assignment: Dict[str, int]) -> None:
+        variable = variables[len(assignment)]
+        branches = []
+        for index in range(len(values_of[variable])):
+            branch = {**assignment, variable: index}
+            branches.append((bound(branch), index, branch))
+        for upper_bound, _, branch in sorted(branches, key=lambda b: (-b[0], b[1])):
+            if upper_bound <= 0.0 or (len(best) == k and upper_bound <= best[0][0]):
+                break
+            if len(branch) == len(variables):
+                # Bound of complete assignment is its exact probability
+                item = (upper_bound, next(tie_breaker), branch)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                else:
+                    heapq.heapreplace(best, item)
+            else:
+                search(branch)
+
+    if variables:
+        search({})
+    else:
+        best.append((evidence_probability, 0, {}))
+    return [Explanation(assignment={variable: values_of[variable][index] for variable, index in
+                                    assignment.items()},
+                        probability=p / evidence_probability) for p, _, assignment in
+            sorted(best, key=lambda item: (-item[0], item[1]))]
@@ -0,0 +1,182 @@
+import operator
+from itertools import product
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Set, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .network_node import NetworkNode
+
+__all__ = ['Factor', 'elimination_order']
+
+
+class Factor(object):
+    """
+    Table over discrete variables where values are kept flat in row-major order of the variables.
+    Operations take the arithmetic of values as parameter so that the same factor can keep
+    probabilities, maximizations or symbolic expressions.
+
+    :param variables: Names of variables of the table
+    :param cardinalities: Number of values of each variable
+    :param values: Entries of the table in row-major order
+    """
+
+    def __init__(self, variables: Sequence[str], cardinalities: Sequence[int],
+                 values: List[Any]):
+        self.variables: Tuple[str, ...] = tuple(variables)
+        self.cardinalities: Tuple[int, ...] = tuple(cardinalities)
+        self.values = values
+
+    def __repr__(self):
+        return 'Factor({!r}, {!r}, {!r})'.format(self.variables, self.cardinalities, self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def strides(self) -> Tuple[int, ...]:
+        strides, stride = [], 1
+        for cardinality in reversed(self.cardinalities):
+            strides.append(stride)
+            stride *= cardinality
+        return tuple(reversed(strides))
+
+    @staticmethod
+    def from_node(node: 'NetworkNode', values_of: Dict[str, List[str]],
+                  transform: Callable[[float], Any] = float) -> 'Factor':
+        """
+        Conditional probability table of the node over its parents and itself
+
+        :param node: Network node
+        :param values_of: Values of each variable of the network
+        :param transform: Mapping applied to each probability
+        :return: Factor of the node
+        """
+        variables = [p for p in node.relevant_predecessors if p != node.node_name] + [
+            node.node_name]
+        values = [transform(node.probability(**dict(zip(variables, combination)))) for
+                  combination in product(*[values_of[variable] for variable in variables])]
+        return Factor(variables, [len(values_of[variable]) for variable in variables], values)
+
+    def product(self, other: 'Factor', multiply: Callable[[Any, Any], Any] = operator.mul) \
+            -> 'Factor':
+        """
+        Pointwise product of two factors over the union of their variables
+
+        :param other: Factor to be multiplied with
+        :param multiply: Multiplication of two entries
+        :return: Product factor
+        """
+        variables = list(self.variables) + [v for v in other.variables if v not in self.variables]
+        cardinality_of = dict(zip(self.variables, self.cardinalities))
+        cardinality_of.update(zip(other.variables, other.cardinalities))
+        cardinalities = [cardinality_of[variable] for variable in variables]
+
+        self_strides = dict(zip(self.variables, self.strides))
+        other_strides = dict(zip(other.variables, other.strides))
+        values = [multiply(self.values[self_index], other.values[other_index]) for
+                  self_index, other_index in _indices(
+                      cardinalities, [self_strides.get(variable, 0) for variable in variables],
+                      [other_strides.get(variable, 0) for variable in variables])]
+        return Factor(variables, cardinalities, values)
+
+    def marginalize(self, variable: str, add: Callable[[List[Any]], Any] = sum) -> 'Factor':
+        """
+        Eliminate variable by combining its entries for each assignment of the rest
+
+        :param variable: Variable to be eliminated
+        :param add: Combination of entries such as sum or max
+        :return: Factor without the variable
+        """
+        position = self.variables.index(variable)
+        cardinality = self.cardinalities[position]
+        stride = self.strides[position]
+        block = stride * cardinality
+        values = []
+        for start in range(0, len(self.values), block):
+            for offset in range(stride):
+                values.append(add([self.values[start + offset + i * stride] for i in
+                                   range(cardinality)]))
+        return Factor(self.variables[:position] + self.variables[position + 1:],
+                      self.cardinalities[:position] + self.cardinalities[position + 1:], values)
+
+    def reduce(self, assignment: Dict[str, int]) -> 'Factor':
+        """
+        Restrict factor to the given value indices of variables
+
+        :param assignment: Value index of variables to be fixed
+        :return: Factor over the variables which are not fixed
+        """
+        kept = [i for i, variable in enumerate(self.variables) if variable not in assignment]
+        fixed_index = sum(stride * assignment[variable] for variable, stride in
+                          zip(self.variables, self.strides) if variable in assignment)
+        strides = self.strides
+        values = [self.values[fixed_index + index] for index, in _indices(
+            [self.cardinalities[i] for i in kept], [strides[i] for i in kept])]
+        return Factor([self.variables[i] for i in kept], [self.cardinalities[i] for i in kept],
+                      values)
+
+    def value(self, assignment: Dict[str, int]) -> Any:
+        """ Entry of the given value indices of all variables """
+        return self.values[sum(stride * assignment[variable] for variable, stride in
+                               zip(self.variables, self.strides))]
+
+
+def _indices(cardinalities: Sequence[int], *strides: Sequence[int]) -> Iterator[Tuple[int, ...]]:
+    """
+    Flat index of each table for all assignments of the variables in row-major order, where indices
+    are advanced like an odometer so that each assignment costs amortized constant time
+
+    :param cardinalities: Number of values of each variable
+    :param strides: Stride of each variable in each table, zero if table does not have it
+    :return: Generator of index of each table
+    """
+    size = 1
+    for cardinality in cardinalities:
+        size *= cardinality
+    assignment = [0] * len(cardinalities)
+    indices = [0] * len(strides)
+    for _ in range(size):
+        yield tuple(indices)
+        for position in range(len(cardinalities) - 1, -1, -1):
+            assignment[position] += 1
+            for table, table_strides in enumerate(strides):
+                indices[table] += table_strides[position]
+            if assignment[position] < cardinalities[position]:
+                break
+            assignment[position] = 0
+            for table, table_strides in enumerate(strides):
+                indices[table] -= table_strides[position] * cardinalities[position]
+
+
+def elimination_order(factors: Iterable[Factor], variables: Iterable[str]) -> List[str]:
+    """
+    Greedy elimination order where the variable creating the smallest factor is eliminated first
+
+    :param factors: Factors to be combined
+    :param variables: Variables to be eliminated
+    :return: Order of variables
+    """
+    neighbours: Dict[str, Set[str]] = {}
+    cardinality_of: Dict[str, int] = {}
+    for factor in factors:
+        cardinality_of.update(zip(factor.variables, factor.cardinalities))
+        for variable in factor.variables:
+            neighbours.setdefault(variable, set()).update(factor.variables)
+
+    def cost(variable: str) -> int:
+        size = 1
+        for neighbour in neighbours[variable]:
+            size *= cardinality_of[neighbour]
+        return size
+
+    remaining = {variable for variable in variables if variable in neighbours}
+    order = []
+    while remaining:
+        variable = min(sorted(remaining), key=cost)
+        remaining.remove(variable)
+        order.append(variable)
+        # Eliminating the variable connects all of its neighbours
+        clique = neighbours.pop(variable) - {variable}
+        for neighbour in clique:
+            neighbours[neighbour].discard(variable)
+            neighbours[neighbour].update(clique)
+    return order
@@ -0,0 +1,211 @@
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from .linear_gaussian_network_node import LinearGaussian, LinearGaussianNetworkNode
+from ..exceptions.exceptions import InvalidQuery
+
+__all__ = ['CanonicalForm', 'GaussianComponent', 'GaussianPosterior', 'gaussian_inference']
+
+
+class CanonicalForm(object):
+    """
+    Gaussian potential in canonical form over continuous variables
+
+    .. math::
+         \\phi(x) = \\exp(-\\frac{1}{2} x^{T} K x + h^{T} x + g)
+
+    where product of potentials is sum of their parameters, so that the joint of linear Gaussian
+    nodes is built without inverting any matrix
+
+    :param variables: Continuous variables in the order of rows of K and h
+    :param K: Precision matrix
+    :param h: Potential vector
+    :param g: Log of the constant factor
+    """
+
+    def __init__(self, variables: Sequence[str], K: np.ndarray, h: np.ndarray, g: float):
+        self.variables = list(variables)
+        self.K = K
+        self.h = h
+        self.g = g
+
+    @staticmethod
+    def from_linear_gaussian(node_name: str, distribution: LinearGaussian) -> 'CanonicalForm':
+        """ Potential of the conditional density of the node given its continuous predecessors """
+        coefficients = np.array([1.0] + [-weight for weight in distribution.weights.values()])
+        return CanonicalForm(
+            variables=[node_name] + list(distribution.weights),
+            K=np.outer(coefficients, coefficients) / distribution.variance,
+            h=coefficients * distribution.intercept / distribution.variance,
+            g=-distribution.intercept ** 2 / (2 * distribution.variance) - 0.5 * math.log(
+                2 * math.pi * distribution.variance))
+
+    def _extended(self, variables: List[str]) -> 'CanonicalForm':
+        """ Same potential over the superset of variables """
+        indices = [variables.index(variable) for variable in self.variables]
+        K, h = np.zeros((len(variables), len(variables))), np.zeros(len(variables))
+        K[np.ix_(indices, indices)] = self.K
+        h[indices] = self.h
+        return CanonicalForm(variables, K, h, self.g)
+
+    def product(self, other: 'CanonicalForm') -> 'CanonicalForm':
+        variables = self.variables + [variable for variable in other.variables if
+                                      variable not in self.variables]
+        this, that = self._extended(variables), other._extended(variables)
+        return CanonicalForm(variables, this.K + that.K, this.h + that.h, this.g + that.g)
+
+    def _split(self, variables: Iterable[str]):
+        selected = set(variables)
+        kept = [index for index, variable in enumerate(self.variables) if variable not in selected]
+        dropped = [index for index, variable in enumerate(self.variables) if variable in selected]
+        return kept, dropped
+
+    def reduce(self, evidence: Dict[str, float]) -> 'CanonicalForm':
+        """ Potential of the other variables where the given ones are fixed to their values """
+        kept, dropped = self._split(evidence)
+        if not dropped:
+            return self
+        y = np.array([evidence[self.variables[index]] for index in dropped])
+        return CanonicalForm(variables=[self.variables[index] for index in kept],
+                             K=self.K[np.ix_(kept, kept)],
+                             h=self.h[kept] - self.K[np.ix_(kept, dropped)] @ y,
+                             g=self.g + self.h[dropped] @ y - 0.5 * y @ self.K[
+                                 np.ix_(dropped, dropped)] @ y)
+
+    def marginalize(self, variables: Iterable[str]) -> 'CanonicalForm':
+        """ Potential of the other variables where the given ones are integrated out """
+        kept, dropped = self._split(variables)
+        if not dropped:
+            return self
+        K_yy, K_xy = self.K[np.ix_(dropped, dropped)], self.K[np.ix_(kept, dropped)]
+        solved_K, solved_h = np.linalg.solve(K_yy, K_xy.T), np.linalg.solve(K_yy, self.h[dropped])
+        _, log_determinant = np.linalg.slogdet(K_yy)
+        return CanonicalForm(variables=[self.variables[index] for index in kept],
+                             K=self.K[np.ix_(kept, kept)] - K_xy @ solved_K,
+                             h=self.h[kept] - K_xy @ solved_h,
+                             g=self.g + 0.5 * (len(dropped) * math.log(2 * math.pi) -
+                                               log_determinant + self.h[dropped] @ solved_h))
+
+    @property
+    def log_normalizer(self) -> float:
+        """ Log of the integral of the potential over all of its variables """
+        return self.marginalize(self.variables).g
+
+    def moments(self):
+        """ Mean vector and covariance matrix of the normalized potential """
+        covariance = np.linalg.inv(self.K)
+        return covariance @ self.h, covariance
+
+
+@dataclass
+class GaussianComponent:
+    """
+    Posterior of continuous query variables for single combination of discrete variables
+
+    :param assignment: Values of the enumerated discrete variables
+    :param weight: Posterior probability of the assignment
+    """
+
+    assignment: Dict[str, str]
+    weight: float
+    mean: np.ndarray
+    covariance: np.ndarray
+
+
+@dataclass
+class GaussianPosterior:
+    """
+    Posterior of query variables as mixture of Gaussians over continuous query variables, with one
+    component for each combination of discrete variables which continuous ones depend on
+
+    :param variables: Continuous query variables in the order of means and covariances
+    :param components: Mixture components whose weights sum up to one
+    """
+
+    variables: List[str]
+    components: List[GaussianComponent]
+
+    @property
+    def mean(self) -> np.ndarray:
+        return sum(component.weight * component.mean for component in self.components)
+
+    @property
+    def covariance(self) -> np.ndarray:
+        """ Covariance of the mixture """
+        mean = self.mean
+        return sum(component.weight * (component.covariance + np.outer(
+            component.mean, component.mean)) for component in self.components) - np.outer(
+            mean, mean)
+
+    def probability(self, variable: str) -> Dict[str, float]:
+        """ Posterior distribution of discrete variable among the enumerated ones """
+        distribution = {}
+        for component in self.components:
+            value = component.assignment[variable]
+            distribution[value] = distribution.get(value, 0.0) + component.weight
+        return distribution
+
+    def density(self, **values: float) -> float:
+        """ Posterior density of the given values of all continuous query variables """
+        x = np.array([values[variable] for variable in self.variables])
+        density = 0.0
+        for component in self.components:
+            difference = x - component.mean
+            density += component.weight * math.exp(
+                -0.5 * difference @ np.linalg.solve(component.covariance, difference)) / math.sqrt(
+                np.linalg.det(2 * math.pi * component.covariance))
+        return density
+
+
+def gaussian_inference(nodes: Sequence[LinearGaussianNetworkNode], query: Sequence[str],
+                       evidence: Dict[str, float], assignments: Iterable[Dict[str, str]],
+                       probability_of: Callable[[Dict[str, str]], float]) -> GaussianPosterior:
+    """
+    Conditional Gaussian inference where the joint of continuous nodes is built in canonical form
+    for each assignment of discrete variables, reduced by continuous evidence and integrated over
+    the continuous variables out of query
+
+    .. note:: Weight of each component is the probability of its discrete assignment multiplied by
+              the density of continuous evidence given it, which is the normalizer of the reduced
+              potential
+
+    :param nodes: Continuous nodes needed by the query
+    :param query: Continuous query variables
+    :param evidence: Values of continuous evidence variables
+    :param assignments: Combinations of discrete variables to be enumerated, which includes values
+        of discrete evidence
+    :param probability_of: Joint probability of discrete assignment
+    :return: Posterior of the query variables
+    :raises InvalidQuery: If every discrete assignment has zero probability given the evidence
+    """
+    components = []
+    for assignment in assignments:
+        probability = probability_of(assignment)
+        if probability == 0:
+            continue
+        joint = CanonicalForm([], np.zeros((0, 0)), np.zeros(0), 0.0)
+        for node in nodes:
+            joint = joint.product(CanonicalForm.from_linear_gaussian(
+                node.node_name, node.distribution(**assignment)))
+        potential = joint.reduce(evidence).marginalize(
+            [variable for variable in joint.variables if variable not in query and
+             variable not in evidence])
+        potential = potential._extended(list(query))
+        mean, covariance = potential.moments() if query else (np.zeros(0), np.zeros((0, 0)))
+        # Weights are kept in log space until normalization so that densities do not underflow
+        components.append(GaussianComponent(
+            assignment=assignment, weight=math.log(probability) + potential.log_normalizer,
+            mean=mean, covariance=covariance))
+
+    if not components:
+        raise InvalidQuery('Discrete evidence of the query has zero probability.')
+    largest = max(component.weight for component in components)
+    for component in components:
+        component.weight = math.exp(component.weight - largest)
+    total = sum(component.weight for component in components)
+    for component in components:
+        component.weight /= total
+    return GaussianPosterior(variables=list(query), components=components)
@@ -0,0 +1,188 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+__all__ = ['DirectedGraph']
+
+
+class DirectedGraph(object):
+    """
+    Directed graph kept as adjacency arrays of integer node ids, which is the storage of the network
+    instead of dict of dicts of `networkx`
+
+    .. note:: Removed nodes leave empty slots behind which are compacted by `copy`, so that ids are
+              stable during the lifetime of a graph. Nodes and edges are iterated in insertion
+              order as in `networkx`.
+
+    .. note:: Topological order is computed once and kept until the graph is changed
+    """
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._names: List[Optional[str]] = []
+        self._successors: List[List[int]] = []
+        self._predecessors: List[List[int]] = []
+        self._edge_count = 0
+        self._topology: Optional[List[str]] = None
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.nodes)
+
+    @property
+    def nodes(self) -> List[str]:
+        return [name for name in self._names if name is not None]
+
+    @property
+    def edges(self) -> List[Tuple[str, str]]:
+        return [(name, self._names[successor]) for name, successors in
+                zip(self._names, self._successors) if name is not None for successor in successors]
+
+    @property
+    def edge_count(self) -> int:
+        return self._edge_count
+
+    def successors(self, node: str) -> List[str]:
+        return [self._names[successor] for successor in self._successors[self._index[node]]]
+
+    def predecessors(self, node: str) -> List[str]:
+        return [self._names[predecessor] for predecessor in
+                self._predecessors[self._index[node]]]
+
+    def copy(self) -> 'DirectedGraph':
+        """ Compact copy of the graph without slots of removed nodes """
+        graph = DirectedGraph()
+        ids = {}
+        for identifier, name in enumerate(self._names):
+            if name is not None:
+                ids[identifier] = len(graph._names)
+                graph._index[name] = len(graph._names)
+                graph._names.append(name)
+        graph._successors = [[ids[successor] for successor in successors] for identifier, successors
+                             in enumerate(self._successors) if identifier in ids]
+        graph._predecessors = [[ids[predecessor] for predecessor in predecessors] for
+                               identifier, predecessors in enumerate(self._predecessors) if
+                               identifier in ids]
+        graph._edge_count = self._edge_count
+        graph._topology = self._topology
+        return graph
+
+    def add_node(self, node: str):
+        if node not in self._index:
+            self._index[node] = len(self._names)
+            self._names.append(node)
+            self._successors.append([])
+            self._predecessors.append([])
+            self._topology = None
+
+    def add_edge(self, source: str, target: str):
+        """ Edge between the given nodes where missing nodes are added as well """
+        self.add_node(source)
+        self.add_node(target)
+        source_id, target_id = self._index[source], self._index[target]
+        if target_id not in self._successors[source_id]:
+            self._successors[source_id].append(target_id)
+            self._predecessors[target_id].append(source_id)
+            self._edge_count += 1
+            self._topology = None
+
+    def remove_edge(self, source: str, target: str):
+        source_id, target_id = self._index[source], self._index[target]
+        if target_id in self._successors[source_id]:
+            self._successors[source_id].remove(target_id)
+            self._predecessors[target_id].remove(source_id)
+            self._edge_count -= 1
+            self._topology = None
+
+    def remove_node(self, node: str):
+        """ Remove the node and its edges, where its slot stays empty until the graph is copied """
+        identifier = self._index.pop(node)
+        for successor in self._successors[identifier]:
+            self._predecessors[successor].remove(identifier)
+        for predecessor in self._predecessors[identifier]:
+            self._successors[predecessor].remove(identifier)
+        self._edge_count -= len(self._successors[identifier]) + len(
+            self._predecessors[identifier])
+        self._names[identifier] = None
+        self._successors[identifier], self._predecessors[identifier] = [], []
+        self._topology = None
+
+    def has_path(self, sources: Iterable[str], targets: Iterable[str]) -> bool:
+        """
+        Whether any of the targets is reachable from any of the sources by following edges
+
+        :param sources: Nodes where the search starts, the ones not in the graph are ignored
+        :param targets: Nodes searched for, the ones not in the graph are ignored
+        :return: Boolean flag whether a path exists
+        """
+        target_ids = {self._index[target] for target in targets if target in self._index}
+        stack = [self._index[source] for source in sources if source in self._index]
+        visited = set(stack)
+        while stack:
+            identifier = stack.pop()
+            if identifier in target_ids:
+                return True
+            for successor in self._successors[identifier]:
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append(successor)
+        return False
+
+    def is_connected(self, source: str, target: str, excluded: Iterable[str] = ()) -> bool:
+        """
+        Whether the nodes are connected when directions of edges are ignored
+
+        :param source: Node where the search starts
+        :param target: Node searched for
+        :param excluded: Nodes that the path cannot pass through
+        :return: Boolean flag whether an undirected path exists
+        """
+        blocked = {self._index[node] for node in excluded}
+        source_id, target_id = self._index[source], self._index[target]
+        queue, visited = deque([source_id]), {source_id} | blocked
+        while queue:
+            identifier = queue.popleft()
+            if identifier == target_id:
+                return True
+            for neighbour in self._successors[identifier] + self._predecessors[identifier]:
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    queue.append(neighbour)
+        return False
+
+    def topological_sort(self) -> List[str]:
+        """
+        Kahn's algorithm where nodes without remaining predecessors are kept in a stack, so that
+        the order is the same as of `networkx.topological_sort`
+
+        :return: Nodes where each one comes after its predecessors
+        """
+        if self._topology is None:
+            in_degrees = [len(predecessors) for predecessors in self._predecessors]
+            stack = [identifier for identifier, name in enumerate(self._names) if
+                     name is not None and in_degrees[identifier] == 0]
+            topology = []
+            while stack:
+                identifier = stack.pop()
+                for successor in self._successors[identifier]:
+                    in_degrees[successor] -= 1
+                    if in_degrees[successor] == 0:
+                        stack.append(successor)
+                topology.append(self._names[identifier])
+            self._topology = topology
+        return self._topology
+
+    def to_networkx(self) -> 'nx.DiGraph':
+        """ Export of the graph as `networkx.DiGraph` with the same order of nodes and edges """
+        import networkx as nx
+        graph = nx.DiGraph()
+        graph.add_nodes_from(self.nodes)
+        graph.add_edges_from(self.edges)
+        return graph
@@ -0,0 +1,101 @@
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, List
+
+__all__ = ['InferenceStats', 'register_inference_hook', 'unregister_inference_hook']
+
+
+@dataclass
+class InferenceStats:
+    """
+    Profile of single query where timings are in seconds
+
+    .. note:: Counters are accumulated over joint probability calculations of nominator and
+              denominator while variable counts keep the maximum of them
+
+    Fields listed below:
+        * parse_time            : Time spent in query parser
+        * planning_time         : Time spent in elimination of unnecessary variables and ordering
+        * inference_time        : Time spent in calculation of probabilities
+        * needed_variable_count : Number of query, evidence and hidden variables
+        * pruned_variable_count : Number of network variables not needed by the query
+        * hidden_variable_count : Number of variables summed out
+        * multiplications       : Number of probability multiplications
+        * additions             : Number of probability additions
+        * largest_factor        : Number of entries of the largest table materialized
+        * cache_hits            : Number of results served from cache
+        * cache_entries         : Largest number of entries filled in recursive conditioning
+                                  caches by single evaluation
+    """
+
+    query: str = None
+    engine: str = None
+    parse_time: float = 0.0
+    planning_time: float = 0.0
+    inference_time: float = 0.0
+    needed_variable_count: int = 0
+    pruned_variable_count: int = 0
+    hidden_variable_count: int = 0
+    multiplications: int = 0
+    additions: int = 0
+    largest_factor: int = 0
+    cache_hits: int = 0
+    cache_entries: int = 0
+
+    @property
+    def total_time(self) -> float:
+        return self.parse_time + self.planning_time + self.inference_time
+
+    @contextmanager
+    def timer(self, phase: str):
+        """
+        Accumulate elapsed time of the block into the given phase
+
+        :param phase: One of `parse`, `planning` and `inference`
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            field = f'{phase}_time'
+            setattr(self, field, getattr(self, field) + time.perf_counter() - start)
+
+
+# Registry of callables to be notified with statistics after each query
+_hooks: List[Callable[[InferenceStats], None]] = []
+
+
+def register_inference_hook(hook: Callable[[InferenceStats], None]) -> None:
+    """
+    Register hook to be called with `InferenceStats` of each query such as exporting them to a
+    metrics system. Registering a hook enables statistics collection for all queries.
+    """
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+
+def unregister_inference_hook(hook: Callable[[InferenceStats], None]) -> bool:
+    """
+    Remove previously registered hook
+
+    :return: Boolean flag whether the hook was registered
+    """
+    if hook in _hooks:
+        _hooks.remove(hook)
+        return True
+    return False
+
+
+def has_inference_hooks() -> bool:
+    return len(_hooks) > 0
+
+
+def notify_inference_hooks(stats: InferenceStats) -> None:
+    """ Call each hook where failing ones are logged without interrupting the query """
+    for hook in list(_hooks):
+        try:
+            hook(stats)
+        except Exception as e:
+            logging.error(f'Inference hook {hook!r} failed: {e!r}')
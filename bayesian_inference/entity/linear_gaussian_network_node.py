@@ -0,0 +1,96 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Union
+
+from .network_node import NetworkNode
+
+__all__ = ['LinearGaussian', 'LinearGaussianNetworkNode']
+
+
+@dataclass
+class LinearGaussian:
+    """
+    Distribution of continuous variable as linear function of its continuous predecessors with
+    Gaussian noise
+
+    .. math::
+         X = b + \\sum_{i} w_{i} u_{i} + \\epsilon, \\quad \\epsilon \\sim N(0, \\sigma^{2})
+    """
+
+    intercept: float
+    variance: float
+    weights: Dict[str, float] = field(default_factory=dict)
+
+
+class LinearGaussianNetworkNode(NetworkNode):
+    """
+    Bayesian network node of continuous variable whose distribution is linear Gaussian of its
+    continuous predecessors for each combination of its discrete predecessors, i.e. conditional
+    linear Gaussian
+
+    .. note:: Continuous variables have no random variables, so that predecessors with empty list
+              in `all_random_variables` are continuous and the others are discrete. Discrete nodes
+              are not expected to have continuous predecessors.
+
+    .. note:: Continuous variables are not answered by `P`, see `BayesianNetwork.gaussian`
+
+    :param distributions: Distribution for each combination of discrete predecessor values keyed
+        like probabilities, or single distribution if there is no discrete predecessor
+    :param all_random_variables: Random variables of predecessors and the node, all predecessors
+        are continuous if not given
+    """
+
+    def __init__(self, node_name: str, predecessors: List[str],
+                 distributions: Union[LinearGaussian, Dict[str, LinearGaussian]],
+                 all_random_variables: List[List[str]] = None):
+        if all_random_variables is None:
+            all_random_variables = [[] for _ in predecessors] + [[]]
+        super().__init__(node_name=node_name, random_variables=[], predecessors=predecessors,
+                         probabilities={}, all_random_variables=all_random_variables)
+        if isinstance(distributions, LinearGaussian):
+            distributions = {NetworkNode._probability_key(()): distributions}
+        self._distributions = dict(distributions)
+
+    def __repr__(self):
+        return 'LinearGaussianNetworkNode({!r}, {!r}, {!r}, {!r})'.format(
+            self.node_name, self.predecessors, self.distributions, self.all_random_variables)
+
+    def __str__(self):
+        """ Table representation of the distribution for each discrete predecessor combination """
+        from tabulate import tabulate
+        continuous = self.continuous_predecessors
+        headers = self.discrete_predecessors + ['Intercept'] + [f'w({predecessor})' for
+                                                                predecessor in continuous] + [
+                      'Variance']
+        rows = [key.strip('()').split(',')[:len(self.discrete_predecessors)] +
+                [distribution.intercept] + [distribution.weights.get(predecessor, 0.0) for
+                                            predecessor in continuous] + [distribution.variance]
+                for key, distribution in self.distributions.items()]
+        return tabulate(tabular_data=rows, headers=headers, tablefmt='github')
+
+    @property
+    def distributions(self) -> Dict[str, LinearGaussian]:
+        return self._distributions
+
+    @property
+    def discrete_predecessors(self) -> List[str]:
+        return [predecessor for predecessor, values in
+                zip(self.predecessors, self.all_random_variables) if values]
+
+    @property
+    def continuous_predecessors(self) -> List[str]:
+        return [predecessor for predecessor, values in
+                zip(self.predecessors, self.all_random_variables) if not values]
+
+    def distribution(self, **context) -> LinearGaussian:
+        """ Distribution of the node for the values of discrete predecessors in the context """
+        return self._distributions[NetworkNode._probability_key(
+            tuple(context[predecessor] for predecessor in self.discrete_predecessors))]
+
+    def probability(self, **context):
+        """ Probability density of the value of the node given values of its predecessors """
+        distribution = self.distribution(**context)
+        mean = distribution.intercept + sum(weight * context[predecessor] for predecessor, weight
+                                            in distribution.weights.items())
+        return math.exp(-(context[self.node_name] - mean) ** 2 / (2 * distribution.variance)) / \
+            math.sqrt(2 * math.pi * distribution.variance)
@@ -0,0 +1,194 @@
+from itertools import product
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .network_node import NetworkNode
+from .polytree import PolytreePropagation
+
+__all__ = ['loop_cutset', 'LoopCutsetConditioning']
+
+
+def loop_cutset(nodes: Dict[str, NetworkNode], variables: Iterable[str]) -> List[str]:
+    """
+    Greedy loop cutset of the subgraph induced by the given variables, i.e. variables such that
+    the subgraph becomes polytree when their outgoing edges are removed
+
+    .. note:: Variables which are connected to at most one other variable cannot be on a loop and
+              they are removed repeatedly. Then outgoing edges of the variable with at most one
+              parent and the most neighbours are removed, since conditioning on it breaks every
+              loop passing through it, and the search continues until nothing is left.
+
+    :param nodes: Network nodes by name
+    :param variables: Variables inducing the subgraph
+    :return: Variables of the cutset in the order they are selected
+    """
+    variables = set(variables)
+    parents = {variable: {p for p in nodes[variable].relevant_predecessors if
+                          p in variables and p != variable} for variable in variables}
+    children = {variable: set() for variable in variables}
+    for variable, variable_parents in parents.items():
+        for parent in variable_parents:
+            children[parent].add(variable)
+
+    def degree(variable: str) -> int:
+        return len(parents[variable]) + len(children[variable])
+
+    cutset = []
+    remaining = set(variables)
+    # Variables whose degree may have dropped to at most one
+    leaves = sorted(remaining)
+    while remaining:
+        while leaves:
+            leaf = leaves.pop()
+            if leaf not in remaining or degree(leaf) > 1:
+                continue
+            remaining.remove(leaf)
+            neighbours = parents.pop(leaf) | children.pop(leaf)
+            for neighbour in neighbours:
+                parents[neighbour].discard(leaf)
+                children[neighbour].discard(leaf)
+            leaves.extend(sorted(neighbours))
+        if not remaining:
+            break
+        candidates = [variable for variable in sorted(remaining) if children[variable]]
+        selected = max(candidates, key=lambda variable: (len(parents[variable]) <= 1,
+                                                         degree(variable)))
+        cutset.append(selected)
+        leaves.append(selected)
+        for child in children[selected]:
+            parents[child].discard(selected)
+            leaves.append(child)
+        children[selected] = set()
+    return cutset
+
+
+class LoopCutsetConditioning(object):
+    """
+    Cutset conditioning where each instantiation of loop cutset turns the subgraph into polytree
+    which is solved by message passing, and the joint probabilities of all instantiations are
+    summed up. Cost grows with the number of instantiations of the cutset instead of the number of
+    instantiations of all hidden variables.
+
+    .. note:: Conditioning on a cutset variable is applied by fixing it in the tables of its
+              children, so that it keeps its parents and its value is treated as evidence
+
+    :param nodes: Network nodes by name
+    :param variables: Variables of the subgraph where predecessors of each one should be included
+    """
+
+    def __init__(self, nodes: Dict[str, NetworkNode], variables: Iterable[str]):
+        self.nodes = nodes
+        self.variables = set(variables)
+        self.cutset = loop_cutset(nodes, self.variables)
+        self.multiplications = 0
+        self.additions = 0
+
+    @property
+    def instantiation_count(self) -> int:
+        """ Number of instantiations of the cutset without enumerating them """
+        count = 1
+        for variable in self.cutset:
+            count *= len(self.nodes[variable].random_variables)
+        return count
+
+    def instantiations(self) -> List[Dict[str, str]]:
+        return [dict(zip(self.cutset, values)) for values in
+                product(*[self.nodes[variable].random_variables for variable in self.cutset])]
+
+    @staticmethod
+    def conditioned_nodes(nodes: Dict[str, NetworkNode], variables: Iterable[str],
+                          instantiation: Dict[str, str]) -> Dict[str, NetworkNode]:
+        """ Nodes where children of the instantiated variables have them fixed in their tables """
+        variables = set(variables)
+        values_of = {variable: nodes[variable].random_variables for variable in variables}
+        conditioned = {}
+        for variable in variables:
+            node = nodes[variable]
+            fixed = {parent: values_of[parent].index(instantiation[parent]) for parent in
+                     node.relevant_predecessors if parent in instantiation and parent != variable}
+            if not fixed:
+                conditioned[variable] = node
+                continue
+            factor = node.table(values_of).reduce(fixed)
+            all_random_variables = [values_of[name] for name in factor.variables]
+            conditioned[variable] = NetworkNode(
+                node_name=variable, random_variables=node.random_variables,
+                predecessors=list(factor.variables[:-1]), all_random_variables=all_random_variables,
+                probabilities={NetworkNode._probability_key(combination): value for
+                               combination, value in zip(product(*all_random_variables),
+                                                         factor.values)})
+        return conditioned
+
+    @staticmethod
+    def joint_probabilities(nodes: Dict[str, NetworkNode], variables: Iterable[str],
+                            instantiation: Dict[str, str], contexts: List[Dict[str, str]]) \
+            -> Tuple[List[float], int, int]:
+        """
+        Joint probability of each context together with single instantiation of the cutset, zero
+        for contexts which contradict the instantiation
+
+        :param nodes: Network nodes by name
+        :param variables: Variables of the subgraph
+        :param instantiation: Values of cutset variables
+        :param contexts: Values of evidence and query variables
+        :return: Joint probability of each context and the instantiation, and the numbers of
+            multiplications and additions
+        """
+        propagation = PolytreePropagation(
+            nodes=LoopCutsetConditioning.conditioned_nodes(nodes, variables, instantiation),
+            variables=variables)
+        probabilities = []
+        for context in contexts:
+            if any(context.get(variable, value) != value for variable, value in
+                   instantiation.items()):
+                probabilities.append(0.0)
+                continue
+            propagation.propagate({**context, **instantiation})
+            probabilities.append(propagation.evidence_probability())
+        return probabilities, propagation.multiplications, propagation.additions
+
+    def estimate_cost(self) -> int:
+        """
+        Approximate number of arithmetic operations of single context, i.e. cost of polytree
+        propagation without the outgoing edges of the cutset for each instantiation
+        """
+        parents = {variable: [parent for parent in self.nodes[variable].relevant_predecessors if
+                              parent != variable and parent not in self.cutset] for
+                   variable in self.variables}
+        children = {variable: 0 for variable in self.variables}
+        for variable_parents in parents.values():
+            for parent in variable_parents:
+                children[parent] += 1
+        cost = 0
+        for variable in self.variables:
+            cardinality = len(self.nodes[variable].random_variables)
+            size = cardinality
+            for parent in parents[variable]:
+                size *= len(self.nodes[parent].random_variables)
+            cost += size * (len(parents[variable]) + 1) + cardinality * (
+                    len(parents[variable]) + children[variable])
+        return self.instantiation_count * cost
+
+    def probabilities(self, contexts: List[Dict[str, str]],
+                      submit: Optional[Callable] = None) -> List[float]:
+        """
+        Joint probability of each context summed over all instantiations of the cutset
+
+        :param contexts: Values of evidence and query variables
+        :param submit: Submission of `joint_probabilities` of single instantiation to executor such
+            as process pool whose workers have the same nodes, which is called with the variables,
+            the instantiation and the contexts, and returns future. Instantiations are solved in
+            this process if not given.
+        :return: Joint probability of each context
+        """
+        instantiations = self.instantiations()
+        if submit is None:
+            results = [self.joint_probabilities(self.nodes, self.variables, instantiation,
+                                                contexts) for instantiation in instantiations]
+        else:
+            futures = [submit(self.variables, instantiation, contexts) for instantiation in
+                       instantiations]
+            results = [future.result() for future in futures]
+        for _, multiplications, additions in results:
+            self.multiplications += multiplications
+            self.additions += additions
+        return [sum(probabilities) for probabilities in zip(*[result[0] for result in results])]
@@ -1,7 +1,7 @@
 import itertools
-from typing import List, Dict, Tuple
+from typing import Any, Callable, List, Dict, Tuple
 
-from tabulate import tabulate
+from .factor import Factor
 
 __all__ = ['NetworkNode']
 
@@ -12,6 +12,9 @@ class NetworkNode(object):
     in it
     """
 
+    # Suffix of auxiliary variables of `factors`, whose names are reserved in the network
+    AUXILIARY_SUFFIX = "'"
+
     def __init__(self, node_name: str, random_variables: List[str], predecessors: List[str],
                  probabilities: Dict[str, float], all_random_variables: List[List[str]]):
         self._node_name = node_name
@@ -44,6 +47,8 @@ class NetworkNode(object):
         rows = [
             list(group[0][:-1]) + [self.probabilities[NetworkNode._probability_key(key)] for key in
                                    group] for group in grouped_combinations]
+        # Loaded on first use since it is only needed for printing
+        from tabulate import tabulate
         return tabulate(tabular_data=rows, headers=headers, tablefmt='github')
 
     def __hash__(self):
@@ -62,6 +67,11 @@ class NetworkNode(object):
     def predecessors(self):
         return self._predecessors
 
+    @property
+    def relevant_predecessors(self) -> List[str]:
+        """ Predecessors which probabilities of the node depend on """
+        return self.predecessors
+
     @property
     def probabilities(self):
         return self._probabilities
@@ -70,6 +80,54 @@ class NetworkNode(object):
     def all_random_variables(self):
         return self._all_random_variables
 
+    def _expand_probabilities(self) -> Dict[str, float]:
+        """ Full probability table from `probability` of each combination """
+        names = self.predecessors + [self.node_name]
+        return {NetworkNode._probability_key(combination): self.probability(
+            **dict(zip(names, combination))) for combination in
+            itertools.product(*self.all_random_variables)}
+
+    @property
+    def auxiliary_names(self) -> List[str]:
+        """ Names of auxiliary variables which `factors` may introduce """
+        return []
+
+    def table_size(self, values_of: Dict[str, List[str]]) -> int:
+        """ Number of entries of the full table over relevant predecessors and the node """
+        size = len(self.random_variables)
+        for predecessor in self.relevant_predecessors:
+            if predecessor != self.node_name:
+                size *= len(values_of[predecessor])
+        return size
+
+    def factor_size(self, values_of: Dict[str, List[str]]) -> int:
+        """ Total number of entries of `factors` without building them """
+        return self.table_size(values_of)
+
+    def table(self, values_of: Dict[str, List[str]],
+              transform: Callable[[float], Any] = float) -> Factor:
+        """
+        Full table of the node over its relevant predecessors and itself as single factor, to be
+        used where factors are combined by other than sum-product
+
+        :param values_of: Values of each variable of the network
+        :param transform: Mapping applied to each probability
+        :return: Factor of the node
+        """
+        return Factor.from_node(self, values_of, transform=transform)
+
+    def factors(self, values_of: Dict[str, List[str]],
+                transform: Callable[[float], Any] = float) -> List[Factor]:
+        """
+        Factors whose product is the conditional probability table of the node, to be used in
+        sum-product elimination where auxiliary variables of factors are summed out
+
+        :param values_of: Values of each variable of the network
+        :param transform: Mapping applied to each entry
+        :return: Factors of the node
+        """
+        return [self.table(values_of, transform=transform)]
+
     def probability(self, **context):
         values: List[str] = [context[p] for p in self.predecessors] + [context[self.node_name]]
         return self._probabilities[NetworkNode._probability_key(tuple(values))]
@@ -0,0 +1,210 @@
+from typing import Any, Callable, Dict, List
+
+from .factor import Factor
+from .network_node import NetworkNode
+
+__all__ = ['NoisyMaxNetworkNode']
+
+
+class NoisyMaxNetworkNode(NetworkNode):
+    """
+    Bayesian network node of noisy-MAX causal model where each predecessor value alone causes a
+    distribution of the node, and the node takes the maximum of the causes including the leak
+
+    .. math::
+         P(X \\leq x | u) = F_{L}(x) \\prod_{i} F_{i}(x | u_{i})
+
+    where F is cumulative distribution of the leak and of each predecessor value, so that number of
+    parameters is linear in number of predecessors
+
+    .. note:: Random variables are ordered from the absent state to the most severe one, and
+              predecessor values without parameters do not cause anything
+
+    .. note:: Noisy-OR is the special case of binary node, see `noisy_or`
+
+    .. note:: Sum-product inference uses the additive factorization of `factors`, while
+              max-product inference needs the full `table` whose size is exponential in number of
+              predecessors
+
+    :param parameters: Distribution of the node caused by each predecessor value alone
+    :param leak: Distribution of the node when no predecessor causes anything
+    """
+
+    def __init__(self, node_name: str, random_variables: List[str], predecessors: List[str],
+                 parameters: Dict[str, Dict[str, Dict[str, float]]], leak: Dict[str, float],
+                 all_random_variables: List[List[str]]):
+        super().__init__(node_name=node_name, random_variables=random_variables,
+                         predecessors=predecessors, probabilities=None,
+                         all_random_variables=all_random_variables)
+        self._parameters = {predecessor: {value: dict(distribution) for value, distribution in
+                                          values.items()} for predecessor, values in
+                            parameters.items()}
+        self._leak = dict(leak)
+        self._cumulative_leak = self._cumulative(self._leak)
+        self._cumulative_parameters = {
+            predecessor: {value: self._cumulative(distribution) for value, distribution in
+                          values.items()} for predecessor, values in self._parameters.items()}
+
+    @staticmethod
+    def noisy_or(node_name: str, random_variables: List[str], predecessors: List[str],
+                 probabilities: Dict[str, Dict[str, float]], leak: float,
+                 all_random_variables: List[List[str]]) -> 'NoisyMaxNetworkNode':
+        """
+        Noisy-OR node with single probability for each causing predecessor value
+
+        :param random_variables: Absent and present states of the node in order
+        :param probabilities: Probability of presence caused by each predecessor value alone
+        :param leak: Probability of presence when no predecessor causes it
+        :return: Noisy-MAX node of two states
+        """
+        absent, present = random_variables
+        parameters = {predecessor: {value: {absent: 1 - p, present: p} for value, p in
+                                    values.items()} for predecessor, values in
+                      probabilities.items()}
+        return NoisyMaxNetworkNode(node_name=node_name, random_variables=random_variables,
+                                   predecessors=predecessors, parameters=parameters,
+                                   leak={absent: 1 - leak, present: leak},
+                                   all_random_variables=all_random_variables)
+
+    def __repr__(self):
+        return 'NoisyMaxNetworkNode({!r}, {!r}, {!r}, {!r}, {!r}, {!r})'.format(
+            self.node_name, self.random_variables, self.predecessors, self.parameters, self.leak,
+            self.all_random_variables)
+
+    def __str__(self):
+        """ Table representation of the distribution caused by each predecessor value """
+        headers = ['Cause', 'Value'] + [f'P({self.node_name}={variable})' for variable in
+                                        self.random_variables]
+        rows = [[predecessor, value] + [distribution[variable] for variable in
+                                        self.random_variables] for predecessor, values in
+                self.parameters.items() for value, distribution in values.items()]
+        rows.append(['Leak', '*'] + [self.leak[variable] for variable in self.random_variables])
+        from tabulate import tabulate
+        return tabulate(tabular_data=rows, headers=headers, tablefmt='github')
+
+    def _cumulative(self, distribution: Dict[str, float]) -> List[float]:
+        cumulative, total = [], 0.0
+        for variable in self.random_variables:
+            total += distribution[variable]
+            cumulative.append(total)
+        return cumulative
+
+    @property
+    def parameters(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return self._parameters
+
+    @property
+    def leak(self) -> Dict[str, float]:
+        return self._leak
+
+    @property
+    def auxiliary_name(self) -> str:
+        return self.node_name + self.AUXILIARY_SUFFIX
+
+    @property
+    def auxiliary_names(self) -> List[str]:
+        return [self.auxiliary_name]
+
+    @property
+    def relevant_predecessors(self) -> List[str]:
+        """ Predecessors with any causing value """
+        return [predecessor for predecessor in self.predecessors if self._parameters.get(
+            predecessor)]
+
+    @property
+    def probabilities(self) -> Dict[str, float]:
+        """ Full probability table which is exponential in number of predecessors """
+        if self._probabilities is None:
+            self._probabilities = self._expand_probabilities()
+        return self._probabilities
+
+    def _cumulative_probability(self, index: int, context: Dict[str, str]) -> float:
+        """ P(X <= x) of the value with the given index """
+        if index < 0:
+            return 0.0
+        probability = self._cumulative_leak[index]
+        for predecessor, values in self._cumulative_parameters.items():
+            cumulative = values.get(context[predecessor])
+            if cumulative is not None:
+                probability *= cumulative[index]
+        return probability
+
+    def probability(self, **context):
+        index = self.random_variables.index(context[self.node_name])
+        return self._cumulative_probability(index, context) - self._cumulative_probability(
+            index - 1, context)
+
+    def _additive_size(self, values_of: Dict[str, List[str]]) -> int:
+        """ Number of entries of the additive factorization """
+        cardinality = len(self.random_variables)
+        return cardinality * (cardinality + 1 + sum(len(values_of[predecessor]) for predecessor in
+                                                    self.relevant_predecessors))
+
+    def factor_size(self, values_of: Dict[str, List[str]]) -> int:
+        return min(self.table_size(values_of), self._additive_size(values_of))
+
+    def table(self, values_of: Dict[str, List[str]],
+              transform: Callable[[float], Any] = float) -> Factor:
+        """
+        Full table where cumulative probabilities are extended by one predecessor at a time, so
+        that each entry takes single multiplication instead of one for each predecessor. Size is
+        still exponential in number of predecessors.
+
+        :param values_of: Values of each variable of the network
+        :param transform: Mapping applied to each probability
+        :return: Factor of the node
+        """
+        predecessors = self.relevant_predecessors
+        cardinality = len(self.random_variables)
+        # P(X <= x | u) of each value for each combination of predecessors in row-major order
+        columns = [[probability] for probability in self._cumulative_leak]
+        for predecessor in predecessors:
+            cumulative = self._cumulative_parameters[predecessor]
+            causes = [cumulative.get(value, [1.0] * cardinality) for value in
+                      values_of[predecessor]]
+            columns = [[a * cause[index] for a in column for cause in causes] for index, column in
+                       enumerate(columns)]
+        columns = [columns[0]] + [[b - a for a, b in zip(previous, column)] for previous, column in
+                                  zip(columns, columns[1:])]
+        return Factor(predecessors + [self.node_name],
+                      [len(values_of[predecessor]) for predecessor in predecessors] + [cardinality],
+                      [transform(probability) for row in zip(*columns) for probability in row])
+
+    def factors(self, values_of: Dict[str, List[str]],
+                transform: Callable[[float], Any] = float) -> List[Factor]:
+        """
+        Additive factorization where auxiliary variable X' is introduced so that
+
+        .. math::
+             P(x | u) = \\sum_{x'} \\Delta(x, x') F_{L}(x') \\prod_{i} F_{i}(x' | u_{i})
+
+        where Delta is 1 if x' = x, -1 if x' is the previous value of x and 0 otherwise. Size of
+        the factors is linear in number of predecessors instead of exponential. Full table is
+        returned instead if it is smaller.
+
+        .. note:: Entries of Delta are negative, so that the factors are only valid in sum-product
+                  elimination where the auxiliary variable is summed out
+
+        :param values_of: Values of each variable of the network
+        :param transform: Mapping applied to each entry
+        :return: Factors of the node
+        """
+        if self._additive_size(values_of) >= self.table_size(values_of):
+            return super().factors(values_of, transform=transform)
+        auxiliary = self.auxiliary_name
+        cardinality = len(self.random_variables)
+        delta = [1.0 if x == y else -1.0 if x == y + 1 else 0.0 for x in range(cardinality) for
+                 y in range(cardinality)]
+        factors = [Factor([self.node_name, auxiliary], [cardinality, cardinality],
+                          [transform(value) for value in delta]),
+                   Factor([auxiliary], [cardinality],
+                          [transform(value) for value in self._cumulative_leak])]
+        for predecessor in self.relevant_predecessors:
+            cumulative = self._cumulative_parameters[predecessor]
+            ones = [1.0] * cardinality
+            factors.append(Factor([predecessor, auxiliary],
+                                  [len(values_of[predecessor]), cardinality],
+                                  [transform(value) for predecessor_value in
+                                   values_of[predecessor] for value in
+                                   cumulative.get(predecessor_value, ones)]))
+        return factors
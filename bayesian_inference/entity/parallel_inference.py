@@ -0,0 +1,192 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+from typing import Dict, Iterable, List, Tuple, Union
+
+from .bayesian_network import BayesianNetwork, ProbabilityFactor
+from .loop_cutset import LoopCutsetConditioning
+from .network_node import NetworkNode
+from ..exceptions.exceptions import InvalidQuery
+from ..probability.probability import QueryVariable
+
+__all__ = ['ParallelInference']
+
+# Network rebuilt from the snapshot in each worker process
+_worker_network: BayesianNetwork = None
+
+
+def _initialize_worker(nodes: List[NetworkNode]) -> None:
+    """ Build network of the worker once from the snapshot sent at startup """
+    global _worker_network
+    # Debug logging of each factor would dominate the time of workers
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_network = BayesianNetwork(initial_network=nodes)
+
+
+def _partial_sum(calculation_order: Tuple[ProbabilityFactor, ...], context: Dict[str, str]) \
+        -> float:
+    """ Enumeration of single partition in worker """
+    return _worker_network._probability_inference(calculation_order, **context)
+
+
+def _conditioned_sum(variables: Iterable[str], instantiation: Dict[str, str],
+                     contexts: List[Dict[str, str]]) -> Tuple[List[float], int, int]:
+    """ Message passing of single cutset instantiation in worker """
+    return LoopCutsetConditioning.joint_probabilities(_worker_network.nodes, variables,
+                                                      instantiation, contexts)
+
+
+class ParallelInference(object):
+    """
+    Exact inference where enumeration is split across process pool by conditioning on the values of
+    the first hidden variables in calculation order, and partial sums are combined in the parent.
+    With loop cutset engine, instantiations of the cutset are distributed instead.
+
+    .. note:: Workers receive network nodes once at startup. If the network changes, the pool is
+              restarted with the new snapshot on the next query.
+
+    :param network: Network to be queried
+    :param processes: Number of worker processes, number of CPUs if not given
+    :param tasks_per_process: Number of partitions aimed for each process to balance the load
+    """
+
+    def __init__(self, network: BayesianNetwork, processes: int = None,
+                 tasks_per_process: int = 4):
+        self.network = network
+        self.processes = processes or os.cpu_count() or 1
+        self.tasks_per_process = tasks_per_process
+        self._executor: ProcessPoolExecutor = None
+        self._version: int = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        return self._executor_of(self.network.pinned())
+
+    def _executor_of(self, network: BayesianNetwork) -> ProcessPoolExecutor:
+        """ Pool whose workers have the same version of the given network """
+        if self._executor is None or self._version != network.version:
+            self.close()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes, initializer=_initialize_worker,
+                initargs=(list(network.nodes.values()),))
+            self._version = network.version
+        return self._executor
+
+    def P(self, query: str, engine: str = None) -> Union[float, Dict[str, float]]:
+        """
+        Parallel counterpart of `BayesianNetwork.P` with enumeration
+
+        :param query: Query that will be evaluated with the network context
+        :param engine: `BayesianNetwork.LOOP_CUTSET_ENGINE` to distribute cutset instantiations,
+            enumeration is distributed if not given
+        :return: Exact inference probability of the query in the network
+        :raises InvalidQuery: If query is not valid, has continuous variable or engine is unknown
+        """
+        if engine not in (None, BayesianNetwork.ENUMERATION_ENGINE,
+                          BayesianNetwork.LOOP_CUTSET_ENGINE):
+            raise InvalidQuery(f'Inference engine {engine} cannot be run in parallel!')
+        network = self.network.pinned()
+        # Validated the same way as the sequential query before it is partitioned
+        queries, evidences = network._parse_query(query)
+        if engine == BayesianNetwork.LOOP_CUTSET_ENGINE:
+            submit = partial(self._executor_of(network).submit, _conditioned_sum)
+            nominator_context, denominator = [network._calculate_joint_probability(
+                variables, engine=engine, submit=submit) for variables in
+                [queries + evidences, evidences]]
+            if type(nominator_context) != float:
+                nominator_context = nominator_context.to_dict()
+        else:
+            nominator_context = self._calculate_joint_probability(network, queries + evidences)
+            denominator = self._calculate_joint_probability(network, evidences)
+        if type(nominator_context) == float:
+            return nominator_context / denominator
+        else:
+            return {context: value / denominator for context, value in
+                    nominator_context.items()}
+
+    @staticmethod
+    def _partitions(network: BayesianNetwork, order: List[ProbabilityFactor], task_count: int) \
+            -> List[Tuple[ProbabilityFactor, ...]]:
+        """
+        Split calculation order by fixing values of the first hidden variables until the number of
+        partitions reaches the given task count
+
+        :param network: Pinned network of the query
+        :param order: Calculation order of the joint probability
+        :param task_count: Number of partitions to aim
+        :return: Calculation orders where the sum of their probabilities is the probability of the
+            given order
+        """
+        split_positions, partition_count = [], 1
+        for position, factor in enumerate(order):
+            if partition_count >= task_count:
+                break
+            if factor.sum_out:
+                split_positions.append(position)
+                partition_count *= len(network.nodes[factor.name].random_variables)
+
+        partitions = []
+        values = [network.nodes[order[position].name].random_variables for position in
+                  split_positions]
+        for combination in product(*values):
+            partition = list(order)
+            for position, value in zip(split_positions, combination):
+                partition[position] = ProbabilityFactor(name=order[position].name, value=value)
+            partitions.append(tuple(partition))
+        return partitions
+
+    def _calculate_joint_probability(self, network: BayesianNetwork,
+                                     variables: List[QueryVariable]) \
+            -> Union[float, Dict[str, float]]:
+        """
+        Joint probability of the given variables where planning is done in parent and partitions of
+        each query variable combination are calculated in workers
+
+        :param network: Pinned network of the query
+        :param variables: Variables composed from query and evidence variables
+        :return: Single float if no query variable exist, otherwise dictionary with keys query
+            variable contexts
+        """
+        needed_variable_names = {v.name: v for v in variables}
+        purified_variables = network._eliminate_unnecessary_variables(
+            variables=needed_variable_names.keys())
+        hidden_variables = {v for v in purified_variables if v not in needed_variable_names}
+        order = network._decide_calculation_order(
+            needed_variable_names=needed_variable_names, purified_variables=purified_variables,
+            hidden_variables=hidden_variables)
+
+        query_variable_names = [variable.name for variable in variables if variable.value is None]
+        query_variable_values = [network.nodes[name].random_variables for name in
+                                 query_variable_names]
+        contexts = [dict(zip(query_variable_names, combination)) for combination in
+                    product(*query_variable_values)]
+
+        # Nothing to be summed out, so that it is not worth to send to workers
+        if not hidden_variables:
+            probabilities = [network._probability_inference(tuple(order), **context) for
+                             context in contexts]
+        else:
+            partitions = self._partitions(network, order, task_count=max(
+                1, self.processes * self.tasks_per_process // len(contexts)))
+            executor = self._executor_of(network)
+            futures = [[executor.submit(_partial_sum, partition, context) for partition in
+                        partitions] for context in contexts]
+            probabilities = [sum(future.result() for future in context_futures) for
+                             context_futures in futures]
+
+        if query_variable_names:
+            return {str(context): p for context, p in zip(contexts, probabilities)}
+        return probabilities[0]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,265 @@
+from collections import deque
+from functools import reduce
+from itertools import product
+from typing import Dict, Iterable, List, Set
+
+from .factor import Factor, elimination_order
+from .network_node import NetworkNode
+
+__all__ = ['is_polytree', 'PolytreePropagation']
+
+
+def is_polytree(nodes: Dict[str, NetworkNode], variables: Iterable[str]) -> bool:
+    """
+    Check whether the subgraph induced by the given variables is singly connected i.e. there is at
+    most one undirected path between any two variables
+
+    .. note:: Union-find is applied over edges where an edge between already connected variables
+              means an undirected cycle
+
+    :param nodes: Network nodes by name
+    :param variables: Variables inducing the subgraph
+    :return: Boolean flag whether the subgraph is polytree
+    """
+    variables = set(variables)
+    roots = {variable: variable for variable in variables}
+
+    def find(variable: str) -> str:
+        while roots[variable] != variable:
+            roots[variable] = roots[roots[variable]]
+            variable = roots[variable]
+        return variable
+
+    for variable in variables:
+        for predecessor in nodes[variable].relevant_predecessors:
+            if predecessor not in variables or predecessor == variable:
+                continue
+            root_of_variable, root_of_predecessor = find(variable), find(predecessor)
+            if root_of_variable == root_of_predecessor:
+                return False
+            roots[root_of_variable] = root_of_predecessor
+    return True
+
+
+class PolytreePropagation(object):
+    """
+    Pearl's lambda/pi message passing on polytree where beliefs are kept unnormalized so that
+    belief of a variable is its joint probability with the evidence
+
+    Messages are defined as:
+        * pi(x)           : sum_u P(x | u) prod_i pi_x(u_i)
+        * lambda(x)       : e(x) prod_j lambda_yj(x)
+        * pi_yj(x)        : e(x) pi(x) prod_{k != j} lambda_yk(x) where it is sent to child y_j
+        * lambda_x(u_i)   : sum_x lambda(x) sum_{u_k, k != i} P(x | u) prod_{k != i} pi_x(u_k)
+          where it is sent to parent u_i
+
+    .. note:: Messages are scheduled by rooting each connected component where leaves send their
+              messages towards root first and root sends them back, so that each message is
+              calculated exactly once and the cost is linear in the total size of probability tables
+
+    .. note:: Nodes whose `factors` are smaller than their tables, such as rule based ones, send
+              their messages by eliminating the factors together with the incoming messages
+              instead of iterating over parent combinations
+
+    :param nodes: Network nodes by name
+    :param variables: Variables of the polytree where predecessors of each one should be included
+    """
+
+    def __init__(self, nodes: Dict[str, NetworkNode], variables: Iterable[str]):
+        self.nodes = nodes
+        self.variables: Set[str] = set(variables)
+        self.parents: Dict[str, List[str]] = {
+            variable: [p for p in nodes[variable].relevant_predecessors if p != variable] for
+            variable in self.variables}
+        self.values_of: Dict[str, List[str]] = {variable: nodes[variable].random_variables for
+                                                variable in self.variables}
+        self.factored: Set[str] = {
+            variable for variable in self.variables if nodes[variable].factor_size(
+                self.values_of) < nodes[variable].table_size(self.values_of)}
+        self.children: Dict[str, List[str]] = {variable: [] for variable in self.variables}
+        for variable, parents in self.parents.items():
+            for parent in parents:
+                self.children[parent].append(variable)
+
+        self.evidence: Dict[str, str] = {}
+        self._component_roots: List[str] = []
+        self.pi_messages: Dict[tuple, List[float]] = {}
+        self.lambda_messages: Dict[tuple, List[float]] = {}
+        self.multiplications = 0
+        self.additions = 0
+
+    @property
+    def largest_factor(self) -> int:
+        """ Number of entries of the largest probability table, or factors if they are smaller """
+        return max((self._factor_size(variable) for variable in self.variables), default=0)
+
+    def estimate_cost(self) -> int:
+        """ Approximate number of arithmetic operations of single propagation """
+        return sum(self._factor_size(variable) * (len(self.parents[variable]) + 1) +
+                   len(self.nodes[variable].random_variables) * (
+                           len(self.parents[variable]) + len(self.children[variable]))
+                   for variable in self.variables)
+
+    def _factor_size(self, variable: str) -> int:
+        return self.nodes[variable].factor_size(self.values_of)
+
+    def _values(self, variable: str) -> List[str]:
+        return self.nodes[variable].random_variables
+
+    def _indicator(self, variable: str) -> List[float]:
+        if variable not in self.evidence:
+            return [1.0] * len(self._values(variable))
+        return [1.0 if value == self.evidence[variable] else 0.0 for value in
+                self._values(variable)]
+
+    def _family(self, variable: str, excluded_parent: str = None):
+        """
+        Iterate over parent combinations and values of the variable together with conditional
+        probability and product of incoming pi messages of parents other than the excluded one
+
+        :return: Generator of (parent values, value index, probability, pi product)
+        """
+        node = self.nodes[variable]
+        parents = self.parents[variable]
+        parent_values = [list(enumerate(self._values(parent))) for parent in parents]
+        for combination in product(*parent_values):
+            context = {parent: value for parent, (_, value) in zip(parents, combination)}
+            weight = 1.0
+            for parent, (index, _) in zip(parents, combination):
+                if parent != excluded_parent:
+                    weight *= self.pi_messages[(parent, variable)][index]
+                    self.multiplications += 1
+            for index, value in enumerate(self._values(variable)):
+                context[variable] = value
+                yield combination, index, node.probability(**context), weight
+
+    def _eliminate_family(self, variable: str, kept: str, excluded_parent: str = None,
+                          lambda_: List[float] = None) -> List[float]:
+        """
+        Sum out everything but the kept variable from the factors of the variable, incoming pi
+        messages of parents other than the excluded one and the given lambda of the variable
+
+        :return: Values of the result over the kept variable
+        """
+        factors = self.nodes[variable].factors(self.values_of)
+        factors += [Factor([parent], [len(self._values(parent))],
+                           self.pi_messages[(parent, variable)]) for parent in
+                    self.parents[variable] if parent != excluded_parent]
+        if lambda_ is not None:
+            factors.append(Factor([variable], [len(lambda_)], lambda_))
+        eliminated = {name for factor in factors for name in factor.variables} - {kept}
+        for name in elimination_order(factors, eliminated):
+            related = [factor for factor in factors if name in factor.variables]
+            factors = [factor for factor in factors if name not in factor.variables]
+            combined = reduce(lambda a, b: a.product(b), related)
+            factors.append(combined.marginalize(name))
+            self.multiplications += len(combined) * (len(related) - 1)
+            self.additions += len(combined) - len(factors[-1])
+
+        # Remaining factors are either over the kept variable or constants
+        message = [1.0] * len(self._values(kept))
+        for factor in factors:
+            values = factor.values if factor.variables else factor.values * len(message)
+            message = [a * b for a, b in zip(message, values)]
+            self.multiplications += len(message)
+        return message
+
+    def pi(self, variable: str) -> List[float]:
+        """ Causal support of the variable from all of its parents """
+        if variable in self.factored:
+            return self._eliminate_family(variable, kept=variable)
+        pi = [0.0] * len(self._values(variable))
+        for _, index, probability, weight in self._family(variable):
+            pi[index] += probability * weight
+            self.multiplications += 1
+            self.additions += 1
+        return pi
+
+    def lambda_(self, variable: str, excluded_child: str = None) -> List[float]:
+        """ Diagnostic support of the variable from evidence and children except excluded one """
+        lambda_ = self._indicator(variable)
+        for child in self.children[variable]:
+            if child != excluded_child:
+                message = self.lambda_messages[(child, variable)]
+                lambda_ = [a * b for a, b in zip(lambda_, message)]
+                self.multiplications += len(lambda_)
+        return lambda_
+
+    def _send(self, source: str, target: str) -> None:
+        """ Calculate message from source to its neighbour target """
+        if target in self.children[source]:
+            pi = self.pi(source)
+            lambda_ = self.lambda_(source, excluded_child=target)
+            self.pi_messages[(source, target)] = [a * b for a, b in zip(pi, lambda_)]
+            self.multiplications += len(pi)
+        else:
+            lambda_ = self.lambda_(source)
+            if source in self.factored:
+                self.lambda_messages[(source, target)] = self._eliminate_family(
+                    source, kept=target, excluded_parent=target, lambda_=lambda_)
+                return
+            parent_index = self.parents[source].index(target)
+            message = [0.0] * len(self._values(target))
+            for combination, index, probability, weight in self._family(
+                    source, excluded_parent=target):
+                message[combination[parent_index][0]] += lambda_[index] * probability * weight
+                self.multiplications += 2
+                self.additions += 1
+            self.lambda_messages[(source, target)] = message
+
+    def _neighbours(self, variable: str) -> List[str]:
+        return self.parents[variable] + self.children[variable]
+
+    def propagate(self, evidence: Dict[str, str]) -> None:
+        """
+        Calculate all the messages for the given evidence
+
+        :param evidence: Observed values of variables
+        """
+        self.evidence = {name: value for name, value in evidence.items() if name in self.variables}
+        self.pi_messages.clear()
+        self.lambda_messages.clear()
+        self._component_roots.clear()
+
+        visited = set()
+        for root in sorted(self.variables):
+            if root in visited:
+                continue
+            self._component_roots.append(root)
+            # Breadth-first order of the component and the neighbour towards root of each variable
+            order, towards_root = [], {root: None}
+            queue = deque([root])
+            visited.add(root)
+            while queue:
+                variable = queue.popleft()
+                order.append(variable)
+                for neighbour in self._neighbours(variable):
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        towards_root[neighbour] = variable
+                        queue.append(neighbour)
+
+            # Collect evidence towards root, then distribute it back
+            for variable in reversed(order[1:]):
+                self._send(variable, towards_root[variable])
+            for variable in order:
+                for neighbour in self._neighbours(variable):
+                    if towards_root.get(neighbour) == variable:
+                        self._send(variable, neighbour)
+
+    def belief(self, variable: str) -> Dict[str, float]:
+        """
+        Unnormalized belief of the variable which is its joint probability with the evidence
+
+        :param variable: Variable of the polytree
+        :return: Joint probability of each value of the variable and evidence
+        """
+        values = [a * b for a, b in zip(self.pi(variable), self.lambda_(variable))]
+        return dict(zip(self._values(variable), values))
+
+    def evidence_probability(self) -> float:
+        """ Probability of the evidence as product of the ones of each connected component """
+        probability = 1.0
+        for root in self._component_roots:
+            probability *= sum(self.belief(root).values())
+        return probability
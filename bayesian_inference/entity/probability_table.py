@@ -0,0 +1,98 @@
+from collections.abc import Mapping
+from itertools import product
+from typing import Dict, Iterator, List, Sequence, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+__all__ = ['ProbabilityTable']
+
+
+class ProbabilityTable(Mapping):
+    """
+    Probabilities of each combination of query variable values backed by an array whose axes are
+    the variables and whose indices along each axis are the values of that variable in order.
+    As mapping, it is keyed by tuples of values in the order of the variables.
+
+    :param variables: Names of query variables which label the axes
+    :param states: Values of each query variable in order which label the indices of the axes
+    :param probabilities: Probability of each combination as array, or flat in row-major order
+
+    .. note:: NumPy is loaded on creation of the first table rather than on import of the package
+    """
+
+    def __init__(self, variables: Sequence[str], states: Sequence[Sequence[str]],
+                 probabilities: Union['np.ndarray', Sequence[float]]):
+        import numpy as np
+        self.variables: Tuple[str, ...] = tuple(variables)
+        self.states: Tuple[Tuple[str, ...], ...] = tuple(tuple(values) for values in states)
+        self.array: 'np.ndarray' = np.asarray(probabilities, dtype=float).reshape(
+            tuple(len(values) for values in self.states))
+        self._index_of: List[Dict[str, int]] = [{value: index for index, value in
+                                                 enumerate(values)} for values in self.states]
+
+    def __repr__(self):
+        return 'ProbabilityTable({!r}, {!r}, {!r})'.format(self.variables, self.states,
+                                                           self.probabilities)
+
+    def __len__(self):
+        return self.array.size
+
+    def __iter__(self) -> Iterator[Tuple[str, ...]]:
+        return product(*self.states)
+
+    def __getitem__(self, key: Union[Tuple[str, ...], Dict[str, str]]) -> float:
+        """
+        :param key: Values of query variables in order, or by name
+        :return: Probability of the combination
+        """
+        if isinstance(key, dict):
+            key = tuple(key[variable] for variable in self.variables)
+        elif not isinstance(key, tuple):
+            key = (key,)
+        if len(key) != len(self.variables) or any(
+                value not in index_of for index_of, value in zip(self._index_of, key)):
+            raise KeyError(key)
+        return float(self.array[tuple(index_of[value] for index_of, value in
+                                      zip(self._index_of, key))])
+
+    def __truediv__(self, other: float) -> 'ProbabilityTable':
+        return ProbabilityTable(self.variables, self.states, self.array / other)
+
+    @property
+    def probabilities(self) -> List[float]:
+        """ Probabilities in row-major order """
+        return self.array.ravel().tolist()
+
+    def marginalize(self, *variables: str) -> Union['ProbabilityTable', float]:
+        """
+        Sum out the given variables
+
+        :param variables: Variables to be summed out
+        :return: Table of the other variables, or single probability if no variable is left
+        """
+        axes = tuple(self.variables.index(variable) for variable in variables)
+        array = self.array.sum(axis=axes)
+        if array.ndim == 0:
+            return float(array)
+        kept = [axis for axis in range(len(self.variables)) if axis not in axes]
+        return ProbabilityTable([self.variables[axis] for axis in kept],
+                                [self.states[axis] for axis in kept], array)
+
+    def argmax(self) -> Dict[str, str]:
+        """ Combination with the highest probability by variable name """
+        import numpy as np
+        indices = np.unravel_index(int(np.argmax(self.array)), self.array.shape)
+        return {variable: values[index] for variable, values, index in
+                zip(self.variables, self.states, indices)}
+
+    def transpose(self, variables: Sequence[str]) -> 'ProbabilityTable':
+        """ Same table whose axes are in the order of the given variables """
+        axes = [self.variables.index(variable) for variable in variables]
+        return ProbabilityTable(variables, [self.states[axis] for axis in axes],
+                                self.array.transpose(axes))
+
+    def to_dict(self) -> Dict[str, float]:
+        """ Result format of textual queries keyed by string of query variable contexts """
+        return {str(dict(zip(self.variables, key))): p for key, p in
+                zip(self, self.probabilities)}
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+__all__ = ['QueryCache']
+
+
+class QueryCache(object):
+    """
+    Least recently used cache of query results with optional time to live
+
+    .. note:: Keys are expected to contain network version so that results calculated on a previous
+              state of the network are never served, and stale ones are evicted by the network
+              through `clear` as soon as it changes, or through `invalidate` if only the ones
+              depending on updated probabilities are stale
+
+    :param max_size: Maximum number of results to be kept
+    :param ttl: Seconds after which a result expires, never expires if not given
+    :param clock: Monotonic time source in seconds
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_size <= 0:
+            raise ValueError('Cache size should be positive.')
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return self.get(key, count=False)[0]
+
+    def get(self, key: Hashable, count: bool = True) -> Tuple[bool, Any]:
+        """
+        Fetch result and mark it as recently used
+
+        :param key: Canonical key of the query
+        :param count: Boolean flag whether to update hit/miss counters
+        :return: Boolean flag whether result is found and the result itself
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += count
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += count
+            return True, entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """ Store result where least recently used one is evicted if cache is full """
+        expiry = self._clock() + self.ttl if self.ttl is not None else float('inf')
+        with self._lock:
+            self._entries[key] = (value, expiry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Evict results selected by the predicate
+
+        :param predicate: Function of key and result which is True for the ones to be evicted
+        :return: Number of evicted results
+        """
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,183 @@
+from itertools import product
+from typing import Dict, List, Optional, Set, Tuple
+
+from .factor import Factor, elimination_order
+from .network_node import NetworkNode
+
+__all__ = ['DecompositionTree', 'RecursiveConditioning']
+
+
+class DecompositionTree(object):
+    """
+    Node of decomposition tree (dtree) whose leaves are conditional probability tables of the
+    network and whose internal nodes split their tables into two parts
+
+    .. note:: Cutset of internal node is the variables shared by its two parts which are not
+              instantiated by its ancestors, and context is its variables instantiated by its
+              ancestors. Result of a node depends only on the values of its context.
+
+    :param factor: Table of leaf node
+    :param left: Left child of internal node
+    :param right: Right child of internal node
+    """
+
+    def __init__(self, factor: Factor = None, left: 'DecompositionTree' = None,
+                 right: 'DecompositionTree' = None):
+        self.factor = factor
+        self.left = left
+        self.right = right
+        self.variables: Set[str] = set(factor.variables) if factor else \
+            left.variables | right.variables
+        self.cutset: List[str] = []
+        self.context: List[str] = []
+        self.acutset: List[str] = []
+
+    @property
+    def is_leaf(self) -> bool:
+        return self.factor is not None
+
+    @staticmethod
+    def from_factors(factors: List[Factor]) -> 'DecompositionTree':
+        """
+        Dtree built along elimination order, where trees having the eliminated variable are joined
+        so that the widths of cutsets and contexts follow the width of the order
+
+        :param factors: Tables of the network
+        :return: Root of the tree
+        """
+        trees = [DecompositionTree(factor=factor) for factor in factors]
+        variables = {variable for factor in factors for variable in factor.variables}
+        for variable in elimination_order(factors, variables) + [None]:
+            joined = [tree for tree in trees if variable is None or variable in tree.variables]
+            if len(joined) < 2:
+                continue
+            trees = [tree for tree in trees if all(tree is not other for other in joined)]
+            # Smaller trees are joined first so that the tree stays balanced
+            joined.sort(key=lambda tree: len(tree.variables))
+            while len(joined) > 1:
+                left, right = joined.pop(0), joined.pop(0)
+                joined.append(DecompositionTree(left=left, right=right))
+                joined.sort(key=lambda tree: len(tree.variables))
+            trees.append(joined[0])
+        root = trees[0]
+        root._assign_cutsets(acutset=set())
+        return root
+
+    def _assign_cutsets(self, acutset: Set[str]) -> None:
+        self.acutset = sorted(acutset)
+        self.context = sorted(self.variables & acutset)
+        if not self.is_leaf:
+            self.cutset = sorted((self.left.variables & self.right.variables) - acutset)
+            self.left._assign_cutsets(acutset | set(self.cutset))
+            self.right._assign_cutsets(acutset | set(self.cutset))
+
+    def internal_nodes(self) -> List['DecompositionTree']:
+        if self.is_leaf:
+            return []
+        return [self] + self.left.internal_nodes() + self.right.internal_nodes()
+
+
+class RecursiveConditioning(object):
+    """
+    Recursive conditioning over dtree of the given nodes, where each internal node instantiates
+    its cutset and its two parts are solved independently. Results of internal nodes are cached by
+    values of their contexts within the memory budget.
+
+    .. note:: Leaves are `factors` of the nodes, so that auxiliary variables of compact nodes are
+              conditioned on and summed out together with the network variables
+
+    .. note:: Without cache, space is linear in the number of nodes and time is exponential in the
+              dtree height times cutset width as in enumeration. With caches of all internal nodes,
+              time is exponential only in the context width as in elimination. Caches are
+              allocated to the internal nodes which save the most calls per cache entry first, so
+              that budgets in between trade time for space smoothly.
+
+    :param nodes: Nodes whose joint is calculated, their predecessors are expected among them
+    :param cache_size: Maximum number of cache entries, unlimited if not given
+    """
+
+    def __init__(self, nodes: Dict[str, NetworkNode], cache_size: Optional[int] = None):
+        self.values_of = {name: node.random_variables for name, node in nodes.items()}
+        factors = [factor for node in nodes.values() for factor in node.factors(self.values_of)]
+        self.cardinalities: Dict[str, int] = {
+            variable: cardinality for factor in factors for variable, cardinality in
+            zip(factor.variables, factor.cardinalities)}
+        # No tree is needed for the empty joint, e.g. denominator of query without evidence
+        self.root: Optional[DecompositionTree] = DecompositionTree.from_factors(factors) if \
+            factors else None
+        self.cache_size = cache_size
+        self.cache_capacity = 0
+        self._cached: Set[int] = set()
+        self._allocate_caches()
+        self._caches: Dict[int, Dict[Tuple[int, ...], float]] = {}
+        self.multiplications = 0
+        self.additions = 0
+
+    def _size(self, variables: List[str]) -> int:
+        size = 1
+        for variable in variables:
+            size *= self.cardinalities[variable]
+        return size
+
+    def _allocate_caches(self) -> None:
+        """ Select internal nodes to be cached in order of calls saved per cache entry """
+        candidates = []
+        for node in self.root.internal_nodes() if self.root else []:
+            # Calls of the node are the instantiations of its ancestor cutsets without cache and
+            # the instantiations of its context with cache
+            saved = self._size([variable for variable in node.acutset if
+                                variable not in node.context])
+            candidates.append((-saved, self._size(node.context), id(node)))
+        for _, size, identifier in sorted(candidates):
+            if self.cache_size is None or self.cache_capacity + size <= self.cache_size:
+                self._cached.add(identifier)
+                self.cache_capacity += size
+
+    @property
+    def cache_entries(self) -> int:
+        """ Number of cache entries filled by the last evaluation """
+        return sum(len(cache) for cache in self._caches.values())
+
+    def evaluate(self, evidence: Dict[str, str]) -> float:
+        """
+        Probability of the evidence where caches are filled from scratch
+
+        :param evidence: Values of variables by name
+        :return: Joint probability of the evidence
+        """
+        self._caches = {identifier: {} for identifier in self._cached}
+        if self.root is None:
+            return 1.0
+        return self._recursive_conditioning(self.root, {
+            name: self.values_of[name].index(value) for name, value in evidence.items()})
+
+    def _recursive_conditioning(self, node: DecompositionTree, assignment: Dict[str, int]) \
+            -> float:
+        if node.is_leaf:
+            free = [variable for variable in node.factor.variables if variable not in assignment]
+            if not free:
+                return node.factor.value(assignment)
+            self.additions += self._size(free) - 1
+            return sum(node.factor.value({**assignment, **dict(zip(free, values))}) for values in
+                       product(*[range(self.cardinalities[variable]) for variable in free]))
+
+        cache = self._caches.get(id(node))
+        if cache is not None:
+            key = tuple(assignment[variable] for variable in node.context)
+            if key in cache:
+                return cache[key]
+
+        free = [variable for variable in node.cutset if variable not in assignment]
+        probability = 0.0
+        for values in product(*[range(self.cardinalities[variable]) for variable in free]):
+            instantiation = {**assignment, **dict(zip(free, values))}
+            left = self._recursive_conditioning(node.left, instantiation)
+            if left == 0:
+                continue
+            probability += left * self._recursive_conditioning(node.right, instantiation)
+            self.multiplications += 1
+            self.additions += 1
+
+        if cache is not None:
+            cache[key] = probability
+        return probability
@@ -0,0 +1,152 @@
+from itertools import product
+from typing import Any, Callable, Dict, List, Tuple
+
+from .factor import Factor
+from .network_node import NetworkNode
+
+__all__ = ['RuleNetworkNode']
+
+# Values of some predecessors and the distribution of the node when they hold
+Rule = Tuple[Dict[str, str], Dict[str, float]]
+
+
+class RuleNetworkNode(NetworkNode):
+    """
+    Bayesian network node whose conditional probabilities are given by ordered rules and a default
+    distribution instead of full table, so that its size is linear in number of rules rather than
+    exponential in number of predecessors
+
+    .. note:: Distribution of the first rule whose conditions hold for the context is used, and
+              the default one is used if none of them holds. Rules may refer to any subset of
+              predecessors, which represents context-specific independence from the rest.
+
+    .. note:: Circuits and recursive conditioning compile `factors`, and message passing
+              eliminates them for each family, so that their cost grows with the number of rules.
+              Enumeration, cutset conditioning and explanations ask `probability` for each
+              combination of the referred predecessors. Full table over all predecessors is only
+              materialized lazily if `probabilities` is accessed.
+    """
+
+    def __init__(self, node_name: str, random_variables: List[str], predecessors: List[str],
+                 rules: List[Rule], default: Dict[str, float],
+                 all_random_variables: List[List[str]]):
+        super().__init__(node_name=node_name, random_variables=random_variables,
+                         predecessors=predecessors, probabilities=None,
+                         all_random_variables=all_random_variables)
+        self._rules = [(dict(condition), dict(distribution)) for condition, distribution in rules]
+        self._default = dict(default)
+
+    def __repr__(self):
+        return 'RuleNetworkNode({!r}, {!r}, {!r}, {!r}, {!r}, {!r})'.format(
+            self.node_name, self.random_variables, self.predecessors, self.rules, self.default,
+            self.all_random_variables)
+
+    def __str__(self):
+        """
+        Table representation of the rules where predecessors without condition are marked with `*`
+        """
+        headers = self.predecessors + [f'P({self.node_name}={variable})' for variable in
+                                       self.random_variables]
+        rows = [[condition.get(predecessor, '*') for predecessor in self.predecessors] +
+                [distribution[variable] for variable in self.random_variables] for
+                condition, distribution in self.rules + [({}, self.default)]]
+        from tabulate import tabulate
+        return tabulate(tabular_data=rows, headers=headers, tablefmt='github')
+
+    @property
+    def rules(self) -> List[Rule]:
+        return self._rules
+
+    @property
+    def default(self) -> Dict[str, float]:
+        return self._default
+
+    @property
+    def relevant_predecessors(self) -> List[str]:
+        """ Predecessors referred by any rule, where the node is independent of the others """
+        referred = {predecessor for condition, _ in self._rules for predecessor in condition}
+        return [predecessor for predecessor in self.predecessors if predecessor in referred]
+
+    @property
+    def auxiliary_names(self) -> List[str]:
+        """ Auxiliary variable of each rule in order of rules """
+        return [f'{self.node_name}{self.AUXILIARY_SUFFIX}{index}' for index in
+                range(1, len(self._rules) + 1)]
+
+    def _chain_size(self, values_of: Dict[str, List[str]]) -> int:
+        """ Number of entries of the chain of rule factors """
+        cardinality = len(self.random_variables)
+        size = 2 * cardinality
+        for index, (condition, _) in enumerate(self._rules):
+            rule_size = (4 if index else 2) * cardinality
+            for predecessor in condition:
+                rule_size *= len(values_of[predecessor])
+            size += rule_size
+        return size
+
+    def factor_size(self, values_of: Dict[str, List[str]]) -> int:
+        return min(self.table_size(values_of), self._chain_size(values_of))
+
+    def factors(self, values_of: Dict[str, List[str]],
+                transform: Callable[[float], Any] = float) -> List[Factor]:
+        """
+        Chain of one factor for each rule and one for the default, where binary auxiliary variable
+        X'i tells whether any of the first i rules holds, so that
+
+        .. math::
+             P(x | u) = \\sum_{x'} \\prod_{i} f_{i}(x'_{i-1}, u_{C_{i}}, x, x'_{i}) f_{0}(x'_{n}, x)
+
+        where f_i passes holding rule on, otherwise gives the distribution of rule i if its
+        condition C_i holds, and f_0 gives the default distribution if no rule holds. Size of the
+        factors is linear in number of rules and exponential only in the predecessors of each
+        condition. Full table is returned instead if it is smaller.
+
+        .. note:: Auxiliary variables are functions of the predecessors so that single assignment
+                  of them is nonzero, and the factors are valid in max-product elimination as well
+
+        :param values_of: Values of each variable of the network
+        :param transform: Mapping applied to each entry
+        :return: Factors of the node
+        """
+        if self._chain_size(values_of) >= self.table_size(values_of):
+            return super().factors(values_of, transform=transform)
+
+        factors, previous = [], []
+        for auxiliary, (condition, distribution) in zip(self.auxiliary_names, self._rules):
+            conditioned = [predecessor for predecessor in self.predecessors if
+                           predecessor in condition]
+            values = []
+            for has_held, combination in product([False, True] if previous else [False], product(
+                    *[values_of[predecessor] for predecessor in conditioned])):
+                holds = all(condition[predecessor] == value for predecessor, value in
+                            zip(conditioned, combination))
+                for variable in self.random_variables:
+                    if has_held:
+                        values += [0.0, 1.0]
+                    elif holds:
+                        values += [0.0, distribution[variable]]
+                    else:
+                        values += [1.0, 0.0]
+            factors.append(Factor(previous + conditioned + [self.node_name, auxiliary],
+                                  [2] * len(previous) + [len(values_of[predecessor]) for
+                                                         predecessor in conditioned] +
+                                  [len(self.random_variables), 2],
+                                  [transform(value) for value in values]))
+            previous = [auxiliary]
+        default = [self._default[variable] for variable in self.random_variables]
+        factors.append(Factor(previous + [self.node_name], [2, len(default)],
+                              [transform(value) for value in default + [1.0] * len(default)]))
+        return factors
+
+    @property
+    def probabilities(self) -> Dict[str, float]:
+        """ Full probability table which is exponential in number of predecessors """
+        if self._probabilities is None:
+            self._probabilities = self._expand_probabilities()
+        return self._probabilities
+
+    def probability(self, **context):
+        for condition, distribution in self._rules:
+            if all(context[predecessor] == value for predecessor, value in condition.items()):
+                return distribution[context[self.node_name]]
+        return self._default[context[self.node_name]]
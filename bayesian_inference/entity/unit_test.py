@@ -1,9 +1,38 @@
+import asyncio
+import io
 import itertools
+import math
+import threading
+import time
+import os
 from unittest import TestCase, mock
 
+import numpy
+
+from .anytime import CACHE_ENGINE, LIKELIHOOD_WEIGHTING_ENGINE, DeadlineResult
+from .arithmetic_circuit import ArithmeticCircuit
+from .async_network import AsyncBayesianNetwork
 from .bayesian_network import BayesianNetwork, ProbabilityFactor, is_independent
+from .dynamic_bayesian_network import DynamicBayesianNetwork
+from .explanation import Explanation
+from .factor import Factor, elimination_order
+from .graph import DirectedGraph
+from .parallel_inference import ParallelInference
+from .polytree import is_polytree, PolytreePropagation
+from .probability_table import ProbabilityTable
+from .query_cache import QueryCache
+from .recursive_conditioning import RecursiveConditioning
+from .rule_network_node import RuleNetworkNode
+from .inference_stats import InferenceStats, register_inference_hook, unregister_inference_hook
+from .linear_gaussian_network_node import LinearGaussian, LinearGaussianNetworkNode
+from .loop_cutset import loop_cutset, LoopCutsetConditioning
 from .network_node import NetworkNode
-from ..exceptions.exceptions import InvalidProbabilityFactor, VariableNotInGraph, InvalidQuery
+from .noisy_max_network_node import NoisyMaxNetworkNode
+from ..exceptions.exceptions import (
+    InvalidProbabilityFactor, VariableNotInGraph, InvalidQuery, NotPolytreeNetwork,
+    ReadOnlyNetwork, InvalidTemporalNetwork, PredecessorNotExistInNetwork,
+    NotAllExpectedProbabilityExist,
+)
 from ..probability.probability import QueryVariable
 
 __all__ = []
@@ -283,11 +312,12 @@ class BayesianNetworkProbabilityTest(TestCase):
     @mock.patch(
         'bayesian_inference.entity.bayesian_network.BayesianNetwork._calculate_joint_probability')
     def test_dictionary_returned_probability(self, mock_joint_probability):
-        mock_joint_probability.side_effect = [{'a': 0.3, 'b': 0.2, 'c': 0.75}, 0.75]
+        mock_joint_probability.side_effect = [
+            ProbabilityTable([self.BURGLARY], [['a', 'b', 'c']], [0.3, 0.2, 0.75]), 0.75]
         value = self.network.P(f'{self.BURGLARY}')
-        self.assertAlmostEqual(0.3 / 0.75, value['a'])
-        self.assertAlmostEqual(0.2 / 0.75, value['b'])
-        self.assertAlmostEqual(0.75 / 0.75, value['c'])
+        self.assertAlmostEqual(0.3 / 0.75, value[str({self.BURGLARY: 'a'})])
+        self.assertAlmostEqual(0.2 / 0.75, value[str({self.BURGLARY: 'b'})])
+        self.assertAlmostEqual(0.75 / 0.75, value[str({self.BURGLARY: 'c'})])
 
     def test_invalid_query_probability(self):
         from bayesian_inference.exceptions.exceptions import InvalidQuery
@@ -512,3 +542,1433 @@ class BayesianNetworkProbabilityTest(TestCase):
 
         with self.assertRaises(InvalidQuery):
             self.network.is_independent(self.ALARM, self.BURGLARY, [self.EARTHQUAKE, self.BURGLARY])
+
+
+class InferenceStatsTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+
+    def test_return_stats(self):
+        p, stats = self.network.P('Burglary | JohnCalls = t, MaryCalls = t', return_stats=True)
+        self.assertAlmostEqual(0.284, p[str({'Burglary': 't'})], delta=0.0005)
+        self.assertIsInstance(stats, InferenceStats)
+        self.assertEqual('enumeration', stats.engine)
+        # Earthquake and Alarm are hidden for nominator and all but evidences for denominator
+        self.assertEqual(3, stats.hidden_variable_count)
+        self.assertEqual(0, stats.pruned_variable_count)
+        self.assertEqual(2, stats.largest_factor)
+        self.assertGreater(stats.multiplications, 0)
+        self.assertGreater(stats.additions, 0)
+        self.assertGreater(stats.parse_time, 0)
+        self.assertAlmostEqual(stats.parse_time + stats.planning_time + stats.inference_time,
+                               stats.total_time)
+
+    def test_operation_counts(self):
+        # Single factor chain without hidden variable makes one multiplication per factor
+        _, stats = self.network.P('Burglary = t', return_stats=True)
+        self.assertEqual(1, stats.multiplications)
+        self.assertEqual(0, stats.additions)
+        self.assertEqual(4, stats.pruned_variable_count)
+
+        # Earthquake is summed out for nominator where Burglary is also summed out for denominator.
+        # Earthquake precedes Burglary in topological order, so that Burglary is multiplied in
+        # each branch of Earthquake.
+        _, stats = self.network.P('Burglary = t | Alarm = t', return_stats=True)
+        self.assertEqual(2 * (1 + 1 + 1) + 2 * (1 + 2 * 2), stats.multiplications)
+        self.assertEqual(1 + (1 + 2), stats.additions)
+
+    def test_stats_not_returned_by_default(self):
+        self.assertIsInstance(self.network.P('Burglary = t'), float)
+
+    def test_inference_hooks(self):
+        collected = []
+        register_inference_hook(collected.append)
+        # Registering twice should not duplicate notifications
+        register_inference_hook(collected.append)
+        try:
+            self.network.P('Alarm | Burglary = t')
+            self.assertEqual(1, len(collected))
+            self.assertEqual('Alarm | Burglary = t', collected[0].query)
+        finally:
+            self.assertTrue(unregister_inference_hook(collected.append))
+        self.assertFalse(unregister_inference_hook(collected.append))
+
+        self.network.P('Alarm | Burglary = t')
+        self.assertEqual(1, len(collected))
+
+    @mock.patch('logging.error')
+    def test_failing_inference_hook(self, m_logger_error):
+        def failing_hook(_):
+            raise RuntimeError('metrics backend is down')
+
+        register_inference_hook(failing_hook)
+        try:
+            self.assertAlmostEqual(0.001, self.network.P('Burglary = t'))
+        finally:
+            unregister_inference_hook(failing_hook)
+        m_logger_error.assert_called_once()
+
+
+class PolytreeInferenceTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+        with open(os.path.join(os.path.dirname(__file__), '..', '..', 'sample_data',
+                               'network_1.json')) as file:
+            self.student_network = BayesianNetwork(initial_network=InputParser.parse(file))
+
+    def _assert_same_probabilities(self, expected, actual):
+        if isinstance(expected, float):
+            self.assertAlmostEqual(expected, actual)
+        else:
+            self.assertEqual(expected.keys(), actual.keys())
+            for key in expected:
+                self.assertAlmostEqual(expected[key], actual[key])
+
+    def test_is_polytree(self):
+        self.assertTrue(is_polytree(self.network.nodes, self.network.nodes))
+        self.assertTrue(is_polytree(self.student_network.nodes, self.student_network.nodes))
+
+        # Diamond has two undirected paths between its top and bottom
+        diamond = {
+            'A': NetworkNode('A', [], [], {}, []), 'B': NetworkNode('B', [], ['A'], {}, []),
+            'C': NetworkNode('C', [], ['A'], {}, []), 'D': NetworkNode('D', [], ['B', 'C'], {}, [])}
+        self.assertFalse(is_polytree(diamond, diamond))
+        self.assertTrue(is_polytree(diamond, {'A', 'B', 'C'}))
+        self.assertTrue(is_polytree(diamond, {'B', 'C', 'D'}))
+
+    def test_polytree_engine_matches_enumeration(self):
+        queries = [
+            'Burglary | JohnCalls = t, MaryCalls = t', 'Alarm, Earthquake | MaryCalls = f',
+            'JohnCalls = t, MaryCalls = t, Alarm = t, Burglary = f, Earthquake = f',
+            'Burglary = t | JohnCalls = t', 'MaryCalls',
+        ]
+        for query in queries:
+            self._assert_same_probabilities(
+                self.network.P(query, engine=BayesianNetwork.ENUMERATION_ENGINE),
+                self.network.P(query, engine=BayesianNetwork.POLYTREE_ENGINE))
+
+        queries = ['D | L = 1, S = 0', 'G | L = 0', 'I, G = 2 | S = 1', 'L']
+        for query in queries:
+            self._assert_same_probabilities(
+                self.student_network.P(query, engine=BayesianNetwork.ENUMERATION_ENGINE),
+                self.student_network.P(query, engine=BayesianNetwork.POLYTREE_ENGINE))
+
+    def test_beliefs_of_propagation(self):
+        propagation = PolytreePropagation(self.network.nodes, self.network.nodes)
+        propagation.propagate({'JohnCalls': 't', 'MaryCalls': 't'})
+        evidence_probability = propagation.evidence_probability()
+        belief = propagation.belief('Burglary')
+        self.assertAlmostEqual(0.284, belief['t'] / evidence_probability, delta=0.0005)
+        self.assertAlmostEqual(evidence_probability, sum(propagation.belief('Alarm').values()))
+
+    def test_polytree_engine_automatically_selected(self):
+        from ..benchmark.generators import chain_network
+        from ..input_parser.input_parser import InputParser
+        chain = BayesianNetwork(initial_network=InputParser.from_dict(chain_network(12, seed=0)))
+
+        _, stats = chain.P('X11 | X0 = s0', return_stats=True)
+        self.assertEqual(BayesianNetwork.POLYTREE_ENGINE, stats.engine)
+
+        # Enumeration is cheaper without hidden variables
+        _, stats = chain.P('X1 | X0 = s0', return_stats=True)
+        self.assertEqual(BayesianNetwork.ENUMERATION_ENGINE, stats.engine)
+
+        # Can be disabled
+        _, stats = chain.P('X11 | X0 = s0', return_stats=True,
+                           engine=BayesianNetwork.ENUMERATION_ENGINE)
+        self.assertEqual(BayesianNetwork.ENUMERATION_ENGINE, stats.engine)
+
+    def test_polytree_engine_on_non_polytree(self):
+        from ..benchmark.generators import grid_network
+        from ..input_parser.input_parser import InputParser
+        grid = BayesianNetwork(initial_network=InputParser.from_dict(grid_network(2, 2, seed=0)))
+        with self.assertRaises(NotPolytreeNetwork):
+            grid.P('X3', engine=BayesianNetwork.POLYTREE_ENGINE)
+        # Pruned subgraph of the query can still be polytree
+        self._assert_same_probabilities(grid.P('X2 | X1 = s0', engine='enumeration'),
+                                        grid.P('X2 | X1 = s0', engine='polytree'))
+        _, stats = grid.P('X3', return_stats=True)
+        self.assertEqual(BayesianNetwork.ENUMERATION_ENGINE, stats.engine)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(InvalidQuery):
+            self.network.P('Burglary', engine='magic')
+
+
+class QueryCacheTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.cache = QueryCache(max_size=8)
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network), query_cache=self.cache)
+
+    def test_lru_eviction(self):
+        cache = QueryCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        # Touch a so that b becomes least recently used
+        self.assertEqual((True, 1), cache.get('a'))
+        cache.put('c', 3)
+        self.assertEqual(2, len(cache))
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual((False, None), cache.get('b'))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertAlmostEqual(0.5, cache.hit_ratio)
+
+        with self.assertRaises(ValueError):
+            QueryCache(max_size=0)
+
+    def test_ttl_expiry(self):
+        now = [0.0]
+        cache = QueryCache(ttl=10, clock=lambda: now[0])
+        cache.put('a', 1)
+        now[0] = 9.0
+        self.assertEqual((True, 1), cache.get('a'))
+        now[0] = 10.5
+        self.assertEqual((False, None), cache.get('a'))
+        self.assertEqual(0, len(cache))
+
+    def test_canonical_query(self):
+        expected = self.network.P('Burglary, Earthquake | JohnCalls = t, MaryCalls = t')
+        self.assertEqual(0, self.cache.hits)
+
+        with mock.patch.object(BayesianNetwork, '_calculate_joint_probability') as m_joint:
+            # Variable order and whitespaces do not matter
+            p, stats = self.network.P('Earthquake,Burglary|MaryCalls=t,  JohnCalls = t',
+                                      return_stats=True)
+            m_joint.assert_not_called()
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, stats.cache_hits)
+        self.assertEqual(len(expected), len(p))
+        for context, value in p.items():
+            # Keys follow the order of the variables in the query
+            self.assertTrue(context.startswith("{'Earthquake'"))
+            self.assertAlmostEqual(expected[str({'Burglary': eval(context)['Burglary'],
+                                                 'Earthquake': eval(context)['Earthquake']})],
+                                   value)
+
+        self.assertAlmostEqual(0.001, self.network.P('Burglary = t'))
+        self.assertAlmostEqual(0.001, self.network.P('Burglary=t'))
+        self.assertEqual(2, self.cache.hits)
+
+    def test_invalidation_on_change(self):
+        self.network.P('Alarm | Burglary = t')
+        version = self.network.version
+        self.assertEqual(1, len(self.cache))
+
+        self.assertTrue(self.network.remove_node('MaryCalls'))
+        self.assertEqual(version + 1, self.network.version)
+        self.assertEqual(0, len(self.cache))
+        self.network.P('Alarm | Burglary = t')
+        self.assertEqual(0, self.cache.hits)
+
+        self.assertTrue(self.network.add_node(NetworkNode('MaryCalls', ['t', 'f'], ['Alarm'], {
+            '(t,t)': 0.5, '(t,f)': 0.5, '(f,t)': 0.5, '(f,f)': 0.5}, [['t', 'f'], ['t', 'f']])))
+        self.assertEqual(version + 2, self.network.version)
+        self.assertAlmostEqual(0.5, self.network.P('MaryCalls = t | Alarm = t'))
+
+        # Failing changes keep version
+        self.assertFalse(self.network.remove_node('NotExisting'))
+        self.assertEqual(version + 2, self.network.version)
+
+    def test_targeted_invalidation_on_probability_update(self):
+        self.network.P('Burglary = t')
+        self.network.P('JohnCalls = t')
+        self.network.P('Alarm | Earthquake = t', engine=BayesianNetwork.CIRCUIT_ENGINE)
+        version = self.network.version
+        view = self.network.pinned()
+        self.assertEqual(3, len(self.cache))
+
+        with mock.patch.object(ArithmeticCircuit, 'from_nodes',
+                               wraps=ArithmeticCircuit.from_nodes) as from_nodes:
+            self.network.update_probabilities('JohnCalls', {
+                '(t,t)': 0.5, '(t,f)': 0.5, '(f,t)': 0.2, '(f,f)': 0.8})
+            self.assertEqual(version + 1, self.network.version)
+            self.assertEqual(2, len(self.cache))
+            self.assertAlmostEqual(0.001, self.network.P('Burglary = t'))
+            self.network.P('Alarm | Earthquake = t', engine=BayesianNetwork.CIRCUIT_ENGINE)
+            self.assertEqual(2, self.cache.hits)
+            from_nodes.assert_not_called()
+            self.network.P('Burglary | JohnCalls = t', engine=BayesianNetwork.CIRCUIT_ENGINE)
+            from_nodes.assert_called_once()
+        self.assertAlmostEqual(0.5, self.network.P('JohnCalls = t | Alarm = t'))
+
+        # Pinned view keeps the previous probabilities and does not serve newer results
+        self.assertAlmostEqual(0.9, view.P('JohnCalls = t | Alarm = t'))
+        self.network.P('JohnCalls = t')
+        self.assertNotAlmostEqual(self.network.P('JohnCalls = t'), view.P('JohnCalls = t'))
+
+    def test_invalid_probability_update(self):
+        version = self.network.version
+        with self.assertRaises(VariableNotInGraph):
+            self.network.update_probabilities('NotExisting', {'(t)': 1.0})
+        with self.assertRaises(NotAllExpectedProbabilityExist):
+            self.network.update_probabilities('JohnCalls', {
+                '(t,t)': 0.5, '(t,f)': 0.5, '(f,t)': 0.2})
+        with self.assertRaises(NotAllExpectedProbabilityExist):
+            self.network.update_probabilities('JohnCalls', {
+                '(t,t)': 0.5, '(t,f)': 0.6, '(f,t)': 0.2, '(f,f)': 0.8})
+        with self.assertRaises(NotAllExpectedProbabilityExist):
+            self.network.update_probabilities('JohnCalls', {
+                '(t,t)': 0.5, '(t,f)': 0.5, '(f,t)': 0.2, '(f,f)': 0.8, '(x,t)': 0.0})
+        self.assertEqual(version, self.network.version)
+
+
+class AsyncBayesianNetworkTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+
+    def _slow_network(self, delay: float):
+        """ Mock network counting calls and maximum number of concurrent calls """
+        network = mock.Mock(version=0)
+        network.pinned.return_value = network
+        state = {'calls': 0, 'running': 0, 'max_running': 0}
+        lock = threading.Lock()
+
+        def slow_probability(query, engine=None):
+            with lock:
+                state['calls'] += 1
+                state['running'] += 1
+                state['max_running'] = max(state['max_running'], state['running'])
+            time.sleep(delay)
+            with lock:
+                state['running'] -= 1
+            return query
+
+        network.P.side_effect = slow_probability
+        return network, state
+
+    def test_same_results_with_sync_api(self):
+        async def run():
+            async with AsyncBayesianNetwork(self.network) as network:
+                return (await network.P('Burglary | JohnCalls = t, MaryCalls = t'),
+                        await network.batch_P(['Alarm = t', 'Burglary = t | Alarm = t']),
+                        await network.is_independent('JohnCalls', 'MaryCalls', ['Alarm']))
+
+        p, batch, independent = asyncio.run(run())
+        self.assertEqual(self.network.P('Burglary | JohnCalls = t, MaryCalls = t'), p)
+        self.assertEqual([self.network.P('Alarm = t'), self.network.P('Burglary = t | Alarm = t')],
+                         batch)
+        self.assertTrue(independent)
+
+    def test_identical_queries_coalesced(self):
+        network, state = self._slow_network(delay=0.05)
+
+        async def run():
+            async with AsyncBayesianNetwork(network) as async_network:
+                return await async_network.batch_P(['A | B = b', 'A|B=b', 'C'])
+
+        self.assertEqual(['A | B = b', 'A | B = b', 'C'], asyncio.run(run()))
+        self.assertEqual(2, state['calls'])
+
+    def test_queries_of_different_versions_not_coalesced(self):
+        async def run():
+            async with AsyncBayesianNetwork(self.network) as async_network:
+                before = asyncio.ensure_future(async_network.P('MaryCalls = t'))
+                # Let the first query pin the network before it is changed
+                await asyncio.sleep(0)
+                self.network.update_probabilities('MaryCalls', {
+                    '(t,t)': 0.5, '(t,f)': 0.5, '(f,t)': 0.5, '(f,f)': 0.5})
+                after = asyncio.ensure_future(async_network.P('MaryCalls = t'))
+                return await before, await after
+
+        before, after = asyncio.run(run())
+        self.assertNotAlmostEqual(before, after)
+        self.assertAlmostEqual(0.5, after)
+
+    def test_multiple_event_loops(self):
+        network, state = self._slow_network(delay=0.01)
+        async_network = AsyncBayesianNetwork(network, max_concurrency=1)
+        for _ in range(2):
+            self.assertEqual(['Q0', 'Q1'], asyncio.run(async_network.batch_P(['Q0', 'Q1'])))
+        async_network.close()
+        self.assertEqual(4, state['calls'])
+
+    def test_max_concurrency(self):
+        network, state = self._slow_network(delay=0.02)
+
+        async def run():
+            async with AsyncBayesianNetwork(network, max_concurrency=2) as async_network:
+                return await async_network.batch_P([f'Q{i}' for i in range(8)])
+
+        self.assertEqual([f'Q{i}' for i in range(8)], asyncio.run(run()))
+        self.assertEqual(8, state['calls'])
+        self.assertLessEqual(state['max_running'], 2)
+
+        with self.assertRaises(ValueError):
+            AsyncBayesianNetwork(network, max_concurrency=0)
+
+    def test_timeout_and_cancellation(self):
+        network, state = self._slow_network(delay=0.2)
+
+        async def run():
+            async with AsyncBayesianNetwork(network, max_concurrency=1) as async_network:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await async_network.P('Slow', timeout=0.01)
+                # Queued calculation is cancelled together with its only caller
+                waiting = asyncio.ensure_future(async_network.P('Queued'))
+                await asyncio.sleep(0)
+                waiting.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await waiting
+                await asyncio.sleep(0.3)
+                return len(async_network._in_flight)
+
+        self.assertEqual(0, asyncio.run(run()))
+        self.assertEqual(1, state['calls'])
+        self.assertEqual(1, state['max_running'])
+
+
+class ParallelInferenceTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+
+    def _assert_same_probabilities(self, expected, actual):
+        if isinstance(expected, float):
+            self.assertAlmostEqual(expected, actual)
+        else:
+            self.assertEqual(expected.keys(), actual.keys())
+            for key in expected:
+                self.assertAlmostEqual(expected[key], actual[key])
+
+    def test_partitions(self):
+        parallel = ParallelInference(self.network, processes=2, tasks_per_process=2)
+        order = [ProbabilityFactor(name='Earthquake', sum_out=True),
+                 ProbabilityFactor(name='Burglary', sum_out=True),
+                 ProbabilityFactor(name='Alarm', sum_out=True),
+                 ProbabilityFactor(name='JohnCalls')]
+        partitions = parallel._partitions(self.network, order, task_count=4)
+        self.assertEqual(4, len(partitions))
+        for partition in partitions:
+            self.assertEqual([False, False, True], [factor.sum_out for factor in partition[:3]])
+        self.assertEqual(1, len(parallel._partitions(self.network, order, task_count=1)))
+
+    def test_parallel_inference_matches_enumeration(self):
+        queries = ['Burglary | JohnCalls = t, MaryCalls = t', 'Alarm, Earthquake | MaryCalls = f',
+                   'JohnCalls = t, MaryCalls = t, Alarm = t, Burglary = f, Earthquake = f',
+                   'MaryCalls']
+        with ParallelInference(self.network, processes=2) as parallel:
+            for query in queries:
+                self._assert_same_probabilities(
+                    self.network.P(query, engine=BayesianNetwork.ENUMERATION_ENGINE),
+                    parallel.P(query))
+
+            with self.assertRaises(InvalidQuery):
+                parallel.P('Burglary | ')
+
+    def test_continuous_variables_rejected_before_partitioning(self):
+        hybrid = BayesianNetwork([
+            NetworkNode(node_name='D', random_variables=['t', 'f'], predecessors=[],
+                        probabilities={'(t)': 0.3, '(f)': 0.7}, all_random_variables=[['t', 'f']]),
+            LinearGaussianNetworkNode('S', ['D'], {'(t)': LinearGaussian(0.0, 1.0),
+                                                   '(f)': LinearGaussian(4.0, 1.0)},
+                                      all_random_variables=[['t', 'f'], []])])
+        with ParallelInference(hybrid, processes=1) as parallel:
+            for query in ['S', 'D | S', 'D, S']:
+                with self.assertRaises(InvalidQuery):
+                    parallel.P(query)
+            self.assertIsNone(parallel._executor)
+            self.assertAlmostEqual(0.3, parallel.P('D = t'))
+
+    def test_pool_restarted_after_change(self):
+        with ParallelInference(self.network, processes=1) as parallel:
+            executor = parallel.executor
+            self.assertIs(executor, parallel.executor)
+            self.network.remove_node('MaryCalls')
+            self.assertIsNot(executor, parallel.executor)
+            self._assert_same_probabilities(self.network.P('Alarm | JohnCalls = t'),
+                                            parallel.P('Alarm | JohnCalls = t'))
+
+
+class SnapshotIsolationTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+        self.mary_calls = self.network.nodes['MaryCalls']
+
+    def test_pinned_view_keeps_its_version(self):
+        view = self.network.pinned()
+        self.assertIs(view, view.pinned())
+        nodes, graph, version = self.network.nodes, self.network.G, self.network.version
+
+        self.assertTrue(self.network.remove_node('MaryCalls'))
+        # Published state is replaced rather than changed in place
+        self.assertIn('MaryCalls', nodes)
+        self.assertIn('MaryCalls', graph)
+        self.assertEqual(version, view.version)
+        self.assertIn('MaryCalls', view.nodes)
+        self.assertAlmostEqual(0.7, view.P('MaryCalls = t | Alarm = t'))
+        self.assertNotIn('MaryCalls', self.network.nodes)
+        self.assertEqual(version + 1, self.network.version)
+
+    def test_pinned_view_is_read_only(self):
+        view = self.network.pinned()
+        with self.assertRaises(ReadOnlyNetwork):
+            view.remove_node('MaryCalls')
+        with self.assertRaises(ReadOnlyNetwork):
+            view.add_node(NetworkNode('X', ['t'], [], {'(t)': 1.0}, [['t']]))
+        self.assertIn('MaryCalls', self.network.nodes)
+
+    def test_query_sees_single_version(self):
+        seen_versions = []
+        original = BayesianNetwork._calculate_joint_probability
+
+        def calculate_and_change(network, variables, **kwargs):
+            seen_versions.append(network.version)
+            # Writer changes the network between nominator and denominator calculation
+            if len(seen_versions) == 1:
+                self.network.remove_node('MaryCalls')
+            return original(network, variables, **kwargs)
+
+        with mock.patch.object(BayesianNetwork, '_calculate_joint_probability',
+                               autospec=True, side_effect=calculate_and_change):
+            p = self.network.P('MaryCalls = t | Alarm = t')
+        self.assertAlmostEqual(0.7, p)
+        self.assertEqual(1, len(set(seen_versions)))
+        self.assertNotIn('MaryCalls', self.network.nodes)
+
+    def test_concurrent_readers_and_writer(self):
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            while not stop.is_set():
+                try:
+                    p = self.network.P('Alarm | JohnCalls = t')
+                    self.assertAlmostEqual(1.0, sum(p.values()))
+                except Exception as e:
+                    errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for _ in range(50):
+            self.network.remove_node('MaryCalls')
+            self.network.add_node(self.mary_calls)
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+        self.assertListEqual([], errors)
+        self.assertEqual(5, len(self.network.nodes))
+
+    def test_pickle(self):
+        import pickle
+        network = pickle.loads(pickle.dumps(self.network))
+        self.assertAlmostEqual(self.network.P('Alarm = t'), network.P('Alarm = t'))
+        self.assertTrue(network.remove_node('MaryCalls'))
+        self.assertIn('MaryCalls', self.network.nodes)
+
+
+class FactorTest(TestCase):
+
+    def test_product_and_marginalize(self):
+        a = Factor(['A'], [2], [0.4, 0.6])
+        b_given_a = Factor(['A', 'B'], [2, 2], [0.1, 0.9, 0.7, 0.3])
+        joint = b_given_a.product(a)
+        self.assertTupleEqual(('A', 'B'), joint.variables)
+        for expected, actual in zip([0.04, 0.36, 0.42, 0.18], joint.values):
+            self.assertAlmostEqual(expected, actual)
+
+        b = joint.marginalize('A')
+        self.assertTupleEqual(('B',), b.variables)
+        self.assertAlmostEqual(0.46, b.values[0])
+        for expected, actual in zip([0.42, 0.36], joint.marginalize('A', add=max).values):
+            self.assertAlmostEqual(expected, actual)
+
+    def test_reduce(self):
+        factor = Factor(['A', 'B', 'C'], [2, 3, 2], list(range(12)))
+        reduced = factor.reduce({'B': 2})
+        self.assertTupleEqual(('A', 'C'), reduced.variables)
+        self.assertListEqual([4, 5, 10, 11], reduced.values)
+        self.assertEqual(11, factor.value({'A': 1, 'B': 2, 'C': 1}))
+
+    def test_elimination_order(self):
+        # Eliminating the hub of the star first would connect all leaves
+        factors = [Factor(['H', leaf], [2, 2], [0] * 4) for leaf in ['A', 'B', 'C']]
+        order = elimination_order(factors, ['A', 'B', 'C', 'H'])
+        self.assertEqual('H', order[-1])
+        self.assertListEqual(['A', 'B', 'C', 'H'], sorted(order))
+
+
+class ArithmeticCircuitTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+        self.circuit = ArithmeticCircuit.compile(self.network)
+
+    def _assert_same_probabilities(self, expected, actual):
+        PolytreeInferenceTest._assert_same_probabilities(self, expected, actual)
+
+    def test_queries_match_enumeration(self):
+        queries = [
+            'Burglary | JohnCalls = t, MaryCalls = t', 'Alarm, Earthquake | MaryCalls = f',
+            'JohnCalls = t, MaryCalls = t, Alarm = t, Burglary = f, Earthquake = f',
+            'Burglary = t | JohnCalls = t', 'MaryCalls',
+        ]
+        for query in queries:
+            self._assert_same_probabilities(self.network.P(query), self.circuit.P(query))
+        self.assertAlmostEqual(1.0, self.circuit.evaluate())
+
+    def test_marginals_match_enumeration(self):
+        evidence = {'JohnCalls': 't', 'MaryCalls': 't'}
+        marginals = self.circuit.marginals(evidence)
+        for name in ['Burglary', 'Earthquake', 'Alarm']:
+            expected = self.network.P(f'{name} | JohnCalls = t, MaryCalls = t')
+            for value, probability in marginals[name].items():
+                self.assertAlmostEqual(expected[str({name: value})], probability)
+        self.assertDictEqual({'t': 1.0, 'f': 0.0}, marginals['JohnCalls'])
+
+    def test_zero_and_repeated_probabilities_are_pruned(self):
+        network = BayesianNetwork(initial_network=[
+            NetworkNode('A', ['t', 'f'], [], {'(t)': 0.5, '(f)': 0.5}, [['t', 'f']]),
+            NetworkNode('B', ['t', 'f'], ['A'], {'(t,t)': 1.0, '(t,f)': 0.0, '(f,t)': 0.5,
+                                                 '(f,f)': 0.5}, [['t', 'f'], ['t', 'f']])])
+        circuit = ArithmeticCircuit.compile(network)
+        parameters = [payload for kind, payload in zip(circuit.kinds, circuit.payloads) if
+                      kind == ArithmeticCircuit.PARAMETER]
+        self.assertEqual(len(parameters), len(set(parameters)))
+        self.assertAlmostEqual(0.0, circuit.evaluate({'A': 't', 'B': 'f'}))
+        self.assertAlmostEqual(0.75, circuit.evaluate({'B': 't'}))
+        self.assertDictEqual({'t': 2 / 3, 'f': 1 / 3}, circuit.marginals({'B': 't'})['A'])
+
+    def test_serialization(self):
+        file = io.StringIO()
+        self.circuit.dump(file)
+        file.seek(0)
+        circuit = ArithmeticCircuit.load(file)
+        self.assertEqual(len(self.circuit), len(circuit))
+        self._assert_same_probabilities(self.circuit.P('Alarm | JohnCalls = t'),
+                                        circuit.P('Alarm | JohnCalls = t'))
+
+    def test_invalid_evidence(self):
+        with self.assertRaises(VariableNotInGraph):
+            self.circuit.evaluate({'Unknown': 't'})
+        with self.assertRaises(InvalidQuery):
+            self.circuit.evaluate({'Alarm': 'maybe'})
+        self.network.add_node(NetworkNode('Lonely', ['t', 'f'], ['Missing'], {}, []))
+        with self.assertRaises(VariableNotInGraph):
+            ArithmeticCircuit.compile(self.network)
+
+
+class MarginalsTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+        # Diamond where Alarm has two paths from Cause
+        self.diamond = BayesianNetwork(initial_network=[
+            NetworkNode('Cause', ['t', 'f'], [], {'(t)': 0.3, '(f)': 0.7}, [['t', 'f']]),
+            NetworkNode('Left', ['t', 'f'], ['Cause'], {'(t,t)': 0.8, '(t,f)': 0.2,
+                                                        '(f,t)': 0.1, '(f,f)': 0.9},
+                        [['t', 'f'], ['t', 'f']]),
+            NetworkNode('Right', ['t', 'f'], ['Cause'], {'(t,t)': 0.6, '(t,f)': 0.4,
+                                                         '(f,t)': 0.5, '(f,f)': 0.5},
+                        [['t', 'f'], ['t', 'f']]),
+            NetworkNode('Effect', ['t', 'f'], ['Left', 'Right'], {
+                '(t,t,t)': 0.9, '(t,t,f)': 0.1, '(t,f,t)': 0.7, '(t,f,f)': 0.3,
+                '(f,t,t)': 0.4, '(f,t,f)': 0.6, '(f,f,t)': 0.05, '(f,f,f)': 0.95},
+                        [['t', 'f'], ['t', 'f'], ['t', 'f']])])
+
+    def _assert_match_queries(self, network, marginals, evidence_query):
+        for name, distribution in marginals.items():
+            expected = network.P(f'{name} | {evidence_query}')
+            for value, probability in distribution.items():
+                self.assertAlmostEqual(expected[str({name: value})], probability)
+
+    def test_polytree_marginals(self):
+        marginals = self.network.marginals({'JohnCalls': 't', 'MaryCalls': 't'},
+                                           variables=['Burglary', 'Earthquake', 'Alarm'])
+        self.assertSetEqual({'Burglary', 'Earthquake', 'Alarm'}, set(marginals))
+        self._assert_match_queries(self.network, marginals, 'JohnCalls = t, MaryCalls = t')
+
+    def test_polytree_marginals_of_disconnected_network(self):
+        # Evidence is in the other component than the queried variables
+        self.network.add_node(NetworkNode('Rain', ['t', 'f'], [], {'(t)': 0.2, '(f)': 0.8},
+                                          [['t', 'f']]))
+        self.network.add_node(NetworkNode('Wet', ['t', 'f'], ['Rain'], {
+            '(t,t)': 0.9, '(t,f)': 0.1, '(f,t)': 0.3, '(f,f)': 0.7}, [['t', 'f'], ['t', 'f']]))
+        marginals = self.network.marginals({'Wet': 't', 'JohnCalls': 't'},
+                                           variables=['Burglary', 'Rain'])
+        self._assert_match_queries(self.network, marginals, 'Wet = t, JohnCalls = t')
+        marginals = self.network.marginals({'Wet': 't'}, variables=['Burglary'])
+        self.assertAlmostEqual(0.001, marginals['Burglary']['t'])
+
+    def test_circuit_marginals(self):
+        with self.assertRaises(NotPolytreeNetwork):
+            self.diamond.marginals({'Effect': 't'}, engine=BayesianNetwork.POLYTREE_ENGINE)
+        marginals = self.diamond.marginals({'Effect': 't'})
+        self.assertDictEqual({'t': 1.0, 'f': 0.0}, marginals['Effect'])
+        del marginals['Effect']
+        self._assert_match_queries(self.diamond, marginals, 'Effect = t')
+
+        # Circuit is compiled once for each version
+        with mock.patch.object(ArithmeticCircuit, 'from_nodes',
+                               wraps=ArithmeticCircuit.from_nodes) as from_nodes:
+            self.diamond.marginals({'Effect': 'f'})
+            self.diamond.marginals({'Left': 'f'})
+            from_nodes.assert_not_called()
+            self.diamond.add_node(NetworkNode('Other', ['t'], [], {'(t)': 1.0}, [['t']]))
+            self.diamond.marginals({'Left': 'f'})
+            from_nodes.assert_called_once()
+
+    def test_invalid_marginals(self):
+        with self.assertRaises(VariableNotInGraph):
+            self.network.marginals({'Unknown': 't'})
+        with self.assertRaises(InvalidQuery):
+            self.network.marginals({'Alarm': 'maybe'})
+        with self.assertRaises(InvalidQuery):
+            self.network.marginals(engine='magic')
+
+
+class ExplanationTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+
+    def _expected(self, variables, evidence_query, k):
+        probabilities = self.network.P(f'{", ".join(variables)} | {evidence_query}')
+        return sorted(probabilities.items(), key=lambda item: -item[1])[:k]
+
+    def _assert_explanations(self, expected, explanations):
+        self.assertEqual(len(expected), len(explanations))
+        for (context, probability), explanation in zip(expected, explanations):
+            self.assertIsInstance(explanation, Explanation)
+            self.assertEqual(context, str({name: explanation.assignment[name] for name in
+                                           eval(context)}))
+            self.assertAlmostEqual(probability, explanation.probability)
+
+    def test_mpe(self):
+        explanations = self.network.mpe({'JohnCalls': 't', 'MaryCalls': 't'}, k=3)
+        self._assert_explanations(self._expected(
+            ['Burglary', 'Earthquake', 'Alarm'], 'JohnCalls = t, MaryCalls = t', 3), explanations)
+
+    def test_mpe_excludes_impossible_assignments(self):
+        network = BayesianNetwork(initial_network=[
+            NetworkNode('A', ['t', 'f'], [], {'(t)': 1.0, '(f)': 0.0}, [['t', 'f']])])
+        explanations = network.mpe(k=2)
+        self.assertEqual(1, len(explanations))
+        self.assertDictEqual({'A': 't'}, explanations[0].assignment)
+
+    def test_map(self):
+        explanations = self.network.map(['Burglary', 'Earthquake'], {'JohnCalls': 't'}, k=3)
+        self._assert_explanations(self._expected(['Burglary', 'Earthquake'], 'JohnCalls = t', 3),
+                                  explanations)
+        explanations = self.network.map(['Alarm'], {'Burglary': 't'})
+        self._assert_explanations(self._expected(['Alarm'], 'Burglary = t', 1), explanations)
+
+    def test_invalid_explanation(self):
+        with self.assertRaises(VariableNotInGraph):
+            self.network.mpe({'Unknown': 't'})
+        with self.assertRaises(InvalidQuery):
+            self.network.map(['Alarm'], {'Alarm': 't'})
+
+
+class RuleNetworkNodeTest(TestCase):
+
+    def setUp(self) -> None:
+        binary = ['t', 'f']
+        self.roots = [NetworkNode(name, binary, [], {'(t)': p, '(f)': 1 - p}, [binary]) for
+                      name, p in [('A', 0.2), ('B', 0.6), ('C', 0.7)]]
+        self.rule_node = RuleNetworkNode(
+            'D', binary, ['A', 'B', 'C'],
+            rules=[({'A': 't', 'B': 't'}, {'t': 0.9, 'f': 0.1}),
+                   ({'A': 't'}, {'t': 0.5, 'f': 0.5})],
+            default={'t': 0.05, 'f': 0.95}, all_random_variables=[binary] * 4)
+        self.network = BayesianNetwork(initial_network=self.roots + [self.rule_node])
+
+        dense_node = NetworkNode('D', binary, ['A', 'B', 'C'], dict(self.rule_node.probabilities),
+                                 [binary] * 4)
+        self.dense_network = BayesianNetwork(initial_network=self.roots + [dense_node])
+
+    def test_rules_match_dense_table(self):
+        queries = ['D | A = t', 'A | D = t', 'B, C | D = f', 'D']
+        for query in queries:
+            expected = self.dense_network.P(query)
+            for engine in [BayesianNetwork.ENUMERATION_ENGINE, BayesianNetwork.POLYTREE_ENGINE]:
+                PolytreeInferenceTest._assert_same_probabilities(
+                    self, expected, self.network.P(query, engine=engine))
+        self.assertAlmostEqual(self.dense_network.marginals({'D': 't'})['B']['t'],
+                               self.network.marginals({'D': 't'})['B']['t'])
+
+    def test_unreferred_predecessor_is_pruned(self):
+        self.assertListEqual(['A', 'B'], self.rule_node.relevant_predecessors)
+        self.assertSetEqual({'A', 'B', 'D'},
+                            self.network._eliminate_unnecessary_variables({'D'}))
+        self.assertSetEqual({'A', 'B', 'C', 'D'},
+                            self.dense_network._eliminate_unnecessary_variables({'D'}))
+
+    def test_probabilities_are_not_updated(self):
+        version = self.network.version
+        with self.assertRaises(NotAllExpectedProbabilityExist):
+            self.network.update_probabilities('D', dict(self.rule_node.probabilities))
+        self.assertIs(self.rule_node, self.network.nodes['D'])
+        self.assertEqual(version, self.network.version)
+
+    def test_table_representation(self):
+        table = str(self.rule_node)
+        self.assertIn('P(D=t)', table)
+        self.assertEqual(2 + 3, len(table.splitlines()))
+
+    def test_rules_are_not_expanded(self):
+        binary = ['t', 'f']
+        roots = [NetworkNode(f'P{i}', binary, [], {'(t)': 0.3, '(f)': 0.7}, [binary]) for i in
+                 range(12)]
+        names = [root.node_name for root in roots]
+        node = RuleNetworkNode('X', binary, names, rules=[
+            ({names[i]: 't', names[(i + 1) % 12]: 't'}, {'t': 0.1 + 0.05 * i, 'f': 0.9 - 0.05 * i})
+            for i in range(12)], default={'t': 0.01, 'f': 0.99}, all_random_variables=[binary] * 13)
+        # Loop between P0 and Y through X
+        child = NetworkNode('Y', binary, ['P0', 'X'], {
+            '(t,t,t)': 0.9, '(t,t,f)': 0.1, '(t,f,t)': 0.5, '(t,f,f)': 0.5, '(f,t,t)': 0.4,
+            '(f,t,f)': 0.6, '(f,f,t)': 0.2, '(f,f,f)': 0.8}, [binary] * 3)
+        network = BayesianNetwork(roots + [node, child])
+        dense_network = BayesianNetwork(roots + [NetworkNode(
+            'X', binary, names, dict(node.probabilities), [binary] * 13), child])
+        values_of = network.symbol_context
+        self.assertLess(node.factor_size(values_of), node.table_size(values_of))
+        self.assertLess(len(node.factors(values_of)[0]), node.table_size(values_of))
+
+        queries = ['X', 'P3 | X = t', 'P0 | Y = t']
+        expected = [dense_network.P(query, engine=BayesianNetwork.CIRCUIT_ENGINE) for query in
+                    queries]
+        expected_marginals = dense_network.marginals({'X': 't'},
+                                                     engine=BayesianNetwork.CIRCUIT_ENGINE)
+        with mock.patch.object(RuleNetworkNode, 'probability', side_effect=AssertionError):
+            for query, probability in zip(queries, expected):
+                for engine in [None, BayesianNetwork.CIRCUIT_ENGINE,
+                               BayesianNetwork.RECURSIVE_CONDITIONING_ENGINE]:
+                    PolytreeInferenceTest._assert_same_probabilities(
+                        self, probability, network.P(query, engine=engine))
+            self.assertEqual(BayesianNetwork.POLYTREE_ENGINE,
+                             network.P('X', return_stats=True)[1].engine)
+            self.assertEqual(BayesianNetwork.CIRCUIT_ENGINE,
+                             network.P('P0 | Y = t', return_stats=True)[1].engine)
+            marginals = network.marginals({'X': 't'})
+            for name in names:
+                self.assertAlmostEqual(expected_marginals[name]['t'], marginals[name]['t'])
+
+    def test_auxiliary_names_are_reserved(self):
+        self.assertListEqual(["D'1", "D'2"], self.rule_node.auxiliary_names)
+        binary = ['t', 'f']
+        self.assertFalse(self.network.add_node(NetworkNode("D'2", binary, [], {
+            '(t)': 0.5, '(f)': 0.5}, [binary])))
+        self.assertTrue(self.network.add_node(NetworkNode("D'3", binary, [], {
+            '(t)': 0.5, '(f)': 0.5}, [binary])))
+
+
+class NoisyMaxNetworkNodeTest(TestCase):
+
+    def setUp(self) -> None:
+        binary = ['f', 't']
+        self.causes = [NetworkNode(f'U{i}', binary, [], {'(f)': 0.7, '(t)': 0.3}, [binary]) for
+                       i in range(5)]
+        names = [cause.node_name for cause in self.causes]
+        self.noisy_or = NoisyMaxNetworkNode.noisy_or(
+            'X', binary, names, {name: {'t': 0.1 * (i + 2)} for i, name in enumerate(names)},
+            leak=0.05, all_random_variables=[binary] * 6)
+        self.network = BayesianNetwork(initial_network=self.causes + [self.noisy_or])
+        self.dense_network = BayesianNetwork(initial_network=self.causes + [NetworkNode(
+            'X', binary, names, dict(self.noisy_or.probabilities), [binary] * 6)])
+
+    def test_noisy_or_probability(self):
+        context = {'U0': 't', 'U1': 'f', 'U2': 't', 'U3': 'f', 'U4': 'f'}
+        self.assertAlmostEqual(0.95 * 0.8 * 0.6, self.noisy_or.probability(X='f', **context))
+        self.assertAlmostEqual(1 - 0.95 * 0.8 * 0.6, self.noisy_or.probability(X='t', **context))
+
+    def test_noisy_max_probability(self):
+        states = ['none', 'mild', 'severe']
+        node = NoisyMaxNetworkNode(
+            'Y', states, ['U0', 'U1'],
+            {'U0': {'t': {'none': 0.2, 'mild': 0.5, 'severe': 0.3}},
+             'U1': {'t': {'none': 0.6, 'mild': 0.1, 'severe': 0.3}}},
+            leak={'none': 0.9, 'mild': 0.08, 'severe': 0.02},
+            all_random_variables=[['f', 't'], ['f', 't'], states])
+        # Maximum of the causes is at most mild if each of them is at most mild
+        self.assertAlmostEqual(0.98 * 0.7 * 0.7 - 0.9 * 0.2 * 0.6,
+                               node.probability(U0='t', U1='t', Y='mild'))
+        self.assertAlmostEqual(0.08, node.probability(U0='f', U1='f', Y='mild'))
+        self.assertAlmostEqual(1.0, sum(node.probability(U0='t', U1='f', Y=state) for state in
+                                        states))
+
+    def test_auxiliary_name_is_reserved(self):
+        binary = ['f', 't']
+        self.assertFalse(self.network.add_node(NetworkNode("X'", binary, [], {
+            '(f)': 0.5, '(t)': 0.5}, [binary])))
+        # Noisy-MAX node is not added if its auxiliary name is taken
+        network = BayesianNetwork(initial_network=self.causes + [NetworkNode(
+            "X'", binary, [], {'(f)': 0.5, '(t)': 0.5}, [binary])])
+        self.assertFalse(network.add_node(self.noisy_or))
+        self.assertNotIn('X', network.nodes)
+
+    def test_probabilities_are_not_updated(self):
+        with self.assertRaises(NotAllExpectedProbabilityExist):
+            self.network.update_probabilities('X', dict(self.noisy_or.probabilities))
+        self.assertIs(self.noisy_or, self.network.nodes['X'])
+
+    def test_decomposition_matches_dense_table(self):
+        queries = ['X', 'U0 | X = t', 'U1, U2 | X = t, U3 = f']
+        for query in queries:
+            expected = self.dense_network.P(query)
+            for engine in [BayesianNetwork.ENUMERATION_ENGINE, BayesianNetwork.CIRCUIT_ENGINE]:
+                PolytreeInferenceTest._assert_same_probabilities(
+                    self, expected, self.network.P(query, engine=engine))
+        self.assertAlmostEqual(self.dense_network.P('U0 = t | X = t'),
+                               self.network.marginals({'X': 't'})['U0']['t'])
+
+        # Factors grow linearly with the number of causes
+        factors = self.noisy_or.factors(self.network.symbol_context)
+        self.assertEqual(2 + len(self.causes), len(factors))
+        self.assertEqual(4, max(len(factor) for factor in factors))
+        self.assertLess(len(ArithmeticCircuit.compile(self.network)),
+                        len(ArithmeticCircuit.compile(self.dense_network)))
+
+    def test_probabilities_are_not_expanded(self):
+        binary = ['f', 't']
+        causes = [NetworkNode(f'U{i}', binary, [], {'(f)': 0.8, '(t)': 0.2}, [binary]) for i in
+                  range(12)]
+        names = [cause.node_name for cause in causes]
+        node = NoisyMaxNetworkNode.noisy_or(
+            'X', binary, names, {name: {'t': 0.3 + 0.05 * i} for i, name in enumerate(names)},
+            leak=0.02, all_random_variables=[binary] * 13)
+        # Loop between U0 and Y through X
+        child = NetworkNode('Y', binary, ['U0', 'X'], {
+            '(f,f,f)': 0.9, '(f,f,t)': 0.1, '(f,t,f)': 0.3, '(f,t,t)': 0.7, '(t,f,f)': 0.6,
+            '(t,f,t)': 0.4, '(t,t,f)': 0.2, '(t,t,t)': 0.8}, [binary] * 3)
+        network = BayesianNetwork(causes + [node, child])
+        dense_network = BayesianNetwork(causes + [NetworkNode(
+            'X', binary, names, dict(node.probabilities), [binary] * 13), child])
+
+        queries = ['X', 'U3 | X = t', 'U0 | Y = t']
+        expected = [dense_network.P(query, engine=BayesianNetwork.CIRCUIT_ENGINE) for query in
+                    queries]
+        expected_marginals = dense_network.marginals({'X': 't'},
+                                                     engine=BayesianNetwork.CIRCUIT_ENGINE)
+        expected_mpe = dense_network.mpe({'Y': 't'}, k=2)
+        expected_map, = dense_network.map(['U0', 'U1'], {'X': 't'})
+        with mock.patch.object(NoisyMaxNetworkNode, 'probability', side_effect=AssertionError), \
+                mock.patch.object(NoisyMaxNetworkNode, '_expand_probabilities',
+                                  side_effect=AssertionError):
+            for query, probability in zip(queries, expected):
+                for engine in [None, BayesianNetwork.CIRCUIT_ENGINE,
+                               BayesianNetwork.RECURSIVE_CONDITIONING_ENGINE]:
+                    PolytreeInferenceTest._assert_same_probabilities(
+                        self, probability, network.P(query, engine=engine))
+            self.assertEqual(BayesianNetwork.POLYTREE_ENGINE,
+                             network.P('X', return_stats=True)[1].engine)
+            self.assertEqual(BayesianNetwork.CIRCUIT_ENGINE,
+                             network.P('U0 | Y = t', return_stats=True)[1].engine)
+            marginals = network.marginals({'X': 't'})
+            for name in names:
+                self.assertAlmostEqual(expected_marginals[name]['t'], marginals[name]['t'])
+            for explanation, expected_explanation in zip(network.mpe({'Y': 't'}, k=2),
+                                                         expected_mpe):
+                self.assertDictEqual(expected_explanation.assignment, explanation.assignment)
+                self.assertAlmostEqual(expected_explanation.probability, explanation.probability)
+            explanation, = network.map(['U0', 'U1'], {'X': 't'})
+            self.assertDictEqual(expected_map.assignment, explanation.assignment)
+            self.assertAlmostEqual(expected_map.probability, explanation.probability)
+
+
+class StructuredQueryTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+
+    def test_structured_query_matches_textual_one(self):
+        table = self.network.P(['Burglary', 'Earthquake'],
+                               evidence={'JohnCalls': 't', 'MaryCalls': 't'})
+        expected = self.network.P('Burglary, Earthquake | JohnCalls = t, MaryCalls = t')
+        self.assertIsInstance(table, ProbabilityTable)
+        self.assertTupleEqual(('Burglary', 'Earthquake'), table.variables)
+        self.assertListEqual([('t', 't'), ('t', 'f'), ('f', 't'), ('f', 'f')], list(table))
+        self.assertDictEqual(expected, table.to_dict())
+        self.assertAlmostEqual(expected[str({'Burglary': 't', 'Earthquake': 'f'})],
+                               table['t', 'f'])
+        self.assertEqual(table['t', 'f'], table[{'Earthquake': 'f', 'Burglary': 't'}])
+        with self.assertRaises(KeyError):
+            _ = table['t', 'x']
+
+    def test_structured_query_with_values(self):
+        self.assertAlmostEqual(self.network.P('Burglary = t | JohnCalls = t'),
+                               self.network.P({'Burglary': 't'}, evidence={'JohnCalls': 't'}))
+        table = self.network.P({'Alarm': None, 'Burglary': 't'})
+        self.assertTupleEqual(('Alarm',), table.variables)
+        self.assertAlmostEqual(self.network.P('Alarm = f, Burglary = t'), table['f'])
+
+    def test_structured_query_skips_parser(self):
+        with mock.patch('bayesian_inference.entity.bayesian_network.query_parser') as parser:
+            self.network.P(['Alarm'], evidence={'Burglary': 't'})
+            parser.assert_not_called()
+
+    def test_invalid_structured_query(self):
+        from ..exceptions.exceptions import RandomVariableNotInContext
+        with self.assertRaises(RandomVariableNotInContext):
+            self.network.P(['Unknown'])
+        with self.assertRaises(InvalidQuery):
+            self.network.P('Alarm', evidence={'Burglary': 't'})
+
+
+class ProbabilityTableTest(TestCase):
+
+    def setUp(self) -> None:
+        self.table = ProbabilityTable(['A', 'B'], [['t', 'f'], ['x', 'y', 'z']],
+                                      [0.1, 0.2, 0.3, 0.05, 0.15, 0.2])
+
+    def test_array(self):
+        self.assertTupleEqual((2, 3), self.table.array.shape)
+        self.assertEqual(6, len(self.table))
+        self.assertAlmostEqual(0.15, self.table['f', 'y'])
+        self.assertAlmostEqual(0.15, self.table[{'B': 'y', 'A': 'f'}])
+
+    def test_marginalize(self):
+        marginal = self.table.marginalize('A')
+        self.assertTupleEqual(('B',), marginal.variables)
+        self.assertAlmostEqual(0.35, marginal['y'])
+        self.assertAlmostEqual(1.0, self.table.marginalize('A', 'B'))
+
+    def test_argmax(self):
+        self.assertDictEqual({'A': 't', 'B': 'z'}, self.table.argmax())
+        self.assertDictEqual({'A': 't'}, self.table.marginalize('B').argmax())
+
+    def test_transpose_and_to_dict(self):
+        transposed = self.table.transpose(['B', 'A'])
+        self.assertTupleEqual((3, 2), transposed.array.shape)
+        self.assertEqual(self.table['f', 'x'], transposed['x', 'f'])
+        self.assertAlmostEqual(0.05, self.table.to_dict()[str({'A': 'f', 'B': 'x'})])
+        self.assertEqual(set(self.table.to_dict().values()),
+                         set(transposed.to_dict().values()))
+
+    def test_network_result(self):
+        from ..input_parser.input_parser import InputParser
+        network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network))
+        table = network.P(['Burglary', 'Earthquake'], evidence={'JohnCalls': 't'})
+        self.assertAlmostEqual(1.0, float(table.array.sum()))
+        self.assertAlmostEqual(network.P('Burglary | JohnCalls = t')[str({'Burglary': 't'})],
+                               table.marginalize('Earthquake')['t'])
+
+
+class DirectedGraphTest(TestCase):
+
+    def setUp(self) -> None:
+        self.graph = DirectedGraph()
+        for source, target in [('B', 'A'), ('E', 'A'), ('A', 'J'), ('A', 'M')]:
+            self.graph.add_edge(source, target)
+
+    def test_nodes_and_edges(self):
+        self.assertListEqual(['B', 'A', 'E', 'J', 'M'], self.graph.nodes)
+        self.assertEqual(4, len(self.graph.edges))
+        self.assertListEqual(['B', 'E'], self.graph.predecessors('A'))
+        self.assertListEqual(['J', 'M'], self.graph.successors('A'))
+        self.graph.add_edge('B', 'A')
+        self.assertEqual(4, self.graph.edge_count)
+
+    def test_remove_node_and_copy(self):
+        self.graph.remove_node('A')
+        self.assertNotIn('A', self.graph)
+        self.assertEqual(0, self.graph.edge_count)
+        copied = self.graph.copy()
+        copied.add_edge('J', 'K')
+        self.assertListEqual(['B', 'E', 'J', 'M', 'K'], copied.nodes)
+        self.assertListEqual([('J', 'K')], copied.edges)
+        self.assertNotIn('K', self.graph)
+
+    def test_topological_sort(self):
+        # Nodes without predecessors are kept in a stack as in networkx 2.4
+        self.assertListEqual(['E', 'B', 'A', 'M', 'J'], self.graph.topological_sort())
+        self.graph.add_edge('M', 'J')
+        self.assertListEqual(['E', 'B', 'A', 'M', 'J'], self.graph.topological_sort())
+
+    def test_paths(self):
+        self.assertTrue(self.graph.has_path(['B'], ['J', 'X']))
+        self.assertFalse(self.graph.has_path(['J'], ['B']))
+        self.assertTrue(self.graph.is_connected('J', 'B'))
+        self.assertFalse(self.graph.is_connected('J', 'B', excluded=['A']))
+
+    def test_to_networkx(self):
+        graph = self.graph.to_networkx()
+        self.assertListEqual(self.graph.nodes, list(graph.nodes))
+        self.assertListEqual(self.graph.edges, list(graph.edges))
+
+    def test_cycle_is_rejected(self):
+        network = BayesianNetwork([])
+        for name, predecessors in [('A', ['C']), ('B', ['A']), ('C', ['B'])]:
+            network.add_node(NetworkNode(node_name=name, predecessors=predecessors,
+                                         random_variables=[], probabilities={},
+                                         all_random_variables=[]))
+        self.assertNotIn('C', network.G)
+        self.assertListEqual([('A', 'B')], network.G.edges)
+
+
+class GaussianInferenceTest(TestCase):
+
+    def setUp(self) -> None:
+        # X ~ N(1, 4), Y = 2X + 3 + N(0, 1) and Z = Y - X + N(0, 0.5)
+        self.network = BayesianNetwork([
+            LinearGaussianNetworkNode('X', [], LinearGaussian(intercept=1.0, variance=4.0)),
+            LinearGaussianNetworkNode('Y', ['X'], LinearGaussian(3.0, 1.0, {'X': 2.0})),
+            LinearGaussianNetworkNode('Z', ['X', 'Y'],
+                                      LinearGaussian(0.0, 0.5, {'X': -1.0, 'Y': 1.0}))])
+        # D ~ (0.3, 0.7) and S | D ~ N(0, 1) if D = t, N(4, 1) otherwise
+        self.hybrid = BayesianNetwork([
+            NetworkNode(node_name='D', random_variables=['t', 'f'], predecessors=[],
+                        probabilities={'(t)': 0.3, '(f)': 0.7}, all_random_variables=[['t', 'f']]),
+            LinearGaussianNetworkNode('S', ['D'], {'(t)': LinearGaussian(0.0, 1.0),
+                                                   '(f)': LinearGaussian(4.0, 1.0)},
+                                      all_random_variables=[['t', 'f'], []])])
+
+    def test_prior(self):
+        posterior = self.network.gaussian(['X', 'Y'])
+        self.assertListEqual(['X', 'Y'], posterior.variables)
+        self.assertTrue(numpy.allclose([1.0, 5.0], posterior.mean))
+        self.assertTrue(numpy.allclose([[4.0, 8.0], [8.0, 17.0]], posterior.covariance))
+
+    def test_posterior(self):
+        posterior = self.network.gaussian(['X'], evidence={'Y': 9.0})
+        # Conditioning of the joint Gaussian in moment form
+        self.assertAlmostEqual(1.0 + 8.0 / 17.0 * (9.0 - 5.0), posterior.mean[0])
+        self.assertAlmostEqual(4.0 - 64.0 / 17.0, posterior.covariance[0, 0])
+        # Density integrates to one
+        points = [posterior.mean[0] + step * 0.01 for step in range(-500, 501)]
+        self.assertAlmostEqual(1.0, sum(posterior.density(X=x) for x in points) * 0.01, places=4)
+
+    def test_hybrid_posterior(self):
+        posterior = self.hybrid.gaussian(['D'], evidence={'S': 1.0})
+        likelihood_t = 0.3 * math.exp(-0.5 * 1.0 ** 2)
+        likelihood_f = 0.7 * math.exp(-0.5 * 3.0 ** 2)
+        self.assertAlmostEqual(likelihood_t / (likelihood_t + likelihood_f),
+                               posterior.probability('D')['t'])
+
+        posterior = self.hybrid.gaussian(['S'])
+        self.assertEqual(2, len(posterior.components))
+        self.assertAlmostEqual(0.7 * 4.0, posterior.mean[0])
+        self.assertAlmostEqual(1.0 + 0.3 * 0.7 * 16.0, posterior.covariance[0, 0])
+        posterior = self.hybrid.gaussian(['S'], evidence={'D': 't'})
+        self.assertAlmostEqual(0.0, posterior.mean[0])
+
+    def test_invalid_gaussian_query(self):
+        with self.assertRaises(InvalidQuery):
+            self.network.P('X')
+        with self.assertRaises(InvalidQuery):
+            self.network.gaussian(['X'], evidence={'X': 1.0})
+        with self.assertRaises(VariableNotInGraph):
+            self.network.gaussian(['W'])
+        with self.assertRaises(InvalidQuery):
+            self.hybrid.gaussian(['S'], evidence={'D': 'x'})
+        self.hybrid.update_probabilities('D', {'(t)': 1.0, '(f)': 0.0})
+        with self.assertRaises(InvalidQuery):
+            self.hybrid.gaussian(['S'], evidence={'D': 'f'})
+
+    def test_discrete_inference_of_hybrid_network(self):
+        values = ['t', 'f']
+        self.hybrid.add_node(NetworkNode('E', values, ['D'], {
+            '(t,t)': 0.9, '(t,f)': 0.1, '(f,t)': 0.2, '(f,f)': 0.8}, [values, values]))
+        # Continuous variables are left out of default variables and circuits
+        marginals = self.hybrid.marginals({'E': 't'})
+        self.assertSetEqual({'D', 'E'}, set(marginals))
+        self.assertAlmostEqual(self.hybrid.P('D = t | E = t'), marginals['D']['t'])
+        explanation, = self.hybrid.mpe({'D': 't'})
+        self.assertDictEqual({'E': 't'}, explanation.assignment)
+        self.assertAlmostEqual(0.9, explanation.probability)
+        explanation, = self.hybrid.map(['D'], {'E': 't'})
+        self.assertDictEqual({'D': 't'}, explanation.assignment)
+        circuit = ArithmeticCircuit.compile(self.hybrid)
+        self.assertSetEqual({'D', 'E'}, set(circuit.variables))
+        self.assertAlmostEqual(self.hybrid.P('E = t'), circuit.P('E = t'))
+
+        for call in [lambda: self.hybrid.marginals(variables=['S']),
+                     lambda: self.hybrid.marginals({'S': '1.0'}),
+                     lambda: self.hybrid.mpe({'S': '1.0'}),
+                     lambda: self.hybrid.map(['S'], {'E': 't'}),
+                     lambda: ArithmeticCircuit.from_nodes(self.hybrid.nodes)]:
+            with self.assertRaises(InvalidQuery):
+                call()
+
+        self.hybrid.add_node(NetworkNode('B', values, ['S'], {
+            '(t,t)': 0.5, '(t,f)': 0.5, '(f,t)': 0.5, '(f,f)': 0.5}, [values, []]))
+        for call in [lambda: self.hybrid.marginals(), lambda: self.hybrid.mpe(),
+                     lambda: self.hybrid.map(['B']),
+                     lambda: ArithmeticCircuit.compile(self.hybrid)]:
+            with self.assertRaises(InvalidQuery):
+                call()
+
+
+class DynamicBayesianNetworkTest(TestCase):
+
+    def setUp(self) -> None:
+        # Umbrella world where rain and wind persist and umbrella depends on both
+        values = ['t', 'f']
+        rain_previous = DynamicBayesianNetwork.previous('Rain')
+        wind_previous = DynamicBayesianNetwork.previous('Wind')
+        umbrella = NetworkNode(
+            node_name='Umbrella', random_variables=values, predecessors=['Rain', 'Wind'],
+            probabilities={'(t,t,t)': 0.7, '(t,t,f)': 0.3, '(t,f,t)': 0.9, '(t,f,f)': 0.1,
+                           '(f,t,t)': 0.1, '(f,t,f)': 0.9, '(f,f,t)': 0.2, '(f,f,f)': 0.8},
+            all_random_variables=[values, values, values])
+        prior = [NetworkNode(node_name='Rain', random_variables=values, predecessors=[],
+                             probabilities={'(t)': 0.5, '(f)': 0.5}, all_random_variables=[values]),
+                 NetworkNode(node_name='Wind', random_variables=values, predecessors=[],
+                             probabilities={'(t)': 0.4, '(f)': 0.6}, all_random_variables=[values]),
+                 umbrella]
+        transition = [
+            NetworkNode(node_name='Rain', random_variables=values, predecessors=[rain_previous],
+                        probabilities={'(t,t)': 0.7, '(t,f)': 0.3, '(f,t)': 0.3, '(f,f)': 0.7},
+                        all_random_variables=[values, values]),
+            NetworkNode(node_name='Wind', random_variables=values,
+                        predecessors=[wind_previous, rain_previous],
+                        probabilities={'(t,t,t)': 0.6, '(t,t,f)': 0.4, '(t,f,t)': 0.5,
+                                       '(t,f,f)': 0.5, '(f,t,t)': 0.3, '(f,t,f)': 0.7,
+                                       '(f,f,t)': 0.1, '(f,f,f)': 0.9},
+                        all_random_variables=[values, values, values]),
+            umbrella]
+        self.network = DynamicBayesianNetwork(prior=prior, transition=transition)
+        self.stream = [{'Umbrella': 't'}, {'Umbrella': 't'}, {'Umbrella': 'f', 'Wind': 't'},
+                       {}, {'Umbrella': 't'}]
+
+    def _unrolled_probability(self, unrolled: BayesianNetwork, name: str, time: int, steps: int):
+        evidence = ', '.join(f'{DynamicBayesianNetwork.slice_name(variable, step)} = {value}' for
+                             step, evidence in enumerate(self.stream[:steps]) for variable, value
+                             in evidence.items())
+        return unrolled.P(f'{DynamicBayesianNetwork.slice_name(name, time)} = t | {evidence}')
+
+    def test_interface(self):
+        self.assertListEqual(['Rain', 'Wind'], self.network.interface)
+
+    def test_filtering_matches_unrolled_network(self):
+        unrolled = self.network.unroll(len(self.stream))
+        streaming_filter = self.network.filtering()
+        for time, evidence in enumerate(self.stream):
+            filtered = streaming_filter.update(evidence)
+            for name in ['Rain', 'Wind']:
+                expected = 1.0 if evidence.get(name) == 't' else self._unrolled_probability(
+                    unrolled, name, time, time + 1)
+                self.assertAlmostEqual(expected, filtered[name]['t'])
+            self.assertEqual(time, streaming_filter.time)
+        self.assertAlmostEqual(
+            math.log(unrolled.P(', '.join(
+                f'{DynamicBayesianNetwork.slice_name(variable, step)} = {value}' for step, evidence
+                in enumerate(self.stream) for variable, value in evidence.items()))),
+            streaming_filter.log_likelihood)
+
+    def test_fixed_lag_smoothing(self):
+        lag = 2
+        unrolled = self.network.unroll(len(self.stream))
+        for time, (filtered, smoothed) in enumerate(self.network.filter(self.stream, lag=lag)):
+            if time < lag:
+                self.assertIsNone(smoothed)
+                continue
+            self.assertAlmostEqual(
+                self._unrolled_probability(unrolled, 'Rain', time - lag, time + 1),
+                smoothed['Rain']['t'])
+
+    def test_invalid_networks_and_evidence(self):
+        nodes = list(self.network.prior.values())
+        with self.assertRaises(InvalidTemporalNetwork):
+            DynamicBayesianNetwork(prior=nodes, transition=nodes[:2])
+        with self.assertRaises(PredecessorNotExistInNetwork):
+            DynamicBayesianNetwork(prior=nodes, transition=nodes[:2] + [NetworkNode(
+                node_name='Umbrella', random_variables=['t', 'f'], predecessors=['Snow'],
+                probabilities={}, all_random_variables=[['t', 'f'], ['t', 'f']])])
+        streaming_filter = self.network.filtering()
+        with self.assertRaises(VariableNotInGraph):
+            streaming_filter.update({'Snow': 't'})
+
+
+class DeadlineInferenceTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            BayesianNetworkProbabilityTest.sample_network), query_cache=QueryCache())
+
+    def test_exact_inference_within_budget(self):
+        result = self.network.P('Alarm = t | JohnCalls = t', deadline=10.0)
+        self.assertIsInstance(result, DeadlineResult)
+        self.assertTrue(result.is_exact)
+        self.assertIn(result.engine, (BayesianNetwork.ENUMERATION_ENGINE,
+                                      BayesianNetwork.POLYTREE_ENGINE))
+        self.assertEqual(0.0, result.error_bound)
+        self.assertGreater(result.estimated_time, 0.0)
+        self.assertEqual(self.network.P('Alarm = t | JohnCalls = t'), result.probability)
+        # Same query again is served from the cache
+        self.assertEqual(CACHE_ENGINE, self.network.P('Alarm = t | JohnCalls = t',
+                                                      deadline=10.0).engine)
+
+    def test_approximate_inference_when_budget_is_exceeded(self):
+        # Exact inference of the small network is estimated to be slow with low operation rate
+        with mock.patch('bayesian_inference.entity.anytime.OPERATIONS_PER_SECOND', 1e-3):
+            result, stats = self.network.P(['Earthquake'], evidence={'MaryCalls': 't'},
+                                           deadline=0.05, return_stats=True)
+        self.assertFalse(result.is_exact)
+        self.assertEqual(LIKELIHOOD_WEIGHTING_ENGINE, result.engine)
+        self.assertEqual(LIKELIHOOD_WEIGHTING_ENGINE, stats.engine)
+        self.assertGreater(result.samples, 0)
+        self.assertGreater(result.error_bound, 0.0)
+        exact = self.network.P(['Earthquake'], evidence={'MaryCalls': 't'})
+        for value in ['t', 'f']:
+            self.assertAlmostEqual(exact[value], result.probability[value], delta=0.05)
+        self.assertAlmostEqual(1.0, sum(result.probability.values()))
+
+    def test_textual_query_with_expired_budget(self):
+        with mock.patch('bayesian_inference.entity.anytime.OPERATIONS_PER_SECOND', 1e-3):
+            result = self.network.P('Burglary, Earthquake = f | JohnCalls = t', deadline=0.0)
+        # Single batch is drawn even if the budget is already spent
+        self.assertEqual(1000, result.samples)
+        self.assertIsInstance(result.probability, dict)
+        self.assertSetEqual({str({'Burglary': 't'}), str({'Burglary': 'f'})},
+                            set(result.probability))
+
+
+class RecursiveConditioningTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..benchmark.generators import grid_network
+        from ..input_parser.input_parser import InputParser
+        self.nodes = InputParser.from_dict(grid_network(3, 3, cardinality=3, seed=0))
+        self.network = BayesianNetwork(initial_network=self.nodes)
+
+    def test_same_probabilities_for_any_cache_size(self):
+        expected = self.network.P('X8 | X0 = s1, X4 = s2', engine='enumeration')
+        for cache_size in [None, 0, 3, 10, 30]:
+            self.network.conditioning_cache_size = cache_size
+            probability = self.network.P('X8 | X0 = s1, X4 = s2',
+                                         engine=BayesianNetwork.RECURSIVE_CONDITIONING_ENGINE)
+            for key, value in expected.items():
+                self.assertAlmostEqual(value, probability[key])
+
+    def test_cache_size_trades_time_for_space(self):
+        nodes = {node.node_name: node for node in self.nodes}
+        evidence = {'X8': 's0'}
+        unlimited = RecursiveConditioning(nodes)
+        probability = unlimited.evaluate(evidence)
+        self.assertAlmostEqual(self.network.P('X8 = s0'), probability)
+        self.assertGreater(unlimited.cache_entries, 0)
+        self.assertLessEqual(unlimited.cache_entries, unlimited.cache_capacity)
+
+        multiplications = []
+        for cache_size in [0, unlimited.cache_capacity // 4, unlimited.cache_capacity]:
+            conditioning = RecursiveConditioning(nodes, cache_size=cache_size)
+            self.assertAlmostEqual(probability, conditioning.evaluate(evidence))
+            self.assertLessEqual(conditioning.cache_capacity, cache_size)
+            self.assertLessEqual(conditioning.cache_entries, conditioning.cache_capacity)
+            multiplications.append(conditioning.multiplications)
+        self.assertEqual(0, RecursiveConditioning(nodes, cache_size=0).cache_capacity)
+        self.assertGreaterEqual(multiplications[0], multiplications[1])
+        self.assertGreater(multiplications[1], multiplications[2])
+
+    def test_stats(self):
+        self.network.conditioning_cache_size = 20
+        _, stats = self.network.P('X5 | X1 = s0', return_stats=True,
+                                  engine=BayesianNetwork.RECURSIVE_CONDITIONING_ENGINE)
+        self.assertEqual(BayesianNetwork.RECURSIVE_CONDITIONING_ENGINE, stats.engine)
+        self.assertGreater(stats.cache_entries, 0)
+        self.assertLessEqual(stats.cache_entries, 20)
+        self.assertGreater(stats.multiplications, 0)
+
+    def test_query_without_evidence(self):
+        engine = BayesianNetwork.RECURSIVE_CONDITIONING_ENGINE
+        self.assertEqual(1.0, RecursiveConditioning({}).evaluate({}))
+        expected = self.network.P('X4', engine=BayesianNetwork.ENUMERATION_ENGINE)
+        probability = self.network.P('X4', engine=engine)
+        for key, value in expected.items():
+            self.assertAlmostEqual(value, probability[key])
+        self.assertAlmostEqual(expected[str({'X4': 's0'})],
+                               self.network.P('X4 = s0', engine=engine))
+
+
+class LoopCutsetConditioningTest(TestCase):
+
+    def setUp(self) -> None:
+        from ..benchmark.generators import grid_network
+        from ..input_parser.input_parser import InputParser
+        self.network = BayesianNetwork(initial_network=InputParser.from_dict(
+            grid_network(3, 3, seed=0)))
+
+    def _assert_same_probabilities(self, expected, actual):
+        if isinstance(expected, float):
+            self.assertAlmostEqual(expected, actual)
+        else:
+            self.assertEqual(expected.keys(), actual.keys())
+            for key in expected:
+                self.assertAlmostEqual(expected[key], actual[key])
+
+    def test_cutset_breaks_all_loops(self):
+        nodes = self.network.nodes
+        cutset = loop_cutset(nodes, nodes)
+        self.assertEqual(2, len(cutset))
+        instantiation = {name: nodes[name].random_variables[0] for name in cutset}
+        conditioned = LoopCutsetConditioning.conditioned_nodes(nodes, nodes, instantiation)
+        self.assertTrue(is_polytree(conditioned, conditioned))
+        self.assertFalse(is_polytree(nodes, nodes))
+        self.assertEqual([], loop_cutset(nodes, ['X0', 'X1', 'X2']))
+
+    def test_same_probabilities_as_enumeration(self):
+        queries = ['X8 | X0 = s0', 'X1, X8 | X3 = s1', 'X0 = s1 | X8 = s0, X4 = s1', 'X8',
+                   'X4 | X1 = s0']
+        for query in queries:
+            self._assert_same_probabilities(
+                self.network.P(query, engine=BayesianNetwork.ENUMERATION_ENGINE),
+                self.network.P(query, engine=BayesianNetwork.LOOP_CUTSET_ENGINE))
+
+    def test_automatically_selected(self):
+        _, stats = self.network.P('X8 | X0 = s0', return_stats=True)
+        self.assertEqual(BayesianNetwork.LOOP_CUTSET_ENGINE, stats.engine)
+        self.assertGreater(stats.multiplications, 0)
+        # Only the first variable is needed, so that nothing is summed out
+        _, stats = self.network.P('X0', return_stats=True)
+        self.assertEqual(BayesianNetwork.ENUMERATION_ENGINE, stats.engine)
+
+    def test_selection_does_not_enumerate_instantiations(self):
+        # Each variable has the previous two as parents, so that the cutset grows with the chain
+        nodes = []
+        for index in range(40):
+            predecessors = [f'V{parent}' for parent in (index - 2, index - 1) if parent >= 0]
+            values = [['t', 'f']] * (len(predecessors) + 1)
+            nodes.append(NetworkNode(f'V{index}', ['t', 'f'], predecessors, {
+                NetworkNode._probability_key(combination): 0.3 if combination[-1] == 't' else
+                0.7 for combination in itertools.product(*values)}, values))
+        network = BayesianNetwork(initial_network=nodes)
+        conditioning = LoopCutsetConditioning(network.nodes, network.nodes)
+        self.assertEqual(2 ** len(conditioning.cutset), conditioning.instantiation_count)
+        evidence = ', '.join(f'V{index} = t' for index in range(1, 40))
+        with mock.patch.object(LoopCutsetConditioning, 'instantiations') as instantiations:
+            _, stats = network.P(f'V0 | {evidence}', return_stats=True)
+            network.P(f'V0 | {evidence}', deadline=10.0)
+            instantiations.assert_not_called()
+        self.assertEqual(BayesianNetwork.ENUMERATION_ENGINE, stats.engine)
+
+    def test_parallel_instantiations(self):
+        query = 'X1, X8 | X3 = s1'
+        with ParallelInference(self.network, processes=2) as parallel:
+            self._assert_same_probabilities(
+                self.network.P(query, engine=BayesianNetwork.ENUMERATION_ENGINE),
+                parallel.P(query, engine=BayesianNetwork.LOOP_CUTSET_ENGINE))
+            self.assertAlmostEqual(self.network.P('X8 = s0'),
+                                   parallel.P('X8 = s0', engine=BayesianNetwork.LOOP_CUTSET_ENGINE))
+            with self.assertRaises(InvalidQuery):
+                parallel.P('X8', engine=BayesianNetwork.CIRCUIT_ENGINE)
@@ -1,5 +1,6 @@
 from .exceptions import (
     IncompleteNodeDataException, PredecessorNotExistInNetwork, NotAllExpectedProbabilityExist,
     HaveAtLeastOneRandomVariable, NonUniqueRandomVariablesInQuery, RandomVariableNotInContext,
-    InvalidQuery, InvalidProbabilityFactor,
+    InvalidQuery, InvalidProbabilityFactor, VariableNotInGraph, NotPolytreeNetwork,
+    ReadOnlyNetwork, InvalidTemporalNetwork,
 )
@@ -35,3 +35,15 @@ class InvalidProbabilityFactor(Exception):
 
 class VariableNotInGraph(Exception):
     pass
+
+
+class NotPolytreeNetwork(Exception):
+    pass
+
+
+class ReadOnlyNetwork(Exception):
+    pass
+
+
+class InvalidTemporalNetwork(Exception):
+    pass
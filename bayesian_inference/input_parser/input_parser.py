@@ -2,7 +2,10 @@ import itertools
 import json
 from typing import TextIO, List
 
+from ..entity.linear_gaussian_network_node import LinearGaussian, LinearGaussianNetworkNode
 from ..entity.network_node import NetworkNode
+from ..entity.noisy_max_network_node import NoisyMaxNetworkNode
+from ..entity.rule_network_node import RuleNetworkNode
 from ..exceptions.exceptions import (
     IncompleteNodeDataException, PredecessorNotExistInNetwork, NotAllExpectedProbabilityExist,
     HaveAtLeastOneRandomVariable,
@@ -22,6 +25,20 @@ class InputParser(object):
             - All predecessors exist
             - All probabilities have the complete set of keys to be expected with combined
              with their predecessor
+            - All rules refer to predecessors and their values, and all distributions of rules
+             and default one have probability of each random variable
+            - All linear Gaussian distributions exist for each combination of discrete
+             predecessors, have positive variance and weights of continuous predecessors
+
+    .. note::
+        Instead of probabilities, node may have ordered rules with default distribution where each
+        rule has values of some predecessors as `when` and the distribution as `probabilities`,
+        or noisy-OR/noisy-MAX parameters of causing predecessor values with `leak`
+
+    .. note::
+        Continuous node has `linear_gaussian` distribution with `intercept`, `variance` and
+        `weights` of continuous predecessors instead of random variables and probabilities, or
+        such distribution for each combination of discrete predecessors keyed like probabilities
 
     .. warning::
         After validations, corresponding exceptions are thrown
@@ -29,8 +46,20 @@ class InputParser(object):
     PREDECESSORS_TOKEN = 'predecessors'
     RANDOM_VARIABLES_TOKEN = 'random_variables'
     PROBABILITIES_TOKEN = 'probabilities'
+    RULES_TOKEN = 'rules'
+    WHEN_TOKEN = 'when'
+    DEFAULT_TOKEN = 'default'
+    NOISY_OR_TOKEN = 'noisy_or'
+    NOISY_MAX_TOKEN = 'noisy_max'
+    LEAK_TOKEN = 'leak'
+    LINEAR_GAUSSIAN_TOKEN = 'linear_gaussian'
+    INTERCEPT_TOKEN = 'intercept'
+    VARIANCE_TOKEN = 'variance'
+    WEIGHTS_TOKEN = 'weights'
 
     ESSENTIAL_FIELDS = [PREDECESSORS_TOKEN, RANDOM_VARIABLES_TOKEN, PROBABILITIES_TOKEN]
+    ESSENTIAL_RULE_FIELDS = [PREDECESSORS_TOKEN, RANDOM_VARIABLES_TOKEN, DEFAULT_TOKEN]
+    ESSENTIAL_NOISY_FIELDS = [PREDECESSORS_TOKEN, RANDOM_VARIABLES_TOKEN, LEAK_TOKEN]
 
     @staticmethod
     def parse(file: TextIO) -> List[NetworkNode]:
@@ -51,6 +80,12 @@ class InputParser(object):
     def validate_and_parse_node(node_name: str, network: dict) -> NetworkNode:
         # Get node related data
         node_data: dict = network[node_name]
+        if InputParser.DEFAULT_TOKEN in node_data or InputParser.RULES_TOKEN in node_data:
+            return InputParser.validate_and_parse_rule_node(node_name, network)
+        if InputParser.NOISY_OR_TOKEN in node_data or InputParser.NOISY_MAX_TOKEN in node_data:
+            return InputParser.validate_and_parse_noisy_node(node_name, network)
+        if InputParser.LINEAR_GAUSSIAN_TOKEN in node_data:
+            return InputParser.validate_and_parse_linear_gaussian_node(node_name, network)
         random_variables: list = node_data[InputParser.RANDOM_VARIABLES_TOKEN]
         probabilities: dict = node_data[InputParser.PROBABILITIES_TOKEN]
         predecessors: list = node_data[InputParser.PREDECESSORS_TOKEN]
@@ -72,17 +107,102 @@ class InputParser(object):
                            all_random_variables=all_random_variables)
 
     @staticmethod
-    def _assert_essential_fields_exist(node_name: str, node_data: dict) -> None:
+    def validate_and_parse_rule_node(node_name: str, network: dict) -> RuleNetworkNode:
+        # Make assertions
+        node_data: dict = network[node_name]
+        InputParser._assert_essential_fields_exist(node_name=node_name, node_data=node_data,
+                                                   fields=InputParser.ESSENTIAL_RULE_FIELDS)
+        InputParser._assert_all_predecessors_exist(node_data=node_data, network=network)
+        InputParser._assert_all_rules_valid(node_name=node_name, node_data=node_data,
+                                            network=network)
+
+        # Get node related data
+        random_variables: list = node_data[InputParser.RANDOM_VARIABLES_TOKEN]
+        predecessors: list = node_data[InputParser.PREDECESSORS_TOKEN]
+        all_random_variables: list = [network[predecessor][InputParser.RANDOM_VARIABLES_TOKEN] for
+                                      predecessor in predecessors] + [random_variables]
+        rules = [(rule.get(InputParser.WHEN_TOKEN, {}), rule[InputParser.PROBABILITIES_TOKEN]) for
+                 rule in node_data.get(InputParser.RULES_TOKEN, [])]
+
+        return RuleNetworkNode(node_name=node_name, random_variables=random_variables,
+                               predecessors=predecessors, rules=rules,
+                               default=node_data[InputParser.DEFAULT_TOKEN],
+                               all_random_variables=all_random_variables)
+
+    @staticmethod
+    def validate_and_parse_noisy_node(node_name: str, network: dict) -> NoisyMaxNetworkNode:
+        # Make assertions
+        node_data: dict = network[node_name]
+        InputParser._assert_essential_fields_exist(node_name=node_name, node_data=node_data,
+                                                   fields=InputParser.ESSENTIAL_NOISY_FIELDS)
+        InputParser._assert_all_predecessors_exist(node_data=node_data, network=network)
+        InputParser._assert_noisy_parameters_valid(node_name=node_name, node_data=node_data,
+                                                   network=network)
+
+        # Get node related data
+        random_variables: list = node_data[InputParser.RANDOM_VARIABLES_TOKEN]
+        predecessors: list = node_data[InputParser.PREDECESSORS_TOKEN]
+        all_random_variables: list = [network[predecessor][InputParser.RANDOM_VARIABLES_TOKEN] for
+                                      predecessor in predecessors] + [random_variables]
+
+        if InputParser.NOISY_OR_TOKEN in node_data:
+            return NoisyMaxNetworkNode.noisy_or(
+                node_name=node_name, random_variables=random_variables, predecessors=predecessors,
+                probabilities=node_data[InputParser.NOISY_OR_TOKEN],
+                leak=node_data[InputParser.LEAK_TOKEN], all_random_variables=all_random_variables)
+        return NoisyMaxNetworkNode(
+            node_name=node_name, random_variables=random_variables, predecessors=predecessors,
+            parameters=node_data[InputParser.NOISY_MAX_TOKEN],
+            leak=node_data[InputParser.LEAK_TOKEN], all_random_variables=all_random_variables)
+
+    @staticmethod
+    def validate_and_parse_linear_gaussian_node(node_name: str,
+                                                network: dict) -> LinearGaussianNetworkNode:
+        # Make assertions
+        node_data: dict = network[node_name]
+        if InputParser.PREDECESSORS_TOKEN not in node_data:
+            raise IncompleteNodeDataException(
+                f'Check node {node_name}, it lacks of {InputParser.PREDECESSORS_TOKEN} field.')
+        InputParser._assert_all_predecessors_exist(node_data=node_data, network=network)
+        InputParser._assert_linear_gaussian_valid(node_name=node_name, node_data=node_data,
+                                                  network=network)
+
+        # Get node related data, where continuous predecessors have no random variable
+        predecessors: list = node_data[InputParser.PREDECESSORS_TOKEN]
+        all_random_variables: list = [network[predecessor].get(
+            InputParser.RANDOM_VARIABLES_TOKEN, []) for predecessor in predecessors] + [[]]
+        distributions = {key.replace(' ', ''): LinearGaussian(
+            intercept=distribution[InputParser.INTERCEPT_TOKEN],
+            variance=distribution[InputParser.VARIANCE_TOKEN],
+            weights=distribution.get(InputParser.WEIGHTS_TOKEN, {})) for key, distribution in
+            InputParser._linear_gaussian_distributions(node_data).items()}
+
+        return LinearGaussianNetworkNode(node_name=node_name, predecessors=predecessors,
+                                         distributions=distributions,
+                                         all_random_variables=all_random_variables)
+
+    @staticmethod
+    def _linear_gaussian_distributions(node_data: dict) -> dict:
+        """ Distributions keyed by discrete predecessor values, where single one is keyed by () """
+        distributions = node_data[InputParser.LINEAR_GAUSSIAN_TOKEN]
+        if InputParser.INTERCEPT_TOKEN in distributions:
+            return {'()': distributions}
+        return distributions
+
+    @staticmethod
+    def _assert_essential_fields_exist(node_name: str, node_data: dict,
+                                       fields: list = None) -> None:
         """
         Checking essential fields where they are predecessors, probabilities and random variables
         :param node_name: Node name to refer in exception
         :param node_data: Node data to check essential fields in it
+        :param fields: Essential fields, the ones of probability table if not given
         :return: None
         :raises IncompleteNodeDataException: In case of having one of the essential fields
         :raises HaveAtLeastOneRandomVariable: In case of having no random variable
         """
         # Check essential fields exist
-        for field in InputParser.ESSENTIAL_FIELDS:
+        for field in fields or InputParser.ESSENTIAL_FIELDS:
             if field not in node_data:
                 raise IncompleteNodeDataException(
                     f'Check node {node_name}, it lacks of {field} field.')
@@ -128,3 +248,120 @@ class InputParser(object):
             if key not in probabilities:
                 raise NotAllExpectedProbabilityExist(
                     f'Expected probability {key} not exist among {node_name} probabilities.')
+
+    @staticmethod
+    def _assert_all_rules_valid(node_name: str, node_data: dict, network: dict) -> None:
+        """
+        Checking whether rules refer to predecessors with their values and all the distributions
+        have probability of each random variable
+        :param node_name: Node name to refer in exception
+        :param node_data: Node data to fetch rules and default distribution
+        :param network: Whole network which is candidate to be parsed
+        :return: None
+        :raises PredecessorNotExistInNetwork: In case of rule referring a variable which is not
+        predecessor of the node
+        :raises NotAllExpectedProbabilityExist: In case of unknown value in a rule or distribution
+        lacking of a random variable
+        """
+        random_variables = node_data[InputParser.RANDOM_VARIABLES_TOKEN]
+        predecessors = node_data[InputParser.PREDECESSORS_TOKEN]
+        distributions = [node_data[InputParser.DEFAULT_TOKEN]]
+        for rule in node_data.get(InputParser.RULES_TOKEN, []):
+            for predecessor, value in rule.get(InputParser.WHEN_TOKEN, {}).items():
+                if predecessor not in predecessors:
+                    raise PredecessorNotExistInNetwork(
+                        f'Rule of {node_name} refers {predecessor} which is not its predecessor.')
+                if value not in network[predecessor][InputParser.RANDOM_VARIABLES_TOKEN]:
+                    raise NotAllExpectedProbabilityExist(
+                        f'Rule of {node_name} refers unknown value {value} of {predecessor}.')
+            distributions.append(rule.get(InputParser.PROBABILITIES_TOKEN, {}))
+
+        for distribution in distributions:
+            if set(distribution) != set(random_variables):
+                raise NotAllExpectedProbabilityExist(
+                    f'Distribution {distribution} of {node_name} should have probability of '
+                    f'each of {random_variables}.')
+
+    @staticmethod
+    def _assert_noisy_parameters_valid(node_name: str, node_data: dict, network: dict) -> None:
+        """
+        Checking whether noisy-OR/noisy-MAX parameters refer to predecessors with their values and
+        all the distributions have probability of each random variable
+        :param node_name: Node name to refer in exception
+        :param node_data: Node data to fetch parameters and leak
+        :param network: Whole network which is candidate to be parsed
+        :return: None
+        :raises PredecessorNotExistInNetwork: In case of parameter of a variable which is not
+        predecessor of the node
+        :raises NotAllExpectedProbabilityExist: In case of unknown predecessor value, noisy-OR node
+        without exactly two random variables or distribution lacking of a random variable
+        """
+        random_variables = node_data[InputParser.RANDOM_VARIABLES_TOKEN]
+        predecessors = node_data[InputParser.PREDECESSORS_TOKEN]
+        is_noisy_or = InputParser.NOISY_OR_TOKEN in node_data
+        if is_noisy_or and len(random_variables) != 2:
+            raise NotAllExpectedProbabilityExist(
+                f'Noisy-OR node {node_name} should have absent and present random variables.')
+
+        parameters = node_data[InputParser.NOISY_OR_TOKEN if is_noisy_or else
+                               InputParser.NOISY_MAX_TOKEN]
+        distributions = [] if is_noisy_or else [node_data[InputParser.LEAK_TOKEN]]
+        for predecessor, values in parameters.items():
+            if predecessor not in predecessors:
+                raise PredecessorNotExistInNetwork(
+                    f'Parameter of {node_name} refers {predecessor} which is not its predecessor.')
+            for value, distribution in values.items():
+                if value not in network[predecessor][InputParser.RANDOM_VARIABLES_TOKEN]:
+                    raise NotAllExpectedProbabilityExist(
+                        f'Parameter of {node_name} refers unknown value {value} of {predecessor}.')
+                if not is_noisy_or:
+                    distributions.append(distribution)
+
+        for distribution in distributions:
+            if set(distribution) != set(random_variables):
+                raise NotAllExpectedProbabilityExist(
+                    f'Distribution {distribution} of {node_name} should have probability of '
+                    f'each of {random_variables}.')
+
+    @staticmethod
+    def _assert_linear_gaussian_valid(node_name: str, node_data: dict, network: dict) -> None:
+        """
+        Checking whether linear Gaussian distribution exists for each combination of discrete
+        predecessors with positive variance and weights of continuous predecessors
+        :param node_name: Node name to refer in exception
+        :param node_data: Node data to fetch distributions
+        :param network: Whole network which is candidate to be parsed
+        :return: None
+        :raises IncompleteNodeDataException: In case of distribution lacking of intercept or
+        positive variance
+        :raises PredecessorNotExistInNetwork: In case of weight of a variable which is not
+        continuous predecessor of the node
+        :raises NotAllExpectedProbabilityExist: In case of not having distribution of a
+        combination of discrete predecessors
+        """
+        predecessors = node_data[InputParser.PREDECESSORS_TOKEN]
+        discrete_random_variables = [network[predecessor][InputParser.RANDOM_VARIABLES_TOKEN] for
+                                     predecessor in predecessors if
+                                     network[predecessor].get(InputParser.RANDOM_VARIABLES_TOKEN)]
+        continuous_predecessors = [predecessor for predecessor in predecessors if
+                                   not network[predecessor].get(InputParser.RANDOM_VARIABLES_TOKEN)]
+        distributions = {key.replace(' ', ''): distribution for key, distribution in
+                         InputParser._linear_gaussian_distributions(node_data).items()}
+
+        for combination in itertools.product(*discrete_random_variables):
+            key = '(' + ','.join(str(v) for v in combination) + ')'
+            if key not in distributions:
+                raise NotAllExpectedProbabilityExist(
+                    f'Expected distribution {key} not exist among {node_name} distributions.')
+
+        for distribution in distributions.values():
+            if InputParser.INTERCEPT_TOKEN not in distribution or distribution.get(
+                    InputParser.VARIANCE_TOKEN, 0) <= 0:
+                raise IncompleteNodeDataException(
+                    f'Distribution {distribution} of {node_name} should have intercept and '
+                    f'positive variance.')
+            for predecessor in distribution.get(InputParser.WEIGHTS_TOKEN, {}):
+                if predecessor not in continuous_predecessors:
+                    raise PredecessorNotExistInNetwork(
+                        f'Weight of {node_name} refers {predecessor} which is not its continuous '
+                        f'predecessor.')
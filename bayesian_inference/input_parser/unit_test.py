@@ -3,7 +3,10 @@ from unittest import TestCase
 from unittest.mock import patch
 
 from .input_parser import InputParser
+from ..entity.linear_gaussian_network_node import LinearGaussianNetworkNode
 from ..entity.network_node import NetworkNode
+from ..entity.noisy_max_network_node import NoisyMaxNetworkNode
+from ..entity.rule_network_node import RuleNetworkNode
 from ..exceptions.exceptions import (
     IncompleteNodeDataException, HaveAtLeastOneRandomVariable, NotAllExpectedProbabilityExist,
     PredecessorNotExistInNetwork,
@@ -146,3 +149,101 @@ class TestInputParser(TestCase):
             self.assertEqual(len(actual_value[InputParser.PROBABILITIES_TOKEN]), len(parsed_node.probabilities))
             self.assertEqual(len(actual_value[InputParser.PREDECESSORS_TOKEN]) + 1,
                              len(parsed_node.all_random_variables))
+
+    def test_parse_rule_node(self):
+        sample_network = {
+            'A': {'predecessors': [], 'random_variables': ['t', 'f'],
+                  'probabilities': {'(t)': 0.2, '(f)': 0.8}},
+            'B': {'predecessors': [], 'random_variables': ['t', 'f'],
+                  'probabilities': {'(t)': 0.6, '(f)': 0.4}},
+            'C': {'predecessors': ['A', 'B'], 'random_variables': ['t', 'f'],
+                  'rules': [{'when': {'A': 't', 'B': 't'}, 'probabilities': {'t': 0.9, 'f': 0.1}},
+                            {'when': {'A': 't'}, 'probabilities': {'t': 0.5, 'f': 0.5}}],
+                  'default': {'t': 0.01, 'f': 0.99}},
+        }
+        node = InputParser.from_dict(sample_network)[2]
+        self.assertIsInstance(node, RuleNetworkNode)
+        self.assertEqual(2, len(node.rules))
+        self.assertAlmostEqual(0.9, node.probability(A='t', B='t', C='t'))
+        self.assertAlmostEqual(0.5, node.probability(A='t', B='f', C='f'))
+        self.assertAlmostEqual(0.99, node.probability(A='f', B='t', C='f'))
+        self.assertAlmostEqual(0.01, node.probabilities['(f,f,t)'])
+        self.assertEqual(8, len(node.probabilities))
+
+    def test_rule_node_validation(self):
+        sample_network = {
+            'A': {'predecessors': [], 'random_variables': ['t', 'f'],
+                  'probabilities': {'(t)': 0.2, '(f)': 0.8}},
+            'C': {'predecessors': ['A'], 'random_variables': ['t', 'f'],
+                  'rules': [{'when': {'A': 't'}, 'probabilities': {'t': 0.9, 'f': 0.1}}],
+                  'default': {'t': 0.01, 'f': 0.99}},
+        }
+        invalid_rules = [
+            ({'when': {'B': 't'}, 'probabilities': {'t': 0.9, 'f': 0.1}},
+             PredecessorNotExistInNetwork),
+            ({'when': {'A': 'x'}, 'probabilities': {'t': 0.9, 'f': 0.1}},
+             NotAllExpectedProbabilityExist),
+            ({'when': {'A': 't'}, 'probabilities': {'t': 0.9}}, NotAllExpectedProbabilityExist),
+        ]
+        for rule, exception in invalid_rules:
+            sample_network['C']['rules'] = [rule]
+            with self.assertRaises(exception):
+                InputParser.from_dict(sample_network)
+
+        del sample_network['C']['default']
+        with self.assertRaises(IncompleteNodeDataException):
+            InputParser.from_dict(sample_network)
+
+    def test_parse_noisy_nodes(self):
+        sample_network = {
+            'A': {'predecessors': [], 'random_variables': ['f', 't'],
+                  'probabilities': {'(t)': 0.2, '(f)': 0.8}},
+            'B': {'predecessors': [], 'random_variables': ['f', 't'],
+                  'probabilities': {'(t)': 0.6, '(f)': 0.4}},
+            'C': {'predecessors': ['A', 'B'], 'random_variables': ['f', 't'],
+                  'noisy_or': {'A': {'t': 0.9}, 'B': {'t': 0.5}}, 'leak': 0.01},
+            'D': {'predecessors': ['A'], 'random_variables': ['none', 'mild', 'severe'],
+                  'noisy_max': {'A': {'t': {'none': 0.1, 'mild': 0.3, 'severe': 0.6}}},
+                  'leak': {'none': 0.9, 'mild': 0.1, 'severe': 0.0}},
+        }
+        nodes = InputParser.from_dict(sample_network)
+        self.assertIsInstance(nodes[2], NoisyMaxNetworkNode)
+        self.assertAlmostEqual(1 - 0.99 * 0.1 * 0.5, nodes[2].probability(A='t', B='t', C='t'))
+        self.assertAlmostEqual(0.6, nodes[3].probability(A='t', D='severe'))
+
+        sample_network['C']['noisy_or'] = {'A': {'x': 0.9}}
+        with self.assertRaises(NotAllExpectedProbabilityExist):
+            InputParser.from_dict(sample_network)
+        sample_network['C']['noisy_or'] = {'E': {'t': 0.9}}
+        with self.assertRaises(PredecessorNotExistInNetwork):
+            InputParser.from_dict(sample_network)
+        sample_network['C']['noisy_or'] = {'A': {'t': 0.9}}
+        sample_network['D']['leak'] = {'none': 1.0}
+        with self.assertRaises(NotAllExpectedProbabilityExist):
+            InputParser.from_dict(sample_network)
+
+    def test_parse_linear_gaussian_nodes(self):
+        sample_network = {
+            'D': {'predecessors': [], 'random_variables': ['t', 'f'],
+                  'probabilities': {'(t)': 0.3, '(f)': 0.7}},
+            'X': {'predecessors': [], 'linear_gaussian': {'intercept': 1.0, 'variance': 4.0}},
+            'Y': {'predecessors': ['D', 'X'], 'linear_gaussian': {
+                '(t)': {'intercept': 0.0, 'variance': 1.0, 'weights': {'X': 2.0}},
+                '(f)': {'intercept': 5.0, 'variance': 2.0}}},
+        }
+        nodes = InputParser.from_dict(sample_network)
+        self.assertIsInstance(nodes[1], LinearGaussianNetworkNode)
+        self.assertListEqual(['D'], nodes[2].discrete_predecessors)
+        self.assertListEqual(['X'], nodes[2].continuous_predecessors)
+        self.assertEqual(2.0, nodes[2].distribution(D='t').weights['X'])
+        self.assertEqual(5.0, nodes[2].distribution(D='f').intercept)
+
+        sample_network['Y']['linear_gaussian']['(t)']['weights'] = {'D': 1.0}
+        with self.assertRaises(PredecessorNotExistInNetwork):
+            InputParser.from_dict(sample_network)
+        sample_network['Y']['linear_gaussian']['(t)']['variance'] = 0.0
+        with self.assertRaises(IncompleteNodeDataException):
+            InputParser.from_dict(sample_network)
+        del sample_network['Y']['linear_gaussian']['(t)']
+        with self.assertRaises(NotAllExpectedProbabilityExist):
+            InputParser.from_dict(sample_network)
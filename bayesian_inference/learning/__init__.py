@@ -0,0 +1,3 @@
+from .parameter_learning import ParameterLearner, encode, read_chunks, family_counts
+from .structure_learning import StructureLearner, family_score, BIC_SCORE, BDEU_SCORE
+from .expectation_maximization import ExpectationMaximizationLearner, expected_statistics
@@ -0,0 +1,266 @@
+import csv
+import itertools
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .parameter_learning import ParameterLearner, encode, read_chunks
+from ..entity.bayesian_network import BayesianNetwork
+
+__all__ = ['ExpectationMaximizationLearner', 'expected_statistics']
+
+# Names of observed variables, their values in each row and number of occurrences of each row
+ObservationGroup = Tuple[Tuple[str, ...], np.ndarray, np.ndarray]
+
+# Observation groups and structure kept in each worker process
+_worker_state: Optional[Tuple[List[ObservationGroup], Dict[str, List[str]],
+                              Dict[str, List[str]]]] = None
+
+
+def expected_statistics(observed: Sequence[str], values: np.ndarray, weights: np.ndarray,
+                        tables: Dict[str, np.ndarray], predecessors: Dict[str, List[str]],
+                        random_variables: Dict[str, List[str]]) \
+        -> Tuple[Dict[str, np.ndarray], float]:
+    """
+    Expected counts of each family for the rows sharing the same observed variables, where the
+    joint of missing variables is computed for all rows at once as single array
+
+    .. note:: Size of the joint is number of rows multiplied by number of combinations of missing
+              variables, thus rows are expected to be split into batches
+
+    :param observed: Names of the observed variables
+    :param values: Codes of the observed variables where each row is single observation
+    :param weights: Number of occurrences of each row
+    :param tables: Conditional probabilities of each node in the shape of its counts
+    :param predecessors: Predecessors of each node
+    :param random_variables: Random variables of each node
+    :return: Expected counts of each node in the shape of its table, and log-likelihood of the rows
+    """
+    column = {name: values[:, index] for index, name in enumerate(observed)}
+    missing = [name for name in predecessors if name not in column]
+    axis = {name: index + 1 for index, name in enumerate(missing)}
+    rows = len(weights)
+
+    def split(node_name: str):
+        family = predecessors[node_name] + [node_name]
+        observed_family = [variable for variable in family if variable in column]
+        missing_family = sorted((variable for variable in family if variable not in column),
+                                key=axis.get)
+        order = [family.index(variable) for variable in observed_family + missing_family]
+        return family, observed_family, missing_family, order
+
+    joint = np.ones((rows,) + tuple(len(random_variables[name]) for name in missing))
+    for node_name, table in tables.items():
+        family, observed_family, missing_family, order = split(node_name)
+        table = table.reshape([len(random_variables[variable]) for variable in family]).transpose(
+            order)
+        factor = table[tuple(column[variable] for variable in observed_family)] if \
+            observed_family else table[None]
+        joint = joint * factor.reshape(factor.shape[:1] + tuple(
+            len(random_variables[name]) if name in missing_family else 1 for name in missing))
+
+    likelihood = joint.reshape(rows, -1).sum(axis=1)
+    # Rows which are impossible with the current probabilities are skipped
+    possible = likelihood > 0
+    log_likelihood = float((weights[possible] * np.log(likelihood[possible])).sum())
+    scale = np.where(possible, weights / np.where(possible, likelihood, 1.0), 0.0)
+    posterior = joint * scale.reshape((rows,) + (1,) * len(missing))
+
+    counts = {}
+    for node_name, table in tables.items():
+        family, observed_family, missing_family, order = split(node_name)
+        marginal = posterior.sum(axis=tuple(axis[name] for name in missing if
+                                            name not in missing_family))
+        family_counts = np.zeros([len(random_variables[variable]) for variable in family])
+        # Transposed view so that observed values index the leading axes
+        view = family_counts.transpose(order)
+        if observed_family:
+            np.add.at(view, tuple(column[variable] for variable in observed_family), marginal)
+        else:
+            view += marginal.sum(axis=0)
+        counts[node_name] = family_counts.reshape(table.shape)
+    return counts, log_likelihood
+
+
+def _initialize_worker(groups: List[ObservationGroup], predecessors: Dict[str, List[str]],
+                       random_variables: Dict[str, List[str]]) -> None:
+    """ Keep observations of the worker once instead of sending them in each iteration """
+    global _worker_state
+    _worker_state = (groups, predecessors, random_variables)
+
+
+def _worker_statistics(index: int, tables: Dict[str, np.ndarray]) \
+        -> Tuple[Dict[str, np.ndarray], float]:
+    groups, predecessors, random_variables = _worker_state
+    return expected_statistics(*groups[index], tables=tables, predecessors=predecessors,
+                               random_variables=random_variables)
+
+
+class ExpectationMaximizationLearner(ParameterLearner):
+    """
+    Maximum a posteriori estimation of conditional probability tables from data with missing
+    values by expectation maximization, where each iteration replaces counts by their expectation
+    under the current probabilities
+
+    .. note:: Identical rows are counted once and rows are grouped by which variables are observed,
+              so that posterior of each group is computed by single vectorized inference. Groups
+              are split into batches of rows, which are distributed to worker processes if
+              requested.
+
+    .. note:: Log-likelihood of the data under the probabilities of each iteration is kept in
+              `log_likelihoods` and logged
+
+    :param tolerance: Iterations stop when relative change of log-likelihood is not greater
+    :param max_iterations: Maximum number of iterations
+    :param processes: Number of worker processes computing expected counts
+    :param batch_size: Maximum number of distinct rows inferred at once
+    :param initial_tables: Conditional probabilities to start from in the shape of counts, random
+        ones if not given
+    :param seed: Seed of random initial probabilities
+    """
+
+    def __init__(self, predecessors: Dict[str, List[str]], random_variables: Dict[str, List[str]],
+                 pseudo_count: float = 1.0, tolerance: float = 1e-6, max_iterations: int = 100,
+                 processes: int = 1, batch_size: int = 10000,
+                 initial_tables: Dict[str, np.ndarray] = None, seed: Optional[int] = None):
+        super().__init__(predecessors=predecessors, random_variables=random_variables,
+                         pseudo_count=pseudo_count)
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.processes = processes
+        self.batch_size = batch_size
+        if initial_tables is None:
+            # Uniform start would keep values of never observed variables indistinguishable
+            generator = np.random.RandomState(seed)
+            initial_tables = {name: generator.dirichlet(np.ones(self._shape(name)[1]),
+                                                        size=self._shape(name)[0]) for name in
+                              self.predecessors}
+        self.tables = {name: np.asarray(initial_tables[name], dtype=float).reshape(
+            self._shape(name)) for name in self.predecessors}
+        self.log_likelihoods: List[float] = []
+
+    @staticmethod
+    def from_network(network: BayesianNetwork, pseudo_count: float = 1.0, warm_start: bool = True,
+                     **kwargs) -> 'ExpectationMaximizationLearner':
+        """
+        Learner of the structure of discrete nodes of the network
+
+        :param network: Bayesian network
+        :param pseudo_count: Dirichlet prior count added to each expected count
+        :param warm_start: Whether to start from the current probabilities of the nodes
+        :param kwargs: Other arguments of the learner
+        :return: Learner of the network
+        """
+        nodes = [node for node in network.nodes.values() if node.random_variables]
+        if warm_start:
+            kwargs['initial_tables'] = {node.node_name: np.array([node.probability(**dict(zip(
+                node.predecessors + [node.node_name], combination))) for combination in
+                itertools.product(*[network.nodes[predecessor].random_variables for predecessor
+                                    in node.predecessors] + [node.random_variables])]) for
+                node in nodes}
+        return ExpectationMaximizationLearner(
+            predecessors={node.node_name: node.predecessors for node in nodes},
+            random_variables={node.node_name: node.random_variables for node in nodes},
+            pseudo_count=pseudo_count, **kwargs)
+
+    def conditional_table(self, node_name: str) -> np.ndarray:
+        return self.tables[node_name]
+
+    def _groups(self, rows: Dict[Tuple[int, ...], int]) -> List[ObservationGroup]:
+        """ Batches of distinct rows grouped by observed variables """
+        names = list(self.predecessors)
+        patterns = {}
+        for row, count in rows.items():
+            patterns.setdefault(tuple(code >= 0 for code in row), []).append((row, count))
+        groups = []
+        for pattern, pattern_rows in patterns.items():
+            observed = tuple(name for name, is_observed in zip(names, pattern) if is_observed)
+            values = np.array([[code for code in row if code >= 0] for row, _ in pattern_rows],
+                              dtype=np.int64).reshape(len(pattern_rows), len(observed))
+            weights = np.array([count for _, count in pattern_rows], dtype=float)
+            for start in range(0, len(pattern_rows), self.batch_size):
+                groups.append((observed, values[start:start + self.batch_size],
+                               weights[start:start + self.batch_size]))
+        return groups
+
+    @staticmethod
+    def _distinct_rows(codes: np.ndarray, rows: Dict[Tuple[int, ...], int]) -> None:
+        """ Add number of occurrences of each distinct row of codes """
+        if len(codes):
+            unique, counts = np.unique(codes, axis=0, return_counts=True)
+            for row, count in zip(map(tuple, unique.tolist()), counts.tolist()):
+                rows[row] = rows.get(row, 0) + count
+
+    def fit(self, columns: Dict[str, Sequence[str]]) -> 'ExpectationMaximizationLearner':
+        """
+        Learn probabilities from data where empty values are missing
+
+        :param columns: Values of each node by name
+        :return: The learner itself
+        """
+        rows = {}
+        self._distinct_rows(np.column_stack([encode(columns[name], self.random_variables[name])
+                                             for name in self.predecessors]), rows)
+        return self._fit_rows(rows)
+
+    def fit_csv(self, file_path: str, chunk_size: int = 100000) \
+            -> 'ExpectationMaximizationLearner':
+        """
+        Learn probabilities from CSV file whose header has names of the nodes, where the file is
+        read once in chunks and only distinct rows are kept for iterations
+
+        :param file_path: Path of the CSV file
+        :param chunk_size: Number of rows read at once
+        :return: The learner itself
+        """
+        rows = {}
+        with open(file_path, 'rb') as file:
+            header = next(csv.reader([file.readline().decode()]))
+            for chunk in read_chunks(file, header=header, chunk_size=chunk_size):
+                self._distinct_rows(np.column_stack([encode(
+                    chunk[name], self.random_variables[name]) for name in self.predecessors]),
+                    rows)
+        return self._fit_rows(rows)
+
+    def _fit_rows(self, rows: Dict[Tuple[int, ...], int]) -> 'ExpectationMaximizationLearner':
+        groups = self._groups(rows)
+        self.log_likelihoods = []
+        executor = None
+        if self.processes > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(
+                max_workers=self.processes, initializer=_initialize_worker,
+                initargs=(groups, self.predecessors, self.random_variables))
+        try:
+            for iteration in range(self.max_iterations):
+                if executor is not None:
+                    results = executor.map(_worker_statistics, range(len(groups)),
+                                           [self.tables] * len(groups))
+                else:
+                    results = (expected_statistics(*group, tables=self.tables,
+                                                   predecessors=self.predecessors,
+                                                   random_variables=self.random_variables) for
+                               group in groups)
+                counts = {name: np.zeros(self._shape(name)) for name in self.predecessors}
+                log_likelihood = 0.0
+                for group_counts, group_log_likelihood in results:
+                    for name, node_counts in group_counts.items():
+                        counts[name] += node_counts
+                    log_likelihood += group_log_likelihood
+
+                self.log_likelihoods.append(log_likelihood)
+                logging.info(f'Iteration {iteration} of expectation maximization has '
+                             f'log-likelihood {log_likelihood}.')
+                self.counts = counts
+                # Maximization step is the smoothed estimate of the expected counts
+                self.tables = {name: ParameterLearner.conditional_table(self, name) for name in
+                               self.predecessors}
+                if len(self.log_likelihoods) > 1 and abs(
+                        log_likelihood - self.log_likelihoods[-2]) <= self.tolerance * abs(
+                        self.log_likelihoods[-2]):
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self
@@ -0,0 +1,237 @@
+import csv
+import io
+import itertools
+import os
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from ..entity.bayesian_network import BayesianNetwork
+from ..entity.network_node import NetworkNode
+from ..exceptions.exceptions import RandomVariableNotInContext
+
+__all__ = ['ParameterLearner', 'encode', 'read_chunks', 'family_counts']
+
+# Value of missing entries in data
+MISSING = ''
+
+
+def encode(values: Sequence[str], states: Sequence[str]) -> np.ndarray:
+    """
+    Integer codes of the values with respect to the order of states, where missing values are -1
+
+    :param values: Values of single variable
+    :param states: Random variables of the variable
+    :return: Array of codes
+    :raises RandomVariableNotInContext: If a value which is not missing is not among the states
+    """
+    values = np.asarray(values, dtype=str)
+    order = np.argsort(np.asarray(states, dtype=str))
+    sorted_states = np.asarray(states, dtype=str)[order]
+    positions = np.minimum(np.searchsorted(sorted_states, values), len(states) - 1)
+    found = sorted_states[positions] == values
+    unknown = ~found & (values != MISSING)
+    if unknown.any():
+        raise RandomVariableNotInContext(
+            f'Value {values[unknown][0]} is not one of {list(states)}.')
+    return np.where(found, order[positions], -1)
+
+
+def read_chunks(file: io.BufferedReader, header: List[str], chunk_size: int, end: int = None) \
+        -> Iterator[Dict[str, List[str]]]:
+    """
+    Read rows of CSV data in chunks of columns, where memory is bounded by the chunk size
+
+    .. note:: Rows are read line by line from binary file so that reading can be started and
+              stopped at byte offsets, thus quoted values cannot have line breaks
+
+    :param file: Binary file positioned at the start of a row
+    :param header: Column names
+    :param chunk_size: Maximum number of rows in each chunk
+    :param end: Byte offset where reading stops, the end of the file if not given
+    :return: Generator of values of each column by name
+    :raises ValueError: If a row does not have one value for each column
+    """
+    def lines():
+        while end is None or file.tell() < end:
+            line = file.readline()
+            if not line:
+                return
+            yield line.decode()
+
+    rows = csv.reader(lines())
+    while True:
+        chunk = [row for row in itertools.islice(rows, chunk_size) if row]
+        if not chunk:
+            return
+        for row in chunk:
+            if len(row) != len(header):
+                raise ValueError(f'Row {row} has {len(row)} values while there are '
+                                 f'{len(header)} columns.')
+        yield {name: list(column) for name, column in zip(header, zip(*chunk))}
+
+
+def family_counts(codes: Dict[str, np.ndarray], node_name: str, predecessors: Sequence[str],
+                  random_variables: Dict[str, List[str]]) -> np.ndarray:
+    """
+    Counts of each node value for each predecessor combination where rows with missing value in the
+    family are skipped
+
+    :param codes: Coded values of each variable by name
+    :param node_name: Name of the node
+    :param predecessors: Predecessors of the node
+    :param random_variables: Random variables of each variable
+    :return: Counts where rows are predecessor combinations in the order of probability keys and
+        columns are values of the node
+    """
+    cardinality = len(random_variables[node_name])
+    configurations = int(np.prod([len(random_variables[predecessor]) for predecessor in
+                                  predecessors], dtype=int))
+    # Mixed radix index of predecessor values followed by value of the node
+    index, valid, stride = codes[node_name].copy(), codes[node_name] >= 0, cardinality
+    for predecessor in reversed(predecessors):
+        index += codes[predecessor] * stride
+        valid &= codes[predecessor] >= 0
+        stride *= len(random_variables[predecessor])
+    return np.bincount(index[valid], minlength=configurations * cardinality).reshape(
+        configurations, cardinality)
+
+
+class ParameterLearner(object):
+    """
+    Maximum a posteriori estimation of conditional probability tables for the given structure from
+    complete data, where counts of each node value for each predecessor combination are the
+    sufficient statistics
+
+    .. note:: Counts of chunks are computed with `numpy.bincount` over integer coded predecessor
+              combinations and they are summed up, so that chunks can be counted in different
+              processes and memory does not grow with number of rows
+
+    .. note:: Rows with missing value of a node or its predecessors are not counted for that node
+
+    :param predecessors: Predecessors of each node
+    :param random_variables: Random variables of each node
+    :param pseudo_count: Dirichlet prior count added to each entry, 1 for Laplace smoothing
+    """
+
+    def __init__(self, predecessors: Dict[str, List[str]], random_variables: Dict[str, List[str]],
+                 pseudo_count: float = 1.0):
+        self.predecessors = {name: list(parents) for name, parents in predecessors.items()}
+        self.random_variables = {name: list(random_variables[name]) for name in self.predecessors}
+        self.pseudo_count = pseudo_count
+        self.counts = self.empty_counts()
+
+    @staticmethod
+    def from_network(network: BayesianNetwork, pseudo_count: float = 1.0) -> 'ParameterLearner':
+        """ Learner of the structure of discrete nodes of the network """
+        nodes = [node for node in network.nodes.values() if node.random_variables]
+        return ParameterLearner(
+            predecessors={node.node_name: node.predecessors for node in nodes},
+            random_variables={node.node_name: node.random_variables for node in nodes},
+            pseudo_count=pseudo_count)
+
+    def _shape(self, node_name: str) -> Tuple[int, int]:
+        """ Number of predecessor combinations and number of node values """
+        return (int(np.prod([len(self.random_variables[predecessor]) for predecessor in
+                             self.predecessors[node_name]], dtype=int)),
+                len(self.random_variables[node_name]))
+
+    def empty_counts(self) -> Dict[str, np.ndarray]:
+        return {name: np.zeros(self._shape(name), dtype=np.int64) for name in self.predecessors}
+
+    def count(self, columns: Dict[str, Sequence[str]]) -> Dict[str, np.ndarray]:
+        """
+        Sufficient statistics of the chunk without changing the learner
+
+        :param columns: Values of each variable in the chunk by name
+        :return: Counts of each node where rows are predecessor combinations in the order of
+            probability keys and columns are values of the node
+        """
+        return self.count_codes({name: encode(columns[name], self.random_variables[name]) for
+                                 name in self.predecessors})
+
+    def count_codes(self, codes: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """ Counterpart of `count` for values already coded by `encode` """
+        return {name: family_counts(codes, name, predecessors, self.random_variables) for
+                name, predecessors in self.predecessors.items()}
+
+    def merge(self, counts: Dict[str, np.ndarray]) -> None:
+        for name, node_counts in counts.items():
+            self.counts[name] += node_counts
+
+    def update(self, columns: Dict[str, Sequence[str]]) -> None:
+        """ Add counts of the chunk """
+        self.merge(self.count(columns))
+
+    def _count_range(self, file_path: str, header: List[str], start: int, end: int,
+                     chunk_size: int) -> Dict[str, np.ndarray]:
+        counts = self.empty_counts()
+        with open(file_path, 'rb') as file:
+            file.seek(start)
+            for chunk in read_chunks(file, header=header, chunk_size=chunk_size, end=end):
+                for name, node_counts in self.count(chunk).items():
+                    counts[name] += node_counts
+        return counts
+
+    def fit_csv(self, file_path: str, chunk_size: int = 100000, processes: int = 1) \
+            -> 'ParameterLearner':
+        """
+        Add counts of CSV file whose header has names of the nodes, where the file is split into
+        byte ranges at row boundaries and each range is streamed in chunks
+
+        :param file_path: Path of the CSV file
+        :param chunk_size: Number of rows counted at once
+        :param processes: Number of worker processes where each one counts single range
+        :return: The learner itself
+        """
+        with open(file_path, 'rb') as file:
+            header = next(csv.reader([file.readline().decode()]))
+            start, size = file.tell(), os.fstat(file.fileno()).st_size
+            boundaries = [start]
+            for part in range(1, processes):
+                file.seek(max(start + (size - start) * part // processes, boundaries[-1]))
+                if file.tell() > start:
+                    # Skip to the start of the next row
+                    file.readline()
+                boundaries.append(max(file.tell(), boundaries[-1]))
+            boundaries.append(size)
+
+        ranges = list(zip(boundaries[:-1], boundaries[1:]))
+        if processes <= 1:
+            counts = [self._count_range(file_path, header, start, end, chunk_size) for start, end
+                      in ranges]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                counts = list(executor.map(self._count_range, *zip(*[
+                    (file_path, header, start, end, chunk_size) for start, end in ranges])))
+        for range_counts in counts:
+            self.merge(range_counts)
+        return self
+
+    def conditional_table(self, node_name: str) -> np.ndarray:
+        """ Smoothed conditional probabilities of the node in the shape of its counts """
+        counts = self.counts[node_name] + self.pseudo_count
+        totals = counts.sum(axis=1, keepdims=True)
+        return np.divide(counts, totals, out=np.full(counts.shape, 1 / counts.shape[1]),
+                         where=totals > 0)
+
+    def probabilities(self, node_name: str) -> Dict[str, float]:
+        """ Smoothed conditional probabilities of the node keyed like `NetworkNode` """
+        probabilities = self.conditional_table(node_name)
+        all_random_variables = [self.random_variables[predecessor] for predecessor in
+                                self.predecessors[node_name]] + [self.random_variables[node_name]]
+        return {NetworkNode._probability_key(combination): float(p) for combination, p in
+                zip(itertools.product(*all_random_variables), probabilities.ravel())}
+
+    def nodes(self) -> List[NetworkNode]:
+        """ Nodes with the learned probabilities """
+        return [NetworkNode(node_name=name, random_variables=self.random_variables[name],
+                            predecessors=predecessors, probabilities=self.probabilities(name),
+                            all_random_variables=[self.random_variables[predecessor] for
+                                                  predecessor in predecessors] + [
+                                                     self.random_variables[name]])
+                for name, predecessors in self.predecessors.items()]
+
+    def network(self) -> BayesianNetwork:
+        return BayesianNetwork(initial_network=self.nodes())
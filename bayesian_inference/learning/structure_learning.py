@@ -0,0 +1,244 @@
+import csv
+import logging
+import math
+from itertools import permutations
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .parameter_learning import ParameterLearner, encode, family_counts, read_chunks
+from ..entity.bayesian_network import BayesianNetwork
+from ..entity.graph import DirectedGraph
+
+__all__ = ['StructureLearner', 'family_score', 'BIC_SCORE', 'BDEU_SCORE']
+
+BIC_SCORE = 'bic'
+BDEU_SCORE = 'bdeu'
+
+# Kind of move and the edge it is applied on
+Move = Tuple[str, str, str]
+ADD, REMOVE, REVERSE = 'add', 'remove', 'reverse'
+
+_log_gamma = np.vectorize(math.lgamma, otypes=[float])
+
+# Coded data and settings of scores kept in each worker process
+_worker_state: Optional[Tuple[Dict[str, np.ndarray], Dict[str, List[str]], str, float]] = None
+
+
+def family_score(codes: Dict[str, np.ndarray], node_name: str, predecessors: Sequence[str],
+                 random_variables: Dict[str, List[str]], score: str = BIC_SCORE,
+                 equivalent_sample_size: float = 1.0) -> float:
+    """
+    Decomposable score of single node and its predecessors, where the score of network is the sum
+    of the scores of its families
+
+    :param codes: Coded values of each variable by name
+    :param node_name: Name of the node
+    :param predecessors: Predecessors of the node
+    :param random_variables: Random variables of each variable
+    :param score: `BIC_SCORE` for log-likelihood penalized by number of parameters, or `BDEU_SCORE`
+        for log of Bayesian Dirichlet equivalent uniform marginal likelihood
+    :param equivalent_sample_size: Total pseudo count of BDeu prior
+    :return: Score of the family
+    """
+    counts = family_counts(codes, node_name, predecessors, random_variables)
+    configurations, cardinality = counts.shape
+    totals = counts.sum(axis=1)
+    if score == BIC_SCORE:
+        rows, columns = np.nonzero(counts)
+        nonzero = counts[rows, columns]
+        log_likelihood = float((nonzero * np.log(nonzero / totals[rows])).sum())
+        return log_likelihood - 0.5 * math.log(max(int(totals.sum()), 1)) * configurations * (
+                cardinality - 1)
+    alpha_j = equivalent_sample_size / configurations
+    alpha_jk = alpha_j / cardinality
+    return float((math.lgamma(alpha_j) - _log_gamma(alpha_j + totals)).sum() + (
+            _log_gamma(alpha_jk + counts) - math.lgamma(alpha_jk)).sum())
+
+
+def _initialize_worker(codes: Dict[str, np.ndarray], random_variables: Dict[str, List[str]],
+                       score: str, equivalent_sample_size: float) -> None:
+    """ Keep data of the worker once instead of sending it with each family """
+    global _worker_state
+    _worker_state = (codes, random_variables, score, equivalent_sample_size)
+
+
+def _worker_family_score(family: Tuple[str, FrozenSet[str]]) -> float:
+    codes, random_variables, score, equivalent_sample_size = _worker_state
+    node_name, predecessors = family
+    return family_score(codes, node_name, sorted(predecessors), random_variables, score=score,
+                        equivalent_sample_size=equivalent_sample_size)
+
+
+class StructureLearner(object):
+    """
+    Score based structure learning by hill climbing over DAGs with adding, removing and reversing
+    single edge, where tabu search allows moves that do not improve the score
+
+    .. note:: Scores are decomposable so that each move changes the scores of at most two families.
+              Family scores are cached, and only the ones not seen before are calculated for each
+              step, in worker processes if requested.
+
+    .. note:: Acyclicity is checked for each move on the current graph, where adding an edge
+              `u -> v` forms cycle only if `u` is reachable from `v`, and reversing it forms cycle
+              only if `v` is reachable from `u` without the edge itself
+
+    :param random_variables: Random variables of each variable
+    :param score: `BIC_SCORE` or `BDEU_SCORE`
+    :param equivalent_sample_size: Total pseudo count of BDeu prior
+    :param max_in_degree: Maximum number of predecessors of each node, unlimited if not given
+    :param tabu_length: Number of recently changed edges which cannot be changed again, where
+        search continues this many steps without improvement. Zero means plain hill climbing.
+    :param max_iterations: Maximum number of moves
+    :param processes: Number of worker processes to score families
+    :param pseudo_count: Dirichlet prior count of the probabilities of the learned network
+    """
+
+    def __init__(self, random_variables: Dict[str, List[str]], score: str = BIC_SCORE,
+                 equivalent_sample_size: float = 1.0, max_in_degree: int = None,
+                 tabu_length: int = 0, max_iterations: int = 1000, processes: int = 1,
+                 pseudo_count: float = 1.0):
+        self.random_variables = {name: list(values) for name, values in random_variables.items()}
+        self.score = score
+        self.equivalent_sample_size = equivalent_sample_size
+        self.max_in_degree = max_in_degree
+        self.tabu_length = tabu_length
+        self.max_iterations = max_iterations
+        self.processes = processes
+        self.pseudo_count = pseudo_count
+        self.predecessors: Dict[str, List[str]] = {name: [] for name in self.random_variables}
+        self.total_score: float = None
+        self._codes: Dict[str, np.ndarray] = None
+        self._cache: Dict[Tuple[str, FrozenSet[str]], float] = {}
+
+    def _candidate_moves(self, graph: DirectedGraph, parents: Dict[str, FrozenSet[str]]) \
+            -> Dict[Move, List[Tuple[str, FrozenSet[str]]]]:
+        """ Acyclic moves and the families they change """
+        moves = {}
+        for source, target in permutations(self.random_variables, 2):
+            if source in parents[target]:
+                moves[(REMOVE, source, target)] = [(target, parents[target] - {source})]
+                if self.max_in_degree is None or len(parents[source]) < self.max_in_degree:
+                    graph.remove_edge(source, target)
+                    if not graph.has_path([source], [target]):
+                        moves[(REVERSE, source, target)] = [
+                            (target, parents[target] - {source}),
+                            (source, parents[source] | {target})]
+                    graph.add_edge(source, target)
+            elif (self.max_in_degree is None or len(parents[target]) < self.max_in_degree) and \
+                    not graph.has_path([target], [source]):
+                moves[(ADD, source, target)] = [(target, parents[target] | {source})]
+        return moves
+
+    def _score_families(self, families: List[Tuple[str, FrozenSet[str]]], executor) -> None:
+        """ Fill the cache with scores of the families not seen before """
+        missing = list(dict.fromkeys(family for family in families if family not in self._cache))
+        if executor is not None:
+            scores = executor.map(_worker_family_score, missing,
+                                  chunksize=max(1, len(missing) // (4 * self.processes)))
+        else:
+            scores = (family_score(self._codes, node_name, sorted(predecessors),
+                                   self.random_variables, score=self.score,
+                                   equivalent_sample_size=self.equivalent_sample_size) for
+                      node_name, predecessors in missing)
+        self._cache.update(zip(missing, scores))
+
+    def fit(self, columns: Dict[str, Sequence[str]]) -> 'StructureLearner':
+        """
+        Learn predecessors of each variable from complete data, where rows with missing value of a
+        family are skipped for its score
+
+        :param columns: Values of each variable by name
+        :return: The learner itself
+        """
+        return self.fit_codes({name: encode(columns[name], values) for name, values in
+                               self.random_variables.items()})
+
+    def fit_csv(self, file_path: str, chunk_size: int = 100000) -> 'StructureLearner':
+        """ Learn from CSV file whose header has names of the variables """
+        chunks = {name: [] for name in self.random_variables}
+        with open(file_path, 'rb') as file:
+            header = next(csv.reader([file.readline().decode()]))
+            for chunk in read_chunks(file, header=header, chunk_size=chunk_size):
+                for name, values in self.random_variables.items():
+                    chunks[name].append(encode(chunk[name], values))
+        return self.fit_codes({name: np.concatenate(arrays) if arrays else np.zeros(0, dtype=int)
+                               for name, arrays in chunks.items()})
+
+    def fit_codes(self, codes: Dict[str, np.ndarray]) -> 'StructureLearner':
+        """ Counterpart of `fit` for values already coded by `encode` """
+        self._codes = {name: np.asarray(values, dtype=np.int64) for name, values in codes.items()}
+        self._cache = {}
+        executor = None
+        if self.processes > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(
+                max_workers=self.processes, initializer=_initialize_worker,
+                initargs=(self._codes, self.random_variables, self.score,
+                          self.equivalent_sample_size))
+        try:
+            self._search(executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self
+
+    def _search(self, executor) -> None:
+        graph = DirectedGraph()
+        for name in self.random_variables:
+            graph.add_node(name)
+        parents = {name: frozenset() for name in self.random_variables}
+        self._score_families(list(parents.items()), executor)
+        current = sum(self._cache[family] for family in parents.items())
+        best, best_parents = current, dict(parents)
+        tabu: List[FrozenSet[str]] = []
+        steps_without_improvement = 0
+
+        for _ in range(self.max_iterations):
+            moves = self._candidate_moves(graph, parents)
+            self._score_families([family for families in moves.values() for family in families],
+                                 executor)
+            # Difference of the score is the difference of the changed families only
+            deltas = {move: sum(self._cache[family] - self._cache[(family[0], parents[
+                family[0]])] for family in families) for move, families in moves.items() if
+                      frozenset(move[1:]) not in tabu}
+            if not deltas:
+                break
+            move = max(deltas, key=deltas.get)
+            if deltas[move] <= 1e-9 and self.tabu_length == 0:
+                break
+
+            kind, source, target = move
+            for node_name, predecessors in moves[move]:
+                parents[node_name] = predecessors
+            if kind == ADD:
+                graph.add_edge(source, target)
+            else:
+                graph.remove_edge(source, target)
+            if kind == REVERSE:
+                graph.add_edge(target, source)
+            current += deltas[move]
+            logging.debug(f'Applied {kind} of {source} -> {target}, score is {current}.')
+
+            if self.tabu_length:
+                tabu = (tabu + [frozenset((source, target))])[-self.tabu_length:]
+            if current > best + 1e-9:
+                best, best_parents, steps_without_improvement = current, dict(parents), 0
+            else:
+                steps_without_improvement += 1
+                if steps_without_improvement >= max(self.tabu_length, 1):
+                    break
+
+        # Predecessors in the order of variables
+        self.predecessors = {name: [variable for variable in self.random_variables if
+                                    variable in best_parents[name]] for name in
+                             self.random_variables}
+        self.total_score = best
+
+    def network(self) -> BayesianNetwork:
+        """ Network of the learned structure with probabilities fitted to the same data """
+        learner = ParameterLearner(predecessors=self.predecessors,
+                                   random_variables=self.random_variables,
+                                   pseudo_count=self.pseudo_count)
+        learner.merge(learner.count_codes(self._codes))
+        return learner.network()
@@ -0,0 +1,247 @@
+import io
+import math
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy
+
+from .expectation_maximization import ExpectationMaximizationLearner, expected_statistics
+from .parameter_learning import ParameterLearner, encode, read_chunks
+from .structure_learning import BDEU_SCORE, BIC_SCORE, StructureLearner, family_score
+from ..entity.bayesian_network import BayesianNetwork
+from ..entity.network_node import NetworkNode
+from ..exceptions.exceptions import RandomVariableNotInContext
+
+__all__ = []
+
+
+class ParameterLearnerTest(TestCase):
+    # Rows of A -> C <- B, where each row is repeated by its count
+    ROWS = [(('t', 'x', 'on'), 3), (('t', 'y', 'off'), 1), (('f', 'x', 'on'), 2),
+            (('f', 'x', 'off'), 2), (('f', 'y', 'off'), 4), (('t', '', 'on'), 5)]
+
+    def setUp(self) -> None:
+        self.learner = ParameterLearner(
+            predecessors={'A': [], 'B': [], 'C': ['A', 'B']},
+            random_variables={'A': ['t', 'f'], 'B': ['x', 'y'], 'C': ['on', 'off']},
+            pseudo_count=1.0)
+        rows = [row for row, count in self.ROWS for _ in range(count)]
+        self.columns = {name: list(column) for name, column in zip('ABC', zip(*rows))}
+        file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        with file:
+            file.write('A,B,C,Ignored\n' + ''.join(f'{a},{b},{c},0\n' for a, b, c in rows))
+        self.file_path = file.name
+
+    def tearDown(self) -> None:
+        os.remove(self.file_path)
+
+    def test_encode(self):
+        self.assertListEqual([1, 0, -1, 2], encode(['f', 't', '', 'u'], ['t', 'f', 'u']).tolist())
+        with self.assertRaises(RandomVariableNotInContext):
+            encode(['t', 'x'], ['t', 'f'])
+
+    def test_count(self):
+        counts = self.learner.count(self.columns)
+        # Rows with missing B are not counted for B and C
+        self.assertListEqual([9, 8], counts['A'].ravel().tolist())
+        self.assertListEqual([7, 5], counts['B'].ravel().tolist())
+        self.assertListEqual([[3, 0], [0, 1], [2, 2], [0, 4]], counts['C'].tolist())
+
+    def test_probabilities(self):
+        self.learner.update(self.columns)
+        probabilities = self.learner.probabilities('C')
+        self.assertAlmostEqual((3 + 1) / (3 + 2), probabilities['(t,x,on)'])
+        self.assertAlmostEqual((2 + 1) / (4 + 2), probabilities['(f,x,off)'])
+        self.assertAlmostEqual(10 / 19, self.learner.probabilities('A')['(t)'])
+
+        network = self.learner.network()
+        self.assertAlmostEqual(4 / 5, network.P('C = on | A = t, B = x'))
+
+    def test_fit_csv_in_chunks_and_processes(self):
+        expected = self.learner.count(self.columns)
+        for chunk_size, processes in [(1, 1), (4, 1), (100, 3), (2, 4)]:
+            learner = ParameterLearner(self.learner.predecessors, self.learner.random_variables)
+            learner.fit_csv(self.file_path, chunk_size=chunk_size, processes=processes)
+            for name in expected:
+                self.assertTrue(numpy.array_equal(expected[name], learner.counts[name]))
+
+    def test_read_chunks(self):
+        file = io.BytesIO(b'a,b\n1,2\n3,4\n5,6\n')
+        file.readline()
+        chunks = list(read_chunks(file, header=['a', 'b'], chunk_size=2))
+        self.assertListEqual([{'a': ['1', '3'], 'b': ['2', '4']}, {'a': ['5'], 'b': ['6']}],
+                             chunks)
+
+        for data in [b'1,2\n3\n', b'1,2\n3,4,5\n']:
+            with self.assertRaises(ValueError):
+                list(read_chunks(io.BytesIO(data), header=['a', 'b'], chunk_size=2))
+
+    def test_from_network(self):
+        network = BayesianNetwork([
+            NetworkNode(node_name='A', random_variables=['t', 'f'], predecessors=[],
+                        probabilities={'(t)': 0.5, '(f)': 0.5}, all_random_variables=[['t', 'f']]),
+            NetworkNode(node_name='B', random_variables=['t', 'f'], predecessors=['A'],
+                        probabilities={'(t,t)': 0.5, '(t,f)': 0.5, '(f,t)': 0.5, '(f,f)': 0.5},
+                        all_random_variables=[['t', 'f'], ['t', 'f']])])
+        learner = ParameterLearner.from_network(network, pseudo_count=0.0)
+        learner.update({'A': ['t', 't', 'f'], 'B': ['t', 'f', 'f']})
+        self.assertEqual(1.0, learner.probabilities('B')['(f,f)'])
+        # Combination without any row is uniform
+        learner = ParameterLearner.from_network(network, pseudo_count=0.0)
+        self.assertEqual(0.5, learner.probabilities('B')['(t,t)'])
+
+
+class StructureLearnerTest(TestCase):
+    RANDOM_VARIABLES = {'A': ['t', 'f'], 'B': ['t', 'f'], 'C': ['t', 'f'], 'D': ['t', 'f']}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # Samples of A -> B -> C where D is independent of the others
+        generator = numpy.random.RandomState(0)
+        size = 2000
+        a = generator.rand(size) < 0.3
+        b = numpy.where(a, generator.rand(size) < 0.9, generator.rand(size) < 0.2)
+        c = numpy.where(b, generator.rand(size) < 0.8, generator.rand(size) < 0.1)
+        d = generator.rand(size) < 0.5
+        cls.columns = {name: numpy.where(values, 't', 'f').tolist() for name, values in
+                       zip('ABCD', [a, b, c, d])}
+
+    def _skeleton(self, learner: StructureLearner):
+        return {frozenset((predecessor, name)) for name, predecessors in
+                learner.predecessors.items() for predecessor in predecessors}
+
+    def test_fit(self):
+        for score in [BIC_SCORE, BDEU_SCORE]:
+            learner = StructureLearner(self.RANDOM_VARIABLES, score=score).fit(self.columns)
+            self.assertSetEqual({frozenset('AB'), frozenset('BC')}, self._skeleton(learner))
+            self.assertListEqual([], learner.predecessors['D'])
+
+    def test_score_is_sum_of_family_scores(self):
+        learner = StructureLearner(self.RANDOM_VARIABLES, tabu_length=3).fit(self.columns)
+        codes = {name: encode(self.columns[name], values) for name, values in
+                 self.RANDOM_VARIABLES.items()}
+        self.assertAlmostEqual(sum(family_score(codes, name, predecessors, self.RANDOM_VARIABLES)
+                                   for name, predecessors in learner.predecessors.items()),
+                               learner.total_score)
+
+    def test_max_in_degree(self):
+        learner = StructureLearner(self.RANDOM_VARIABLES, max_in_degree=0).fit(self.columns)
+        self.assertSetEqual(set(), self._skeleton(learner))
+
+    def test_processes_and_csv(self):
+        expected = StructureLearner(self.RANDOM_VARIABLES).fit(self.columns)
+        file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        with file:
+            file.write('A,B,C,D\n' + ''.join(f'{a},{b},{c},{d}\n' for a, b, c, d in zip(
+                *[self.columns[name] for name in 'ABCD'])))
+        try:
+            learner = StructureLearner(self.RANDOM_VARIABLES, processes=2).fit_csv(
+                file.name, chunk_size=300)
+        finally:
+            os.remove(file.name)
+        self.assertDictEqual(expected.predecessors, learner.predecessors)
+        self.assertAlmostEqual(expected.total_score, learner.total_score)
+
+    def test_network(self):
+        network = StructureLearner(self.RANDOM_VARIABLES, pseudo_count=0.0).fit(
+            self.columns).network()
+        count_b = sum(value == 't' for value in self.columns['B'])
+        count_bc = sum(b == 't' and c == 't' for b, c in zip(self.columns['B'], self.columns['C']))
+        # Maximum likelihood estimates of the chain give back the frequencies of adjacent nodes
+        self.assertAlmostEqual(count_bc / count_b, network.P('C = t | B = t'))
+        self.assertAlmostEqual(count_bc / len(self.columns['C']), network.P('B = t, C = t'))
+
+
+class ExpectationMaximizationLearnerTest(TestCase):
+    PREDECESSORS = {'A': [], 'B': ['A'], 'C': ['A']}
+    RANDOM_VARIABLES = {'A': ['t', 'f'], 'B': ['t', 'f'], 'C': ['t', 'f']}
+    TABLES = {'A': numpy.array([[0.3, 0.7]]), 'B': numpy.array([[0.9, 0.1], [0.2, 0.8]]),
+              'C': numpy.array([[0.6, 0.4], [0.1, 0.9]])}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # Samples of B <- A -> C where A is missing in most of the rows and B or C in some
+        generator = numpy.random.RandomState(1)
+        size = 3000
+        a = generator.rand(size) < 0.3
+        b = numpy.where(a, generator.rand(size) < 0.9, generator.rand(size) < 0.2)
+        c = numpy.where(a, generator.rand(size) < 0.6, generator.rand(size) < 0.1)
+        cls.columns = {name: numpy.where(values, 't', 'f') for name, values in
+                       zip('ABC', [a, b, c])}
+        for name, ratio in [('A', 0.8), ('B', 0.1), ('C', 0.1)]:
+            cls.columns[name][generator.rand(size) < ratio] = ''
+        cls.columns = {name: values.tolist() for name, values in cls.columns.items()}
+
+    def test_expected_statistics(self):
+        # Rows (B = t) and (B = f, C = f), two of the latter
+        counts, log_likelihood = expected_statistics(
+            observed=('B',), values=numpy.array([[0]]), weights=numpy.array([1.0]),
+            tables=self.TABLES, predecessors=self.PREDECESSORS,
+            random_variables=self.RANDOM_VARIABLES)
+        b_true = 0.3 * 0.9 + 0.7 * 0.2
+        self.assertAlmostEqual(math.log(b_true), log_likelihood)
+        self.assertAlmostEqual(0.3 * 0.9 / b_true, counts['A'][0, 0])
+        self.assertAlmostEqual(0.3 * 0.9 / b_true, counts['B'][0, 0])
+        self.assertAlmostEqual(0.3 * 0.9 / b_true * 0.6, counts['C'][0, 0])
+
+        counts, log_likelihood = expected_statistics(
+            observed=('B', 'C'), values=numpy.array([[1, 1]]), weights=numpy.array([2.0]),
+            tables=self.TABLES, predecessors=self.PREDECESSORS,
+            random_variables=self.RANDOM_VARIABLES)
+        joint = numpy.array([0.3 * 0.1 * 0.4, 0.7 * 0.8 * 0.9])
+        self.assertAlmostEqual(2 * math.log(joint.sum()), log_likelihood)
+        self.assertTrue(numpy.allclose([[0, 2 * joint[0] / joint.sum()],
+                                        [0, 2 * joint[1] / joint.sum()]], counts['C']))
+
+    def test_complete_data_is_counting(self):
+        columns = {'A': ['t', 't', 'f'], 'B': ['t', 'f', 'f'], 'C': ['f', 'f', 't']}
+        counting = ParameterLearner(self.PREDECESSORS, self.RANDOM_VARIABLES)
+        counting.update(columns)
+        learner = ExpectationMaximizationLearner(self.PREDECESSORS, self.RANDOM_VARIABLES,
+                                                 seed=0).fit(columns)
+        for name in self.PREDECESSORS:
+            self.assertDictEqual(counting.probabilities(name), learner.probabilities(name))
+        # Log-likelihood of the random start, of the estimate and of the same estimate again
+        self.assertEqual(3, len(learner.log_likelihoods))
+        self.assertAlmostEqual(learner.log_likelihoods[1], learner.log_likelihoods[2])
+
+    def test_fit(self):
+        learner = ExpectationMaximizationLearner(self.PREDECESSORS, self.RANDOM_VARIABLES,
+                                                 pseudo_count=0.0, tolerance=1e-9, seed=0)
+        learner.fit(self.columns)
+        # Log-likelihood does not decrease without prior counts
+        self.assertTrue(all(later >= earlier - 1e-6 for earlier, later in
+                            zip(learner.log_likelihoods, learner.log_likelihoods[1:])))
+        self.assertTrue(numpy.allclose(self.TABLES['B'], learner.tables['B'], atol=0.05))
+        self.assertAlmostEqual(0.3, learner.network().P('A = t'), delta=0.05)
+
+    def test_processes_and_csv(self):
+        expected = ExpectationMaximizationLearner(self.PREDECESSORS, self.RANDOM_VARIABLES,
+                                                  seed=0).fit(self.columns)
+        file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        with file:
+            file.write('A,B,C\n' + ''.join(f'{a},{b},{c}\n' for a, b, c in zip(
+                *[self.columns[name] for name in 'ABC'])))
+        try:
+            learner = ExpectationMaximizationLearner(
+                self.PREDECESSORS, self.RANDOM_VARIABLES, seed=0, processes=2,
+                batch_size=2).fit_csv(file.name, chunk_size=500)
+        finally:
+            os.remove(file.name)
+        self.assertTrue(numpy.allclose(expected.log_likelihoods, learner.log_likelihoods))
+        for name in self.PREDECESSORS:
+            self.assertTrue(numpy.allclose(expected.tables[name], learner.tables[name]))
+
+    def test_warm_start(self):
+        learner = ExpectationMaximizationLearner(self.PREDECESSORS, self.RANDOM_VARIABLES,
+                                                 initial_tables=self.TABLES)
+        network = learner.network()
+        warm = ExpectationMaximizationLearner.from_network(network, max_iterations=1)
+        for name in self.PREDECESSORS:
+            self.assertTrue(numpy.allclose(self.TABLES[name], warm.tables[name]))
+        warm.fit(self.columns)
+        self.assertEqual(1, len(warm.log_likelihoods))
+        cold = ExpectationMaximizationLearner(self.PREDECESSORS, self.RANDOM_VARIABLES, seed=0,
+                                              max_iterations=1).fit(self.columns)
+        self.assertGreater(warm.log_likelihoods[0], cold.log_likelihoods[0])
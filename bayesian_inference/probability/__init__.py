@@ -1 +1 @@
-from .probability import QueryVariable, query_parser
+from .probability import QueryVariable, query_parser, compile_query, structured_query
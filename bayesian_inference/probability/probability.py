@@ -1,11 +1,12 @@
 import logging
 import re
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional, Sequence, Union
 
 from ..exceptions.exceptions import NonUniqueRandomVariablesInQuery, RandomVariableNotInContext
 
-__all__ = ['QueryVariable', 'query_parser']
+__all__ = ['QueryVariable', 'query_parser', 'compile_query', 'structured_query']
 
 WORD = r'(\s*\w+\s*)'
 NON_VALUED_GROUP = rf'(?:{WORD}(?:={WORD})?)'
@@ -15,7 +16,7 @@ EVIDENCE_VARIABLES = rf'{VALUED_GROUP}(?:,{VALUED_GROUP})*'
 QUERY = rf'{QUERY_VARIABLES}(?:\s*\|\s*{EVIDENCE_VARIABLES})?'
 
 
-@dataclass
+@dataclass(frozen=True)
 class QueryVariable:
     name: str
     value: str = None
@@ -61,6 +62,64 @@ def query_parser(query: str, expected_symbol_and_values: Dict[str, List[str]] =
     False
     """
 
+    # Text is parsed once for each distinct query, and only validation is repeated
+    compiled = compile_query(query)
+    if compiled is None:
+        # Logged outside of the cached parser so that each invalid query is reported
+        logging.warning(
+            f"The given query is not matched with expected regular expression: {QUERY}")
+        return False, None, None
+    queries, evidences = list(compiled[0]), list(compiled[1])
+    if expected_symbol_and_values is not None:
+        logging.debug(f"Validation of expected symbol and value will be done over "
+                      f"{expected_symbol_and_values}.")
+        check_all_variables_exist_in_context(variables=queries,
+                                             context=expected_symbol_and_values)
+        check_all_variables_exist_in_context(variables=evidences,
+                                             context=expected_symbol_and_values)
+    return True, queries, evidences
+
+
+def make_all_variables_unique(query_variables: List[QueryVariable],
+                              evidence_variables: List[QueryVariable]) -> None:
+    """
+    Combination of query variables and evidence variables has all variables as unique
+
+    :raises NonUniqueRandomVariablesInQuery: If a variable is given more than once
+    """
+    unique_set = set(e.name for e in query_variables)
+    unique_set.update(set(e.name for e in evidence_variables))
+    if len(unique_set) != len(query_variables) + len(evidence_variables):
+        raise NonUniqueRandomVariablesInQuery('Need all variables in query to be unique.')
+
+
+def check_all_variables_exist_in_context(variables: List[QueryVariable],
+                                         context: Dict[str, List[str]]) -> None:
+    """
+    Check all variable names in the context and if it has value then it is expected in the list
+    of that variable in the context
+
+    :raises RandomVariableNotInContext: If variable or its value is not in the context
+    """
+    for variable in variables:
+        if variable.name not in context or (
+                variable.value is not None and variable.value not in context[variable.name]):
+            raise RandomVariableNotInContext(
+                f'{variable.name} is either not in context or its value is not satified to '
+                f'have.')
+
+
+@lru_cache(maxsize=1024)
+def compile_query(query: str) -> Optional[Tuple[Tuple[QueryVariable, ...],
+                                                Tuple[QueryVariable, ...]]]:
+    """
+    Parse textual query into query and evidence variables, where the result of each distinct query
+    is cached so that repeated queries skip regular expressions
+
+    :param query: String valued query in the format of `query_parser`
+    :return: Query variables and evidence variables, None if query is not parsable
+    :raises NonUniqueRandomVariablesInQuery: If a variable is given more than once
+    """
     def map_to_query_variable(matched: re.Match):
         """
         Map regular expression match to QueryVariable
@@ -68,29 +127,6 @@ def query_parser(query: str, expected_symbol_and_values: Dict[str, List[str]] =
         lhs, rhs = matched.group(1), matched.group(2)
         return QueryVariable(str(lhs).strip(), str(rhs).strip() if rhs is not None else None)
 
-    def make_all_variables_unique(query_variables: List[QueryVariable],
-                                  evidence_variables: List[QueryVariable]):
-        """
-        Combination of query variables and evidence variables has all variables as unique
-        """
-        unique_set = set(e.name for e in query_variables)
-        unique_set.update(set(e.name for e in evidence_variables))
-        if len(unique_set) != len(query_variables) + len(evidence_variables):
-            raise NonUniqueRandomVariablesInQuery('Need all variables in query to be unique.')
-
-    def check_all_variables_exist_in_context(variables: List[QueryVariable],
-                                             context: Dict[str, List[str]]):
-        """
-        Check all variable names in the context and if it has value then it is expected in the list
-        of that variable in the context
-        """
-        for variable in variables:
-            if variable.name not in context or (
-                    variable.value is not None and variable.value not in context[variable.name]):
-                raise RandomVariableNotInContext(
-                    f'{variable.name} is either not in context or its value is not satified to '
-                    f'have.')
-
     # Try to full match, we need full match for query. Otherwise, it is not parsable
     match = re.fullmatch(QUERY, query)
 
@@ -108,17 +144,38 @@ def query_parser(query: str, expected_symbol_and_values: Dict[str, List[str]] =
         # Make validations
         logging.debug("Validation of variable uniqueness will be done.")
         make_all_variables_unique(query_variables=queries, evidence_variables=evidences)
-        if expected_symbol_and_values is not None:
-            logging.debug(f"Validation of expected symbol and value will be done over "
-                          f"{expected_symbol_and_values}.")
-            check_all_variables_exist_in_context(variables=queries,
-                                                 context=expected_symbol_and_values)
-            check_all_variables_exist_in_context(variables=evidences,
-                                                 context=expected_symbol_and_values)
         # Return parsed query variables and evidence variables
         logging.debug(f"Parsed queries: {queries} and evidences: {evidences}.")
-        return True, queries, evidences
+        return tuple(queries), tuple(evidences)
     else:
-        logging.warning(
-            f"The given query is not matched with expected regular expression: {QUERY}")
-        return False, None, None
+        return None
+
+
+def structured_query(query: Union[Sequence[str], Dict[str, Optional[str]]],
+                     evidence: Dict[str, str] = None,
+                     expected_symbol_and_values: Dict[str, List[str]] = None) \
+        -> Tuple[List[QueryVariable], List[QueryVariable]]:
+    """
+    Structured counterpart of `query_parser` without any text processing
+
+    :param query: Names of query variables, or their values by name where None means all values
+    :param evidence: Values of evidence variables by name
+    :param expected_symbol_and_values: In case of giving this parameter, validation of entries is
+        done whether variables exist among them and their values are valid
+    :return: List of query variables and list of evidence variables
+    :raises NonUniqueRandomVariablesInQuery: If a variable is given more than once
+    :raises RandomVariableNotInContext: If variable or its value is not in the context
+
+    >>> structured_query({'A': None, 'B': 'b'}, {'C': 'c'})[0]
+    [QueryVariable(name='A', value=None), QueryVariable(name='B', value='b')]
+    """
+    items = query.items() if isinstance(query, dict) else ((name, None) for name in query)
+    queries = [QueryVariable(name, value) for name, value in items]
+    evidences = [QueryVariable(name, value) for name, value in (evidence or {}).items()]
+    make_all_variables_unique(query_variables=queries, evidence_variables=evidences)
+    if expected_symbol_and_values is not None:
+        check_all_variables_exist_in_context(variables=queries,
+                                             context=expected_symbol_and_values)
+        check_all_variables_exist_in_context(variables=evidences,
+                                             context=expected_symbol_and_values)
+    return queries, evidences
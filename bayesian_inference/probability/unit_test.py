@@ -1,6 +1,6 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 
-from .probability import query_parser, QueryVariable
+from .probability import query_parser, QueryVariable, compile_query, structured_query
 from ..exceptions.exceptions import NonUniqueRandomVariablesInQuery, RandomVariableNotInContext
 
 __all__ = []
@@ -242,3 +242,34 @@ class TestProbabilityParser(TestCase):
         with self.assertRaises(RandomVariableNotInContext) as e:
             query_parser(query=query, expected_symbol_and_values=context)
         self.assertTrue('G' in str(e.exception))
+
+    def test_compiled_once(self):
+        query = 'A, B=b | C=c'
+        compile_query.cache_clear()
+        with mock.patch('re.fullmatch', wraps=__import__('re').fullmatch) as fullmatch:
+            first = query_parser(query=query)
+            second = query_parser(query=query, expected_symbol_and_values={
+                'A': ['a'], 'B': ['b'], 'C': ['c']})
+            self.assertEqual(1, fullmatch.call_count)
+        self.assertEqual(first, second)
+        self.assertEqual(1, compile_query.cache_info().hits)
+
+    def test_invalid_query_warned_each_time(self):
+        for _ in range(2):
+            with self.assertLogs(level='WARNING'):
+                self.assertFalse(query_parser(query='A | B')[0])
+
+    def test_structured_query(self):
+        queries, evidences = structured_query(['A', 'B'], {'C': 'c'})
+        self.assertListEqual([QueryVariable('A'), QueryVariable('B')], queries)
+        self.assertListEqual([QueryVariable('C', 'c')], evidences)
+
+        queries, evidences = structured_query({'A': None, 'B': 'b'})
+        self.assertListEqual([QueryVariable('A'), QueryVariable('B', 'b')], queries)
+        self.assertListEqual([], evidences)
+
+        with self.assertRaises(NonUniqueRandomVariablesInQuery):
+            structured_query(['A'], {'A': 'a'})
+        with self.assertRaises(RandomVariableNotInContext):
+            structured_query(['A'], {'C': 'x'}, expected_symbol_and_values={
+                'A': ['a'], 'C': ['c']})